@@ -7,6 +7,8 @@ from django.models.auth import User
 #
 # This is why users only belong to one class.
 class Course(meta.Model):
+    class META:
+        cache_pk_lookups = 300
     cname = meta.TextField(maxlength=100)
 
 class GappyUser(meta.Model):
@@ -5,13 +5,16 @@ import os, sys
 
 ACTION_MAPPING = {
     'adminindex': management.get_admin_index,
+    'adviseindexes': management.adviseindexes,
     'createsuperuser': management.createsuperuser,
     'createcachetable' : management.createcachetable,
 #     'dbcheck': management.database_check,
+    'dumpdata': management.dumpdata,
     'init': management.init,
     'inspectdb': management.inspectdb,
     'install': management.install,
     'installperms': management.installperms,
+    'loaddata': management.loaddata,
     'runserver': management.runserver,
     'sql': management.get_sql_create,
     'sqlall': management.get_sql_all,
@@ -25,7 +28,7 @@ ACTION_MAPPING = {
     'validate': management.validate,
 }
 
-NO_SQL_TRANSACTION = ('adminindex', 'createcachetable', 'dbcheck', 'install', 'installperms', 'sqlindexes')
+NO_SQL_TRANSACTION = ('adminindex', 'createcachetable', 'dbcheck', 'dumpdata', 'install', 'installperms', 'sqlindexes')
 
 def get_usage():
     """
@@ -82,7 +85,7 @@ def main():
 
     if action in ('createsuperuser', 'init', 'validate'):
         ACTION_MAPPING[action]()
-    elif action == 'inspectdb':
+    elif action in ('adviseindexes', 'inspectdb', 'loaddata'):
         try:
             param = args[1]
         except IndexError:
@@ -131,7 +134,9 @@ def main():
         for mod in mod_list:
             output = ACTION_MAPPING[action](mod)
             if output:
-                print '\n'.join(output)
+                # dumpdata's output is a generator, so print it as it comes.
+                for line in output:
+                    print line
         if action not in NO_SQL_TRANSACTION:
             print "COMMIT;"
 
@@ -78,6 +78,35 @@ DATABASE_PASSWORD = ''         # Not used with sqlite3.
 DATABASE_HOST = ''             # Set to empty string for localhost. Not used with sqlite3.
 DATABASE_PORT = ''             # Set to empty string for default. Not used with sqlite3.
 
+# Number of seconds a database connection is kept open between requests.
+# 0 closes it at the end of every request; None keeps it open indefinitely.
+DATABASE_CONN_MAX_AGE = 0
+
+# Connection pool for the postgresql and mysql backends, shared by all
+# threads. Set DATABASE_POOL_MAX_SIZE to a positive number to enable it.
+DATABASE_POOL_MAX_SIZE = 0
+DATABASE_POOL_MIN_SIZE = 0     # Connections kept open even when idle.
+DATABASE_POOL_TIMEOUT = 30     # Seconds to wait for a free connection; None means forever.
+DATABASE_POOL_MAX_IDLE = 300   # Seconds before an idle connection is closed; None means never.
+
+# Read-only copies of the database. Each item is a dictionary of the
+# DATABASE_* settings that differ from the primary database's, for example
+# {'DATABASE_HOST': 'replica1.example.com'}. If any are given, get_list(),
+# get_count(), get_values() and get_date_list() read from a replica, unless
+# the current request has already used the primary database.
+DATABASE_REPLICAS = ()
+
+# PRAGMA statements run on every new sqlite3 connection, for example
+# {'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'busy_timeout': 5000}.
+DATABASE_SQLITE_PRAGMAS = {}
+
+# Queries that take at least this many seconds are kept in
+# django.core.db.instrumentation.stats.slow_queries and, if
+# DATABASE_SLOW_QUERY_LOG is the name of a file, written to that file.
+# None disables this.
+DATABASE_SLOW_QUERY_TIME = None
+DATABASE_SLOW_QUERY_LOG = ''
+
 # Host for sending e-mail.
 EMAIL_HOST = 'localhost'
 
@@ -99,6 +128,23 @@ TEMPLATE_LOADERS = (
 #     'django.core.template.loaders.eggs.load_template_source',
 )
 
+# The maximum number of compiled templates get_template() keeps in memory, so
+# that each template is only read and parsed once. 0 turns the cache off.
+TEMPLATE_CACHE_SIZE = 500
+
+# Whether cached templates are checked for changes to their files each time
+# they're used. None means: if DEBUG is True.
+TEMPLATE_CACHE_CHECK_MTIME = None
+
+# Whether templates loaded by django.core.template.loader are compiled to
+# Python code, which renders them faster.
+TEMPLATE_COMPILE = False
+
+# Whether template tag libraries are reloaded each time a template that loads
+# them is parsed, so that changes to them show up without a restart. Only
+# for development.
+TEMPLATE_RELOAD_TAG_LIBRARIES = False
+
 # URL prefix for admin media -- CSS, JavaScript and images. Make sure to use a
 # trailing slash.
 # Examples: "http://foo.com/media/", "/media/".
@@ -188,6 +234,11 @@ MIDDLEWARE_CLASSES = (
     "django.middleware.doc.XViewMiddleware",
 )
 
+# Settings for django.middleware.querybudget.QueryBudgetMiddleware.
+QUERY_BUDGET_MAX_QUERIES = None # Maximum number of queries per view; None means no limit.
+QUERY_BUDGET_N_PLUS_ONE = 10    # Related-object lookups of one kind per view; None means no limit.
+QUERY_BUDGET_RAISE = False      # Raise QueryBudgetExceeded rather than write to stderr.
+
 ############
 # SESSIONS #
 ############
@@ -9,9 +9,12 @@ class AdminLogNode(template.Node):
         return "<GetAdminLog Node>"
 
     def render(self, context):
-        if self.user is not None and not self.user.isdigit():
-            self.user = context[self.user].id
-        context[self.varname] = log.get_list(user__id__exact=self.user, limit=self.limit, select_related=True)
+        # The node is shared by every render of a cached template, so the user
+        # ID stays local to this one.
+        user = self.user
+        if user is not None and not user.isdigit():
+            user = context[user].id
+        context[self.varname] = log.get_list(user__id__exact=user, limit=self.limit, select_related=True)
         return ''
 
 class DoGetAdminLog:
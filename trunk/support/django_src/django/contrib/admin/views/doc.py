@@ -34,24 +34,16 @@ def template_tag_index(request):
     if not doc:
         return missing_docutils_page(request)
 
-    # We have to jump through some hoops with registered_tags to make sure
-    # they don't get messed up by loading outside tagsets
-    saved_tagset = template.registered_tags.copy(), template.registered_filters.copy()
-    load_all_installed_template_libraries()
-
     # Gather docs
     tags = []
-    for tagname in template.registered_tags:
-        title, body, metadata = doc.parse_docstring(template.registered_tags[tagname].__doc__)
+    for library, tagname, tag_func in get_all_installed_template_items('tags'):
+        title, body, metadata = doc.parse_docstring(tag_func.__doc__)
         if title:
             title = doc.parse_rst(title, 'tag', 'tag:' + tagname)
         if body:
             body = doc.parse_rst(body, 'tag', 'tag:' + tagname)
         for key in metadata:
             metadata[key] = doc.parse_rst(metadata[key], 'tag', 'tag:' + tagname)
-        library = template.registered_tags[tagname].__module__.split('.')[-1]
-        if library == 'template_loader' or library == 'defaulttags':
-            library = None
         tags.append({
             'name'    : tagname,
             'title'   : title,
@@ -60,9 +52,6 @@ def template_tag_index(request):
             'library' : library,
         })
 
-    # Fix registered_tags
-    template.registered_tags, template.registered_filters = saved_tagset
-
     return render_to_response('admin_doc/template_tag_index', {'tags': tags}, context_instance=DjangoContext(request))
 template_tag_index = staff_member_required(template_tag_index)
 
@@ -70,22 +59,16 @@ def template_filter_index(request):
     if not doc:
         return missing_docutils_page(request)
 
-    saved_tagset = template.registered_tags.copy(), template.registered_filters.copy()
-    load_all_installed_template_libraries()
-
     filters = []
-    for filtername in template.registered_filters:
-        title, body, metadata = doc.parse_docstring(template.registered_filters[filtername][0].__doc__)
+    for library, filtername, (filter_func, has_arg) in get_all_installed_template_items('filters'):
+        title, body, metadata = doc.parse_docstring(filter_func.__doc__)
         if title:
             title = doc.parse_rst(title, 'filter', 'filter:' + filtername)
         if body:
             body = doc.parse_rst(body, 'filter', 'filter:' + filtername)
         for key in metadata:
             metadata[key] = doc.parse_rst(metadata[key], 'filter', 'filter:' + filtername)
-        metadata['AcceptsArgument'] = template.registered_filters[filtername][1]
-        library = template.registered_filters[filtername][0].__module__.split('.')[-1]
-        if library == 'template_loader' or library == 'defaultfilters':
-            library = None
+        metadata['AcceptsArgument'] = has_arg
         filters.append({
             'name'    : filtername,
             'title'   : title,
@@ -94,8 +77,6 @@ def template_filter_index(request):
             'library' : library,
         })
 
-    template.registered_tags, template.registered_filters = saved_tagset
-
     return render_to_response('admin_doc/template_filter_index', {'filters': filters}, context_instance=DjangoContext(request))
 template_filter_index = staff_member_required(template_filter_index)
 
@@ -229,21 +210,25 @@ def missing_docutils_page(request):
     """Display an error message for people without docutils"""
     return render_to_response('admin_doc/missing_docutils')
 
-def load_all_installed_template_libraries():
-    # Clear out and reload default tags
-    template.registered_tags.clear()
-    reload(defaulttags)
-    reload(loader) # loader defines the block/extends tags
-
-    # Load any template tag libraries from installed apps
+def get_all_installed_template_items(kind):
+    """
+    Returns (library name, name, value) for each of the built-in tags or
+    filters (kind is 'tags' or 'filters'), whose library name is None, and for
+    those of the template tag libraries of the installed apps.
+    """
+    if kind == 'tags':
+        items = [(None, name, value) for name, value in template.registered_tags.items()]
+    else:
+        items = [(None, name, value) for name, value in template.registered_filters.items()]
     for e in templatetags.__path__:
         libraries = [os.path.splitext(p)[0] for p in os.listdir(e) if p.endswith('.py') and p[0].isalpha()]
         for lib in libraries:
             try:
-                mod = defaulttags.LoadNode.load_taglib(lib)
-                reload(mod)
+                library = template.get_library(lib)
             except ImportError:
-                pass
+                continue
+            items.extend([(lib, name, value) for name, value in getattr(library, kind).items()])
+    return items
 
 def get_return_data_type(func_name):
     """Return a somewhat-helpful data type given a function name"""
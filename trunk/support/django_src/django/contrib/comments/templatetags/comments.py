@@ -3,7 +3,7 @@
 from django.core import template
 from django.core.exceptions import ObjectDoesNotExist
 from django.models.comments import comments, freecomments
-from django.models.core import contenttypes
+from django.models.core import contenttypes, registry
 import re
 
 COMMENT_FORM = '''
@@ -71,23 +71,25 @@ class CommentFormNode(template.Node):
         from django.utils.text import normalize_newlines
         import base64
         context.push()
+        obj_id = self.obj_id
         if self.obj_id_lookup_var is not None:
             try:
-                self.obj_id = template.resolve_variable(self.obj_id_lookup_var, context)
+                obj_id = template.resolve_variable(self.obj_id_lookup_var, context)
             except template.VariableDoesNotExist:
+                context.pop()
                 return ''
             # Validate that this object ID is valid for this content-type.
             # We only have to do this validation if obj_id_lookup_var is provided,
             # because do_comment_form() validates hard-coded object IDs.
             try:
-                self.content_type.get_object_for_this_type(pk=self.obj_id)
+                self.content_type.get_object_for_this_type(pk=obj_id)
             except ObjectDoesNotExist:
                 context['display_form'] = False
             else:
                 context['display_form'] = True
         else:
             context['display_form'] = True
-        context['target'] = '%s:%s' % (self.content_type.id, self.obj_id)
+        context['target'] = '%s:%s' % (self.content_type.id, obj_id)
         options = []
         for var, abbr in (('photos_required', comments.PHOTOS_REQUIRED),
                           ('photos_optional', comments.PHOTOS_OPTIONAL),
@@ -121,9 +123,10 @@ class CommentCountNode(template.Node):
     def render(self, context):
         from django.conf.settings import SITE_ID
         get_count_function = self.free and freecomments.get_count or comments.get_count
+        obj_id = self.obj_id
         if self.context_var_name is not None:
-            self.obj_id = template.resolve_variable(self.context_var_name, context)
-        comment_count = get_count_function(object_id__exact=self.obj_id,
+            obj_id = template.resolve_variable(self.context_var_name, context)
+        comment_count = get_count_function(object_id__exact=obj_id,
             content_type__package__label__exact=self.package,
             content_type__python_module_name__exact=self.module, site__id__exact=SITE_ID)
         context[self.var_name] = comment_count
@@ -140,13 +143,14 @@ class CommentListNode(template.Node):
     def render(self, context):
         from django.conf.settings import COMMENTS_BANNED_USERS_GROUP, SITE_ID
         get_list_function = self.free and freecomments.get_list or comments.get_list_with_karma
+        obj_id = self.obj_id
         if self.context_var_name is not None:
             try:
-                self.obj_id = template.resolve_variable(self.context_var_name, context)
+                obj_id = template.resolve_variable(self.context_var_name, context)
             except template.VariableDoesNotExist:
                 return ''
         kwargs = {
-            'object_id__exact': self.obj_id,
+            'object_id__exact': obj_id,
             'content_type__package__label__exact': self.package,
             'content_type__python_module_name__exact': self.module,
             'site__id__exact': SITE_ID,
@@ -200,7 +204,7 @@ class DoCommentForm:
         except ValueError: # unpack list of wrong size
             raise template.TemplateSyntaxError, "Third argument in %r tag must be in the format 'package.module'" % tokens[0]
         try:
-            content_type = contenttypes.get_object(package__label__exact=package, python_module_name__exact=module)
+            content_type = registry.get_content_type_by_name(package, module)
         except contenttypes.ContentTypeDoesNotExist:
             raise template.TemplateSyntaxError, "%r tag has invalid content-type '%s.%s'" % (tokens[0], package, module)
         obj_id_lookup_var, obj_id = None, None
@@ -280,7 +284,7 @@ class DoCommentCount:
         except ValueError: # unpack list of wrong size
             raise template.TemplateSyntaxError, "Third argument in %r tag must be in the format 'package.module'" % tokens[0]
         try:
-            content_type = contenttypes.get_object(package__label__exact=package, python_module_name__exact=module)
+            content_type = registry.get_content_type_by_name(package, module)
         except contenttypes.ContentTypeDoesNotExist:
             raise template.TemplateSyntaxError, "%r tag has invalid content-type '%s.%s'" % (tokens[0], package, module)
         var_name, obj_id = None, None
@@ -335,7 +339,7 @@ class DoGetCommentList:
         except ValueError: # unpack list of wrong size
             raise template.TemplateSyntaxError, "Third argument in %r tag must be in the format 'package.module'" % tokens[0]
         try:
-            content_type = contenttypes.get_object(package__label__exact=package, python_module_name__exact=module)
+            content_type = registry.get_content_type_by_name(package, module)
         except contenttypes.ContentTypeDoesNotExist:
             raise template.TemplateSyntaxError, "%r tag has invalid content-type '%s.%s'" % (tokens[0], package, module)
         var_name, obj_id = None, None
@@ -4,7 +4,7 @@ from django.core.exceptions import Http404, ObjectDoesNotExist
 from django.core.extensions import DjangoContext, render_to_response
 from django.models.auth import users
 from django.models.comments import comments, freecomments
-from django.models.core import contenttypes
+from django.models.core import registry
 from django.parts.auth.formfields import AuthenticationForm
 from django.utils.httpwrappers import HttpResponseRedirect
 from django.utils.text import normalize_newlines
@@ -197,7 +197,7 @@ def post_comment(request):
         rating_range, rating_choices = [], []
     content_type_id, object_id = target.split(':') # target is something like '52:5157'
     try:
-        obj = contenttypes.get_object(pk=content_type_id).get_object_for_this_type(pk=object_id)
+        obj = registry.get_content_type(content_type_id).get_object_for_this_type(pk=object_id)
     except ObjectDoesNotExist:
         raise Http404, "The comment form had an invalid 'target' parameter -- the object ID was invalid"
     option_list = options.split(',') # options is something like 'pa,ra'
@@ -280,7 +280,7 @@ def post_free_comment(request):
     if comments.get_security_hash(options, '', '', target) != security_hash:
         raise Http404, "Somebody tampered with the comment form (security violation)"
     content_type_id, object_id = target.split(':') # target is something like '52:5157'
-    content_type = contenttypes.get_object(pk=content_type_id)
+    content_type = registry.get_content_type(content_type_id)
     try:
         obj = content_type.get_object_for_this_type(pk=object_id)
     except ObjectDoesNotExist:
@@ -328,7 +328,7 @@ def comment_was_posted(request):
     if request.GET.has_key('c'):
         content_type_id, object_id = request.GET['c'].split(':')
         try:
-            content_type = contenttypes.get_object(pk=content_type_id)
+            content_type = registry.get_content_type(content_type_id)
             obj = content_type.get_object_for_this_type(pk=object_id)
         except ObjectDoesNotExist:
             pass
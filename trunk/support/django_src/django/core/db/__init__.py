@@ -8,7 +8,8 @@ All Django code assumes database SELECT statements cast the resulting values as
     * timestamps are mapped to Python datetime.datetime objects
 """
 
-from django.conf.settings import DATABASE_ENGINE
+from django.conf.settings import DATABASE_ENGINE, DATABASE_REPLICAS
+import random
 
 try:
     dbmod = __import__('django.core.db.backends.%s' % DATABASE_ENGINE, '', '', [''])
@@ -25,6 +26,7 @@ except ImportError, exc:
 
 DatabaseError = dbmod.DatabaseError
 db = dbmod.DatabaseWrapper()
+replicas = [dbmod.DatabaseWrapper(overrides) for overrides in DATABASE_REPLICAS]
 dictfetchone = dbmod.dictfetchone
 dictfetchmany = dbmod.dictfetchmany
 dictfetchall = dbmod.dictfetchall
@@ -36,6 +38,38 @@ get_limit_offset_sql = dbmod.get_limit_offset_sql
 get_random_function_sql = dbmod.get_random_function_sql
 get_table_list = dbmod.get_table_list
 get_relations = dbmod.get_relations
+get_table_scans = dbmod.get_table_scans
+get_create_temp_table_sql = dbmod.get_create_temp_table_sql
+get_drop_temp_table_sql = dbmod.get_drop_temp_table_sql
+get_index_names = dbmod.get_index_names
+get_drop_index_sql = dbmod.get_drop_index_sql
+MAX_QUERY_PARAMS = dbmod.MAX_QUERY_PARAMS
 OPERATOR_MAPPING = dbmod.OPERATOR_MAPPING
 DATA_TYPES = dbmod.DATA_TYPES
 DATA_TYPES_REVERSE = dbmod.DATA_TYPES_REVERSE
+
+def get_read_db():
+    """
+    Returns the DatabaseWrapper that read-only queries should use: a randomly
+    chosen one of DATABASE_REPLICAS, or the primary database if there are no
+    replicas or the current request has already written to the primary
+    database, so that the request sees its own changes. Reads from the
+    primary database don't count; see CursorWrapper.
+    """
+    if not replicas or db.wrote:
+        return db
+    return random.choice(replicas)
+
+def reset_queries():
+    "Called by the request handlers before a request is processed."
+    from django.core.db.instrumentation import stats
+    stats.reset()
+    db.queries = []
+    for replica in replicas:
+        replica.queries = []
+
+def end_request():
+    "Called by the request handlers once a response has been generated."
+    db.end_request()
+    for replica in replicas:
+        replica.end_request()
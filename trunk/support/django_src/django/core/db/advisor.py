@@ -0,0 +1,160 @@
+"""
+Index advisor, used by "django-admin.py adviseindexes".
+
+Reads a log of SQL statements, asks the database for the query plan of one
+example of each distinct statement (as given by instrumentation.normalize()),
+and, for every table the plan reads in full, suggests an index on the columns
+the statement's WHERE clause filters that table on. Suggestions are ranked by
+the estimated number of rows scanned times the number of times the statement
+appears in the log.
+
+The log can be the file written by DATABASE_SLOW_QUERY_LOG, in which each
+statement is followed by its parameters, or any file with one SQL statement
+per line -- for example, the queries in db.queries:
+
+    open('queries.log', 'w').write('\\n'.join([q.get_log_line() for q in db.queries]))
+"""
+
+from django.core.db.instrumentation import normalize, PARAMS_MARKER
+import datetime, re
+
+# A line of the DATABASE_SLOW_QUERY_LOG file: "[date time] seconds SQL".
+slow_log_re = re.compile(r'^\[[^\]]*\] [\d.]+ (.*)$')
+
+_name = r'(?:"[^"]+"|`[^`]+`|\[[^\]]+\]|\w+)'
+column_ref_re = re.compile(r'(%s)\.(%s)' % (_name, _name))
+from_re = re.compile(r'\bFROM\b(.*?)(?:\bWHERE\b|\bGROUP BY\b|\bORDER BY\b|\bLIMIT\b|$)', re.I | re.S)
+table_ref_re = re.compile(r'(?:^|,|\bJOIN\b)\s*(%s)(?:\s+(?:AS\s+)?(?!(?:ON|INNER|LEFT|RIGHT|OUTER|CROSS|JOIN)\b)(%s))?' % (_name, _name), re.I)
+where_re = re.compile(r'\bWHERE\b(.*?)(?:\bGROUP BY\b|\bORDER BY\b|\bLIMIT\b|\bHAVING\b|$)', re.I | re.S)
+equality_after_re = re.compile(r'^\s*=')
+equality_before_re = re.compile(r'(?:^|[^<>!])=\s*$')
+
+# At most this many columns go into one suggested index.
+MAX_INDEX_COLUMNS = 3
+
+def unquote(name):
+    if name[0] in '"`[':
+        return name[1:-1]
+    return name
+
+# The names the repr() of query parameters may use.
+_params_namespace = {'__builtins__': {}, 'datetime': datetime, 'True': True, 'False': False, 'None': None}
+
+def parse_params(text):
+    """
+    Returns the parameters from the repr() written to the query log, or None
+    if they can't be read.
+    """
+    try:
+        params = eval(text, _params_namespace)
+    except Exception:
+        return None
+    if not isinstance(params, (tuple, list)):
+        return None
+    return params
+
+def read_log(lines):
+    """
+    Returns a list of (example statement, its parameters, number of
+    occurrences) for the distinct SELECT statements in the given lines of a
+    query log. The parameters are None for statements logged without them,
+    whose values are part of the SQL.
+    """
+    shapes = {}
+    order = []
+    for line in lines:
+        line = line.strip()
+        m = slow_log_re.match(line)
+        if m:
+            line = m.group(1)
+        if not line.upper().startswith('SELECT'):
+            continue
+        params = None
+        i = line.find(PARAMS_MARKER)
+        if i != -1:
+            line, params = line[:i], parse_params(line[i + len(PARAMS_MARKER):])
+        key = normalize(line)
+        if shapes.has_key(key):
+            shapes[key][2] += 1
+        else:
+            shapes[key] = [line, params, 1]
+            order.append(key)
+    return [tuple(shapes[key]) for key in order]
+
+def get_table_aliases(sql):
+    "Returns a dictionary mapping the table names and aliases in sql to table names."
+    aliases = {}
+    m = from_re.search(sql)
+    if not m:
+        return aliases
+    for table, alias in table_ref_re.findall(m.group(1).strip()):
+        table = unquote(table)
+        aliases[table] = table
+        if alias:
+            aliases[unquote(alias)] = table
+    return aliases
+
+def get_filter_columns(sql, aliases):
+    """
+    Returns a dictionary mapping table names to the list of their columns that
+    the WHERE clause of sql filters on: columns compared with "=" first, then
+    the others, in order of appearance.
+    """
+    m = where_re.search(sql)
+    if not m:
+        return {}
+    where = m.group(1)
+    equal, other = {}, {}
+    for m in column_ref_re.finditer(where):
+        table = aliases.get(unquote(m.group(1)))
+        if table is None:
+            continue
+        if equality_after_re.match(where[m.end():]) or equality_before_re.search(where[:m.start()]):
+            columns = equal.setdefault(table, [])
+        else:
+            columns = other.setdefault(table, [])
+        column = unquote(m.group(2))
+        if column not in columns:
+            columns.append(column)
+    result = {}
+    for table in equal.keys() + other.keys():
+        columns = equal.get(table, [])[:]
+        columns.extend([c for c in other.get(table, []) if c not in columns])
+        result[table] = columns[:MAX_INDEX_COLUMNS]
+    return result
+
+def advise(cursor, statements, get_table_scans, count_rows):
+    """
+    Returns a list of suggested indexes as (score, table, columns, number of
+    statements, example statement, its parameters) tuples, highest score
+    first.
+
+    statements is the output of read_log(). get_table_scans(cursor, sql,
+    params) returns (table name or alias, estimated rows or None) for the tables the
+    query plan of sql reads in full; count_rows(cursor, table) is used when
+    there's no estimate.
+    """
+    suggestions = {}
+    row_counts = {}
+    for sql, params, frequency in statements:
+        aliases = get_table_aliases(sql)
+        filters = get_filter_columns(sql, aliases)
+        for name, rows in get_table_scans(cursor, sql, params):
+            table = aliases.get(name, name)
+            columns = filters.get(table)
+            if not columns:
+                continue
+            if rows is None:
+                if not row_counts.has_key(table):
+                    row_counts[table] = count_rows(cursor, table)
+                rows = row_counts[table]
+            key = (table, tuple(columns))
+            if suggestions.has_key(key):
+                suggestions[key][0] += rows * frequency
+                suggestions[key][3] += frequency
+            else:
+                suggestions[key] = [rows * frequency, table, list(columns), frequency, sql, params]
+    result = [tuple(s) for s in suggestions.values()]
+    result.sort()
+    result.reverse()
+    return result
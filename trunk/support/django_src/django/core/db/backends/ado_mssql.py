@@ -44,26 +44,24 @@ def variantToPython(variant, adType):
     return res
 Database.convertVariantToPython = variantToPython
 
-class DatabaseWrapper:
-    def __init__(self):
-        self.connection = None
-        self.queries = []
+class DatabaseWrapper(base.BaseDatabaseWrapper):
+    def _connect(self):
+        DATABASE_USER, DATABASE_NAME, DATABASE_HOST, DATABASE_PORT, DATABASE_PASSWORD = \
+            self._get_settings('DATABASE_USER', 'DATABASE_NAME', 'DATABASE_HOST', 'DATABASE_PORT', 'DATABASE_PASSWORD')
+        if DATABASE_NAME == '' or DATABASE_USER == '':
+            from django.core.exceptions import ImproperlyConfigured
+            raise ImproperlyConfigured, "You need to specify both DATABASE_NAME and DATABASE_USER in your Django settings file."
+        if not DATABASE_HOST:
+            DATABASE_HOST = "127.0.0.1"
+        # TODO: Handle DATABASE_PORT.
+        conn_string = "PROVIDER=SQLOLEDB;DATA SOURCE=%s;UID=%s;PWD=%s;DATABASE=%s" % (DATABASE_HOST, DATABASE_USER, DATABASE_PASSWORD, DATABASE_NAME)
+        return Database.connect(conn_string)
 
     def cursor(self):
-        from django.conf.settings import DATABASE_USER, DATABASE_NAME, DATABASE_HOST, DATABASE_PORT, DATABASE_PASSWORD, DEBUG
-        if self.connection is None:
-            if DATABASE_NAME == '' or DATABASE_USER == '':
-                from django.core.exceptions import ImproperlyConfigured
-                raise ImproperlyConfigured, "You need to specify both DATABASE_NAME and DATABASE_USER in your Django settings file."
-            if not DATABASE_HOST:
-                DATABASE_HOST = "127.0.0.1"
-            # TODO: Handle DATABASE_PORT.
-            conn_string = "PROVIDER=SQLOLEDB;DATA SOURCE=%s;UID=%s;PWD=%s;DATABASE=%s" % (DATABASE_HOST, DATABASE_USER, DATABASE_PASSWORD, DATABASE_NAME)
-            self.connection = Database.connect(conn_string)
+        from django.conf.settings import DEBUG
+        self._ensure_connection()
         cursor = self.connection.cursor()
-        if DEBUG:
-            return base.CursorDebugWrapper(cursor, self)
-        return cursor
+        return base.CursorWrapper(cursor, self, DEBUG)
 
     def commit(self):
         return self.connection.commit()
@@ -72,11 +70,6 @@ class DatabaseWrapper:
         if self.connection:
             return self.connection.rollback()
 
-    def close(self):
-        if self.connection is not None:
-            self.connection.close()
-            self.connection = None
-
     def quote_name(self, name):
         if name.startswith('[') and name.endswith(']'):
             return name # Quoting once is enough.
@@ -115,6 +108,24 @@ def get_table_list(cursor):
 def get_relations(cursor, table_name):
     raise NotImplementedError
 
+def get_table_scans(cursor, sql, params=None):
+    raise NotImplementedError
+
+def get_create_temp_table_sql(table_name, columns):
+    raise NotImplementedError
+
+def get_drop_temp_table_sql(table_name):
+    raise NotImplementedError
+
+def get_index_names(cursor, table_name):
+    raise NotImplementedError
+
+def get_drop_index_sql(table_name, index_name):
+    return "DROP INDEX %s.%s" % (table_name, index_name)
+
+# SQL Server refuses statements with more than 2100 parameters.
+MAX_QUERY_PARAMS = 2100
+
 OPERATOR_MAPPING = {
     'exact': '=',
     'iexact': 'LIKE',
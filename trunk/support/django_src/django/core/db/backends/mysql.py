@@ -9,6 +9,7 @@ from django.core.db.dicthelpers import *
 import MySQLdb as Database
 from MySQLdb.converters import conversions
 from MySQLdb.constants import FIELD_TYPE
+from MySQLdb.cursors import SSCursor
 import types
 
 DatabaseError = Database.DatabaseError
@@ -47,27 +48,36 @@ class MysqlDebugWrapper:
         else:
             return getattr(self.cursor, attr)
 
-class DatabaseWrapper:
-    def __init__(self):
-        self.connection = None
-        self.queries = []
+class DatabaseWrapper(base.BaseDatabaseWrapper):
+    supports_pooling = True
+
+    def _connect(self):
+        DATABASE_USER, DATABASE_NAME, DATABASE_HOST, DATABASE_PORT, DATABASE_PASSWORD = \
+            self._get_settings('DATABASE_USER', 'DATABASE_NAME', 'DATABASE_HOST', 'DATABASE_PORT', 'DATABASE_PASSWORD')
+        kwargs = {
+            'user': DATABASE_USER,
+            'db': DATABASE_NAME,
+            'passwd': DATABASE_PASSWORD,
+            'host': DATABASE_HOST,
+            'conv': django_conversions,
+        }
+        if DATABASE_PORT:
+            kwargs['port'] = DATABASE_PORT
+        return Database.connect(**kwargs)
 
     def cursor(self):
-        from django.conf.settings import DATABASE_USER, DATABASE_NAME, DATABASE_HOST, DATABASE_PORT, DATABASE_PASSWORD, DEBUG
-        if self.connection is None:
-            kwargs = {
-                'user': DATABASE_USER,
-                'db': DATABASE_NAME,
-                'passwd': DATABASE_PASSWORD,
-                'host': DATABASE_HOST,
-                'conv': django_conversions,
-            }
-            if DATABASE_PORT:
-                kwargs['port'] = DATABASE_PORT
-            self.connection = Database.connect(**kwargs)
+        from django.conf.settings import DEBUG
+        self._ensure_connection()
         if DEBUG:
-            return base.CursorDebugWrapper(MysqlDebugWrapper(self.connection.cursor()), self)
-        return self.connection.cursor()
+            return base.CursorWrapper(MysqlDebugWrapper(self.connection.cursor()), self, True)
+        return base.CursorWrapper(self.connection.cursor(), self)
+
+    def streaming_cursor(self):
+        # An SSCursor reads rows from the server as they're fetched. All of
+        # them must be read before the connection can run another query.
+        from django.conf.settings import DEBUG
+        self._ensure_connection()
+        return base.CursorWrapper(self.connection.cursor(SSCursor), self, DEBUG)
 
     def commit(self):
         self.connection.commit()
@@ -79,10 +89,18 @@ class DatabaseWrapper:
             except Database.NotSupportedError:
                 pass
 
-    def close(self):
-        if self.connection is not None:
-            self.connection.close()
-            self.connection = None
+    def is_usable(self, connection):
+        try:
+            connection.ping()
+        except Database.Error:
+            return False
+        return True
+
+    def reset_connection(self, connection):
+        try:
+            connection.rollback()
+        except Database.NotSupportedError:
+            pass
 
     def quote_name(self, name):
         if name.startswith("`") and name.endswith("`"):
@@ -127,6 +145,48 @@ def get_table_list(cursor):
 def get_relations(cursor, table_name):
     raise NotImplementedError
 
+def get_table_scans(cursor, sql, params=None):
+    """
+    Returns a list of (table name or alias, estimated rows) for the tables
+    that the query plan of the given SELECT statement reads in full.
+    params are the statement's parameters, or None if it has none and its
+    values are part of the SQL.
+    """
+    if params is None:
+        sql, params = sql.replace('%', '%%'), []
+    cursor.execute("EXPLAIN " + sql, params)
+    columns = [d[0] for d in cursor.description]
+    scans = []
+    for row in cursor.fetchall():
+        row = dict(zip(columns, row))
+        if row['type'] == 'ALL':
+            scans.append((row['table'], int(row['rows'] or 0)))
+    return scans
+
+def get_create_temp_table_sql(table_name, columns):
+    return "CREATE TEMPORARY TABLE %s (%s)" % (table_name, columns)
+
+def get_drop_temp_table_sql(table_name):
+    # Plain DROP TABLE would commit the current transaction.
+    return "DROP TEMPORARY TABLE %s" % table_name
+
+def get_index_names(cursor, table_name):
+    "Returns a list of the names of the indexes on the given table."
+    cursor.execute("SHOW INDEX FROM `%s`" % table_name)
+    # Key_name is the third column; there's one row per column of each index.
+    names = []
+    for row in cursor.fetchall():
+        if row[2] not in names:
+            names.append(row[2])
+    return names
+
+def get_drop_index_sql(table_name, index_name):
+    return "DROP INDEX %s ON %s" % (index_name, table_name)
+
+# There's no limit on the number of parameters in a statement, other than
+# the max_allowed_packet size.
+MAX_QUERY_PARAMS = None
+
 OPERATOR_MAPPING = {
     'exact': '=',
     'iexact': 'LIKE',
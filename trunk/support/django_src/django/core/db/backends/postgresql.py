@@ -6,36 +6,44 @@ Requires psycopg 1: http://initd.org/projects/psycopg1
 
 from django.core.db import base, typecasts
 import psycopg as Database
+import itertools, re
 
 DatabaseError = Database.DatabaseError
 
-class DatabaseWrapper:
-    def __init__(self):
-        self.connection = None
-        self.queries = []
+class DatabaseWrapper(base.BaseDatabaseWrapper):
+    supports_pooling = True
+    supports_transactional_ddl = True
+
+    def _connect(self):
+        DATABASE_USER, DATABASE_NAME, DATABASE_HOST, DATABASE_PORT, DATABASE_PASSWORD = \
+            self._get_settings('DATABASE_USER', 'DATABASE_NAME', 'DATABASE_HOST', 'DATABASE_PORT', 'DATABASE_PASSWORD')
+        if DATABASE_NAME == '':
+            from django.core.exceptions import ImproperlyConfigured
+            raise ImproperlyConfigured, "You need to specify DATABASE_NAME in your Django settings file."
+        conn_string = "dbname=%s" % DATABASE_NAME
+        if DATABASE_USER:
+            conn_string = "user=%s %s" % (DATABASE_USER, conn_string)
+        if DATABASE_PASSWORD:
+            conn_string += " password='%s'" % DATABASE_PASSWORD
+        if DATABASE_HOST:
+            conn_string += " host=%s" % DATABASE_HOST
+        if DATABASE_PORT:
+            conn_string += " port=%s" % DATABASE_PORT
+        connection = Database.connect(conn_string)
+        connection.set_isolation_level(1) # make transactions transparent to all cursors
+        return connection
 
     def cursor(self):
-        from django.conf.settings import DATABASE_USER, DATABASE_NAME, DATABASE_HOST, DATABASE_PORT, DATABASE_PASSWORD, DEBUG, TIME_ZONE
-        if self.connection is None:
-            if DATABASE_NAME == '':
-                from django.core.exceptions import ImproperlyConfigured
-                raise ImproperlyConfigured, "You need to specify DATABASE_NAME in your Django settings file."
-            conn_string = "dbname=%s" % DATABASE_NAME
-            if DATABASE_USER:
-                conn_string = "user=%s %s" % (DATABASE_USER, conn_string)
-            if DATABASE_PASSWORD:
-                conn_string += " password='%s'" % DATABASE_PASSWORD
-            if DATABASE_HOST:
-                conn_string += " host=%s" % DATABASE_HOST
-            if DATABASE_PORT:
-                conn_string += " port=%s" % DATABASE_PORT
-            self.connection = Database.connect(conn_string)
-            self.connection.set_isolation_level(1) # make transactions transparent to all cursors
+        from django.conf.settings import DEBUG, TIME_ZONE
+        self._ensure_connection()
         cursor = self.connection.cursor()
         cursor.execute("SET TIME ZONE %s", [TIME_ZONE])
-        if DEBUG:
-            return base.CursorDebugWrapper(cursor, self)
-        return cursor
+        return base.CursorWrapper(cursor, self, DEBUG)
+
+    def streaming_cursor(self):
+        from django.conf.settings import DEBUG
+        # self.cursor() sets the time zone.
+        return base.CursorWrapper(ServerSideCursor(self.cursor().cursor), self, DEBUG)
 
     def commit(self):
         return self.connection.commit()
@@ -44,16 +52,47 @@ class DatabaseWrapper:
         if self.connection:
             return self.connection.rollback()
 
-    def close(self):
-        if self.connection is not None:
-            self.connection.close()
-            self.connection = None
-
     def quote_name(self, name):
         if name.startswith('"') and name.endswith('"'):
             return name # Quoting once is enough.
         return '"%s"' % name
 
+# Numbers the server-side cursors. (id() can be negative, which isn't allowed
+# in a cursor name.)
+_cursor_numbers = itertools.count()
+
+class ServerSideCursor:
+    """
+    Runs a query through DECLARE ... CURSOR, so that each fetchmany() only
+    transfers the rows it asks for; psycopg buffers the whole result of a
+    plain SELECT. The server-side cursor goes away when the transaction ends,
+    so the rows must be fetched before the next commit.
+    """
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.name = 'django_stream_%d' % _cursor_numbers.next()
+
+    def execute(self, sql, params=()):
+        return self.cursor.execute('DECLARE %s NO SCROLL CURSOR FOR %s' % (self.name, sql), params)
+
+    def fetchone(self):
+        rows = self.fetchmany(1)
+        return rows and rows[0] or None
+
+    def fetchmany(self, size):
+        self.cursor.execute('FETCH FORWARD %d FROM %s' % (size, self.name))
+        return self.cursor.fetchall()
+
+    def fetchall(self):
+        self.cursor.execute('FETCH ALL FROM %s' % self.name)
+        return self.cursor.fetchall()
+
+    def close(self):
+        self.cursor.execute('CLOSE %s' % self.name)
+
+    def __getattr__(self, attr):
+        return getattr(self.cursor, attr)
+
 def dictfetchone(cursor):
     "Returns a row from the cursor as a dict"
     return cursor.dictfetchone()
@@ -121,6 +160,28 @@ def get_relations(cursor, table_name):
             continue
     return relations
 
+def get_table_scans(cursor, sql, params=None):
+    """
+    Returns a list of (table name or alias, estimated rows) for the tables
+    that the query plan of the given SELECT statement reads in full.
+    params are the statement's parameters, or None if it has none and its
+    values are part of the SQL.
+    """
+    if params is None:
+        sql, params = sql.replace('%', '%%'), []
+    cursor.execute("EXPLAIN " + sql, params)
+    scans = []
+    for row in cursor.fetchall():
+        m = seq_scan_re.search(row[0])
+        if m:
+            table, alias = m.group(1), m.group(2)
+            cursor.execute("SELECT reltuples FROM pg_class WHERE relname = %s", [table])
+            reltuples = cursor.fetchone()
+            scans.append((alias or table, reltuples and int(reltuples[0]) or 0))
+    return scans
+
+seq_scan_re = re.compile(r'Seq Scan on "?([^ "]+)"?(?: "?([^ "(]+)"?)?')
+
 # Register these custom typecasts, because Django expects dates/times to be
 # in Python's native (standard-library) datetime/time format, whereas psycopg
 # use mx.DateTime by default.
@@ -132,6 +193,23 @@ Database.register_type(Database.new_type((1083,1266), "TIME", typecasts.typecast
 Database.register_type(Database.new_type((1114,1184), "TIMESTAMP", typecasts.typecast_timestamp))
 Database.register_type(Database.new_type((16,), "BOOLEAN", typecasts.typecast_boolean))
 
+def get_create_temp_table_sql(table_name, columns):
+    return "CREATE TEMPORARY TABLE %s (%s)" % (table_name, columns)
+
+def get_drop_temp_table_sql(table_name):
+    return "DROP TABLE %s" % table_name
+
+def get_index_names(cursor, table_name):
+    "Returns a list of the names of the indexes on the given table."
+    cursor.execute("SELECT indexname FROM pg_indexes WHERE tablename = %s", [table_name])
+    return [row[0] for row in cursor.fetchall()]
+
+def get_drop_index_sql(table_name, index_name):
+    return "DROP INDEX %s" % index_name
+
+# There's no practical limit on the number of parameters in a statement.
+MAX_QUERY_PARAMS = None
+
 OPERATOR_MAPPING = {
     'exact': '=',
     'iexact': 'ILIKE',
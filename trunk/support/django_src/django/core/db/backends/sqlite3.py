@@ -5,6 +5,7 @@ SQLite3 backend for django.  Requires pysqlite2 (http://pysqlite.org/).
 from django.core.db import base, typecasts
 from django.core.db.dicthelpers import *
 from pysqlite2 import dbapi2 as Database
+import re
 DatabaseError = Database.DatabaseError
 
 # Register adaptors ###########################################################
@@ -24,24 +25,44 @@ def utf8rowFactory(cursor, row):
             return s
     return [utf8(r) for r in row]
 
-class DatabaseWrapper:
-    def __init__(self):
-        self.connection = None
-        self.queries = []
+# busy_timeout goes first, so that changing the journal mode waits for other
+# connections instead of failing straight away.
+PRAGMA_ORDER = ('busy_timeout', 'journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store')
+
+def _pragma_sql(name, value):
+    # PRAGMA statements don't accept parameters, so only allow plain names and
+    # values into the SQL.
+    for token in (name, str(value)):
+        if not token.lstrip('-').replace('_', '').isalnum():
+            from django.core.exceptions import ImproperlyConfigured
+            raise ImproperlyConfigured, "Invalid SQLite pragma in DATABASE_SQLITE_PRAGMAS: %r = %r" % (name, value)
+    return "PRAGMA %s = %s" % (name, value)
+
+class DatabaseWrapper(base.BaseDatabaseWrapper):
+    def _connect(self):
+        DATABASE_NAME, DATABASE_SQLITE_PRAGMAS = self._get_settings('DATABASE_NAME', 'DATABASE_SQLITE_PRAGMAS')
+        connection = Database.connect(DATABASE_NAME, detect_types=Database.PARSE_DECLTYPES)
+        if DATABASE_SQLITE_PRAGMAS:
+            names = [n for n in PRAGMA_ORDER if DATABASE_SQLITE_PRAGMAS.has_key(n)]
+            others = [n for n in DATABASE_SQLITE_PRAGMAS.keys() if n not in PRAGMA_ORDER]
+            others.sort()
+            # Some pragmas (journal_mode) can't be changed within a
+            # transaction, so keep pysqlite from opening one.
+            isolation_level = connection.isolation_level
+            connection.isolation_level = None
+            cursor = connection.cursor()
+            for name in names + others:
+                cursor.execute(_pragma_sql(name, DATABASE_SQLITE_PRAGMAS[name]))
+            cursor.close()
+            connection.isolation_level = isolation_level
+        return connection
 
     def cursor(self):
-        from django.conf.settings import DATABASE_NAME, DEBUG
-        if self.connection is None:
-            self.connection = Database.connect(DATABASE_NAME, detect_types=Database.PARSE_DECLTYPES)
-            # register extract and date_trun functions
-            self.connection.create_function("django_extract", 2, _sqlite_extract)
-            self.connection.create_function("django_date_trunc", 2, _sqlite_date_trunc)
+        from django.conf.settings import DEBUG
+        self._ensure_connection()
         cursor = self.connection.cursor(factory=SQLiteCursorWrapper)
         cursor.row_factory = utf8rowFactory
-        if DEBUG:
-            return base.CursorDebugWrapper(cursor, self)
-        else:
-            return cursor
+        return base.CursorWrapper(cursor, self, DEBUG)
 
     def commit(self):
         self.connection.commit()
@@ -50,11 +71,6 @@ class DatabaseWrapper:
         if self.connection:
             self.connection.rollback()
 
-    def close(self):
-        if self.connection is not None:
-            self.connection.close()
-            self.connection = None
-
     def quote_name(self, name):
         if name.startswith('"') and name.endswith('"'):
             return name # Quoting once is enough.
@@ -84,23 +100,25 @@ class SQLiteCursorWrapper(Database.Cursor):
 def get_last_insert_id(cursor, table_name, pk_name):
     return cursor.lastrowid
 
+# strftime() formats for the date lookups. The "%" signs are doubled because
+# convert_query() runs the SQL through the "%" operator.
+_date_extract_formats = {'year': '%%Y', 'month': '%%m', 'day': '%%d'}
+_date_trunc_formats = {
+    'year': '%%Y-01-01 00:00:00',
+    'month': '%%Y-%%m-01 00:00:00',
+    'day': '%%Y-%%m-%%d 00:00:00',
+}
+
 def get_date_extract_sql(lookup_type, table_name):
     # lookup_type is 'year', 'month', 'day'
-    # sqlite doesn't support extract, so we fake it with the user-defined
-    # function _sqlite_extract that's registered in connect(), above.
-    return 'django_extract("%s", %s)' % (lookup_type.lower(), table_name)
-
-def _sqlite_extract(lookup_type, dt):
-    try:
-        dt = typecasts.typecast_timestamp(dt)
-    except (ValueError, TypeError):
-        return None
-    return str(getattr(dt, lookup_type))
+    # sqlite doesn't support extract, so use its native strftime(), cast to an
+    # integer so that "07" equals 7.
+    return "CAST(strftime('%s', %s) AS integer)" % (_date_extract_formats[lookup_type.lower()], table_name)
 
 def get_date_trunc_sql(lookup_type, field_name):
     # lookup_type is 'year', 'month', 'day'
-    # sqlite doesn't support DATE_TRUNC, so we fake it as above.
-    return 'django_date_trunc("%s", %s)' % (lookup_type.lower(), field_name)
+    # sqlite doesn't support DATE_TRUNC, so use strftime() as above.
+    return "strftime('%s', %s)" % (_date_trunc_formats[lookup_type.lower()], field_name)
 
 def get_limit_offset_sql(limit, offset=None):
     sql = "LIMIT %s" % limit
@@ -111,26 +129,57 @@ def get_limit_offset_sql(limit, offset=None):
 def get_random_function_sql():
     return "RANDOM()"
 
-def _sqlite_date_trunc(lookup_type, dt):
-    try:
-        dt = typecasts.typecast_timestamp(dt)
-    except (ValueError, TypeError):
-        return None
-    if lookup_type == 'year':
-        return "%i-01-01 00:00:00" % dt.year
-    elif lookup_type == 'month':
-        return "%i-%02i-01 00:00:00" % (dt.year, dt.month)
-    elif lookup_type == 'day':
-        return "%i-%02i-%02i 00:00:00" % (dt.year, dt.month, dt.day)
-
 def get_table_list(cursor):
     raise NotImplementedError
 
 def get_relations(cursor, table_name):
     raise NotImplementedError
 
+def get_table_scans(cursor, sql, params=None):
+    """
+    Returns a list of (table name or alias, estimated rows) for the tables
+    that the query plan of the given SELECT statement reads in full. The
+    estimate is None if SQLite doesn't give one.
+    params are the statement's parameters, or None if it has none and its
+    values are part of the SQL.
+    """
+    if params is None:
+        sql, params = sql.replace('%', '%%'), []
+    cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+    scans = []
+    for row in cursor.fetchall():
+        # The last column is the description, like "SCAN TABLE foo AS f" or,
+        # in newer versions of SQLite, "SCAN f".
+        m = _scan_re.match(row[-1])
+        if m and 'COVERING INDEX' not in row[-1]:
+            rows = _scan_rows_re.search(row[-1])
+            scans.append((m.group(2) or m.group(1), rows and int(rows.group(1)) or None))
+    return scans
+
+_scan_re = re.compile(r'^SCAN (?:TABLE )?(\S+)(?: AS (\S+))?')
+_scan_rows_re = re.compile(r'\(~(\d+) rows\)')
+
 # Operators and fields ########################################################
 
+def get_create_temp_table_sql(table_name, columns):
+    return "CREATE TEMPORARY TABLE %s (%s)" % (table_name, columns)
+
+def get_drop_temp_table_sql(table_name):
+    return "DROP TABLE %s" % table_name
+
+def get_index_names(cursor, table_name):
+    "Returns a list of the names of the indexes created on the given table."
+    # Indexes that SQLite creates for UNIQUE and PRIMARY KEY have no SQL.
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s AND sql IS NOT NULL", [table_name])
+    return [row[0] for row in cursor.fetchall()]
+
+def get_drop_index_sql(table_name, index_name):
+    return "DROP INDEX %s" % index_name
+
+# SQLite refuses statements with more than 999 parameters
+# (SQLITE_MAX_VARIABLE_NUMBER).
+MAX_QUERY_PARAMS = 999
+
 OPERATOR_MAPPING = {
     'exact':        '=',
     'iexact':       'LIKE',
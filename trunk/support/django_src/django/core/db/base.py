@@ -1,29 +1,219 @@
+from django.core.db.instrumentation import stats, QueryRecord
 from time import time
+import threading
 
-class CursorDebugWrapper:
-    def __init__(self, cursor, db):
+try:
+    # Only exists in Python 2.4+
+    from threading import local
+except ImportError:
+    # Use the copy of _threading_local.py from Python 2.4
+    from django.utils._threading_local import local
+
+class BaseDatabaseWrapper(local):
+    """
+    Behavior shared by the DatabaseWrapper classes of all backends.
+
+    Instances are thread-local, so every thread gets its own connection (and
+    its own queries list) even though all code shares the single db.db
+    object. Rather than closing the connection after every request, the
+    request handlers call end_request(), which keeps it open for up to
+    DATABASE_CONN_MAX_AGE seconds. A reused connection is checked with
+    is_usable() the first time the next request asks for a cursor.
+
+    Backends that set supports_pooling draw their connections from a
+    ConnectionPool shared by all threads instead, if DATABASE_POOL_MAX_SIZE
+    is set. Subclasses implement _connect(), which opens a new connection,
+    and call _ensure_connection() before handing out a cursor.
+
+    settings_overrides is a dictionary of connection settings (such as
+    DATABASE_NAME) that take precedence over the settings file. It's used for
+    the wrappers of DATABASE_REPLICAS.
+
+    Backends that set supports_transactional_ddl can drop and create indexes
+    within a transaction, without committing it.
+    """
+    supports_pooling = False
+    supports_transactional_ddl = False
+    _pools = {} # Shared by all threads, keyed by id(wrapper); see get_pool().
+    _pool_lock = threading.Lock()
+
+    def __init__(self, settings_overrides=None):
+        self.settings_overrides = settings_overrides or {}
+        self.connection = None
+        self.connection_created = None
+        self.connection_pooled = False
+        self.needs_health_check = False
+        self.wrote = False
+        self.queries = []
+
+    def _get_settings(self, *names):
+        "Returns the values of the given connection settings, as a list."
+        from django.conf import settings
+        return [self.settings_overrides.get(name, getattr(settings, name)) for name in names]
+
+    def _connect(self):
+        raise NotImplementedError
+
+    def _ensure_connection(self):
+        "Makes sure self.connection is usable, opening a new connection if needed."
+        if not self._valid_connection():
+            self._open_connection()
+
+    def _open_connection(self):
+        "Sets self.connection to a new or pooled connection."
+        from django.conf.settings import DATABASE_POOL_MAX_SIZE
+        if self.supports_pooling and DATABASE_POOL_MAX_SIZE:
+            self.connection = self.get_pool().get()
+            self.connection_pooled = True
+        else:
+            self.connection = self._connect()
+            self.connection_pooled = False
+        self.connection_created = time()
+
+    def _valid_connection(self):
+        "Returns True if self.connection is open and can be used as is."
+        if self.connection is None:
+            return False
+        if self.needs_health_check:
+            self.needs_health_check = False
+            if not self.is_usable(self.connection):
+                self._close_unusable()
+                return False
+        return True
+
+    def is_usable(self, connection):
+        """
+        Returns True if the server still answers on the given connection. This
+        is a cheap round trip; backends with a native "ping" may override it.
+        """
+        try:
+            connection.cursor().execute("SELECT 1")
+        except Exception:
+            return False
+        return True
+
+    def reset_connection(self, connection):
+        """
+        Clears whatever state a request left on the given connection, before
+        it's used by another request.
+        """
+        connection.rollback()
+
+    def get_pool(self):
+        "Returns the connection pool shared by all threads, creating it if needed."
+        pool = self._pools.get(id(self))
+        if pool is None:
+            from django.conf.settings import DATABASE_POOL_MIN_SIZE, DATABASE_POOL_MAX_SIZE, DATABASE_POOL_TIMEOUT, DATABASE_POOL_MAX_IDLE
+            from django.core.db.pool import ConnectionPool
+            self._pool_lock.acquire()
+            try:
+                pool = self._pools.get(id(self))
+                if pool is None:
+                    pool = ConnectionPool(self._connect, DATABASE_POOL_MIN_SIZE,
+                        DATABASE_POOL_MAX_SIZE, DATABASE_POOL_TIMEOUT, DATABASE_POOL_MAX_IDLE,
+                        self.reset_connection, self.is_usable)
+                    self._pools[id(self)] = pool
+            finally:
+                self._pool_lock.release()
+        return pool
+
+    def end_request(self):
+        """
+        Called by the request handlers once a response has been generated.
+
+        A pooled connection is put back into the pool. Otherwise, the
+        connection is closed if persistent connections are disabled
+        (DATABASE_CONN_MAX_AGE = 0) or it has reached its maximum age, and
+        reset (see reset_connection()) if not, so the next request starts
+        with a clean transaction.
+        """
+        from django.conf.settings import DATABASE_CONN_MAX_AGE
+        self.wrote = False
+        if self.connection is None:
+            return
+        if self.connection_pooled:
+            connection, self.connection = self.connection, None
+            self.get_pool().put(connection)
+            return
+        if DATABASE_CONN_MAX_AGE is not None and time() - self.connection_created >= DATABASE_CONN_MAX_AGE:
+            self.close()
+            return
+        try:
+            self.reset_connection(self.connection)
+        except Exception:
+            self._close_unusable()
+        else:
+            self.needs_health_check = True
+
+    def streaming_cursor(self):
+        """
+        Returns a cursor whose fetchmany() gets rows from the database server
+        as they're asked for, rather than buffering the whole result set in
+        client memory. Backends whose cursors already work that way (such as
+        sqlite3) don't need to override it.
+        """
+        return self.cursor()
+
+    def close(self):
+        if self.connection is not None:
+            if self.connection_pooled:
+                self.get_pool().discard(self.connection)
+            else:
+                self.connection.close()
+            self.connection = None
+
+    def _close_unusable(self):
+        "Drops a connection that's known to be broken, ignoring any errors."
+        if self.connection_pooled:
+            self.get_pool().discard(self.connection)
+        else:
+            try:
+                self.connection.close()
+            except Exception:
+                pass
+        self.connection = None
+
+def is_select(sql):
+    "Returns True if the given SQL statement is a SELECT, which can't write."
+    return sql.lstrip()[:6].upper() == 'SELECT'
+
+class CursorWrapper:
+    """
+    Wraps every cursor handed out by a DatabaseWrapper, reporting each query
+    to django.core.db.instrumentation. If debug is True, the queries are also
+    kept in db.queries.
+
+    Any statement other than a SELECT sets db.wrote, which tells get_read_db()
+    to keep reading from the primary database for the rest of the request.
+    """
+    def __init__(self, cursor, db, debug=False):
         self.cursor = cursor
         self.db = db
+        self.debug = debug
 
-    def execute(self, sql, params=[]):
+    def execute(self, sql, params=()):
+        if not self.db.wrote and not is_select(sql):
+            self.db.wrote = True
         start = time()
-        result = self.cursor.execute(sql, params)
-        stop = time()
-        self.db.queries.append({
-            'sql': sql % tuple(params),
-            'time': "%.3f" % (stop - start),
-        })
-        return result
+        try:
+            return self.cursor.execute(sql, params)
+        finally:
+            elapsed = time() - start
+            stats.record(sql, params, elapsed)
+            if self.debug:
+                self.db.queries.append(QueryRecord(sql, params, elapsed))
 
     def executemany(self, sql, param_list):
+        if not self.db.wrote and not is_select(sql):
+            self.db.wrote = True
         start = time()
-        result = self.cursor.executemany(sql, param_list)
-        stop = time()
-        self.db.queries.append({
-            'sql': 'MANY: ' + sql + ' ' + str(tuple(param_list)),
-            'time': "%.3f" % (stop - start),
-        })
-        return result
+        try:
+            return self.cursor.executemany(sql, param_list)
+        finally:
+            elapsed = time() - start
+            stats.record(sql, param_list, elapsed, True)
+            if self.debug:
+                self.db.queries.append(QueryRecord(sql, param_list, elapsed, True))
 
     def __getattr__(self, attr):
         if self.__dict__.has_key(attr):
@@ -0,0 +1,199 @@
+"""
+Query instrumentation.
+
+Every cursor handed out by a DatabaseWrapper reports each query it runs to
+the thread-local ``stats`` object, which keeps cheap per-request counters --
+number of queries, total and maximum time, how often each statement ran --
+and the queries slower than DATABASE_SLOW_QUERY_TIME. Nothing is formatted
+until somebody asks for it. The request handler calls stats.reset() at the
+start of every request; outside of requests (in scripts and management
+commands, say) at most MAX_TRACKED distinct statements, executions and slow
+queries are kept, so that long-running processes don't grow without bound.
+
+Callables added to ``listeners`` are called as listener(sql, params, time)
+after every query, in the thread that ran it.
+
+Example::
+
+    >>> from django.core.db.instrumentation import stats
+    >>> stats.count, stats.total_time
+    (12, 0.0131)
+    >>> stats.duplicates()
+    [('SELECT ... WHERE "id" = %s', (1,), 3)]
+"""
+
+from time import time, strftime
+import re, threading
+
+try:
+    # Only exists in Python 2.4+
+    from threading import local
+except ImportError:
+    # Use the copy of _threading_local.py from Python 2.4
+    from django.utils._threading_local import local
+
+listeners = []
+
+# Separates the SQL from its parameters in the slow query log.
+PARAMS_MARKER = ' -- params: '
+
+# The most distinct statements, executions and slow queries that are kept.
+MAX_TRACKED = 1000
+
+class QueryRecord:
+    """
+    A query that has been run. For backwards compatibility, it acts like the
+    dictionary {'sql': ..., 'time': ...} that db.queries used to contain, but
+    the SQL is only interpolated when it's asked for.
+    """
+    def __init__(self, sql, params, time, many=False):
+        self.raw_sql, self.params, self.time, self.many = sql, params, time, many
+
+    def get_sql(self):
+        if self.many:
+            return 'MANY: ' + self.raw_sql + ' ' + str(tuple(self.params))
+        try:
+            return self.raw_sql % tuple(self.params)
+        except TypeError:
+            return self.raw_sql
+    sql = property(get_sql)
+
+    def get_log_line(self):
+        """
+        Returns the query as it's written to DATABASE_SLOW_QUERY_LOG: the SQL
+        with its placeholders, followed by " -- params: " and the repr() of
+        the parameters, so that it can be run again (see db.advisor).
+        """
+        if self.many:
+            return self.get_sql()
+        return '%s%s%r' % (self.raw_sql.replace('\n', ' '), PARAMS_MARKER, tuple(self.params))
+
+    def __getitem__(self, key):
+        if key == 'sql':
+            return self.get_sql()
+        elif key == 'time':
+            return "%.3f" % self.time
+        raise KeyError, key
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def has_key(self, key):
+        return key in ('sql', 'time')
+
+    def keys(self):
+        return ['sql', 'time']
+
+    def __repr__(self):
+        return repr({'sql': self['sql'], 'time': self['time']})
+
+# Literals that vary between executions of the "same" statement.
+_string_re = re.compile(r"'(?:[^']|'')*'")
+_number_re = re.compile(r"(?<![\w\"`\]])-?\d+(?:\.\d+)?")
+_placeholder_list_re = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_whitespace_re = re.compile(r"\s+")
+
+def normalize(sql):
+    """
+    Returns the "fingerprint" of the given SQL: the statement with its
+    placeholders and literals replaced by "?", lists of those collapsed to
+    "(...)" and whitespace collapsed, so that statements that differ only in
+    their parameters have the same fingerprint.
+    """
+    sql = sql.replace('%s', '?')
+    sql = _string_re.sub('?', sql)
+    sql = _number_re.sub('?', sql)
+    sql = _placeholder_list_re.sub('(...)', sql)
+    return _whitespace_re.sub(' ', sql).strip()
+
+_log_lock = threading.Lock()
+
+class QueryStats(local):
+    "Per-thread query counters; see the module docstring."
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        "Clears all counters. Called at the start of every request."
+        from django.conf.settings import DATABASE_SLOW_QUERY_TIME, DATABASE_SLOW_QUERY_LOG
+        self.slow_query_time = DATABASE_SLOW_QUERY_TIME
+        self.slow_query_log = DATABASE_SLOW_QUERY_LOG
+        self.count = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.statements = {} # Maps raw SQL to number of executions.
+        self.executions = {} # Maps (raw SQL, params) to number of executions.
+        self.slow_queries = []
+
+    def record(self, sql, params, elapsed, many=False):
+        "Called by the cursor wrappers after every query."
+        self.count += 1
+        self.total_time += elapsed
+        if elapsed > self.max_time:
+            self.max_time = elapsed
+        if self.statements.has_key(sql):
+            self.statements[sql] += 1
+        elif len(self.statements) < MAX_TRACKED:
+            self.statements[sql] = 1
+        if not many:
+            try:
+                key = (sql, tuple(params))
+                if self.executions.has_key(key):
+                    self.executions[key] += 1
+                elif len(self.executions) < MAX_TRACKED:
+                    self.executions[key] = 1
+            except TypeError: # Unhashable parameters.
+                pass
+        if self.slow_query_time is not None and elapsed >= self.slow_query_time:
+            record = QueryRecord(sql, params, elapsed, many)
+            if len(self.slow_queries) < MAX_TRACKED:
+                self.slow_queries.append(record)
+            if self.slow_query_log:
+                self._log(record)
+        for listener in listeners:
+            listener(sql, params, elapsed)
+
+    def _log(self, record):
+        _log_lock.acquire()
+        try:
+            f = open(self.slow_query_log, 'a')
+            try:
+                f.write("[%s] %.3f %s\n" % (strftime('%Y-%m-%d %H:%M:%S'), record.time, record.get_log_line()))
+            finally:
+                f.close()
+        finally:
+            _log_lock.release()
+
+    def duplicates(self):
+        """
+        Returns a list of (sql, params, count) for the queries that ran more
+        than once with the same parameters, most frequent first.
+        """
+        result = [(n, sql, params) for (sql, params), n in self.executions.items() if n > 1]
+        result.sort()
+        result.reverse()
+        return [(sql, params, n) for n, sql, params in result]
+
+    def fingerprints(self):
+        "Returns a dictionary mapping normalized statements to execution counts."
+        result = {}
+        for sql, n in self.statements.items():
+            key = normalize(sql)
+            result[key] = result.get(key, 0) + n
+        return result
+
+    def summary(self):
+        "Returns the counters as a dictionary."
+        return {
+            'count': self.count,
+            'total_time': self.total_time,
+            'max_time': self.max_time,
+            'distinct': len(self.statements),
+            'duplicates': len([n for n in self.executions.values() if n > 1]),
+            'slow': len(self.slow_queries),
+        }
+
+stats = QueryStats()
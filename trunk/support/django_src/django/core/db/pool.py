@@ -0,0 +1,204 @@
+"""
+A bounded pool of database connections, shared by all threads.
+
+Used by the backends that support it (currently postgresql and mysql) when
+DATABASE_POOL_MAX_SIZE is greater than 0. A thread checks a connection out of
+the pool the first time it needs a cursor during a request, and the request
+handler puts it back at the end of the request.
+
+The pool doesn't know anything about a particular database; it's given a
+function that opens a new connection, so it can be used (and tested) with any
+DB-API module.
+"""
+
+from time import time
+import threading
+
+class PoolTimeout(Exception):
+    "Raised when no connection became available within the checkout timeout."
+    pass
+
+def _rollback(connection):
+    connection.rollback()
+
+class ConnectionPool:
+    """
+    Keeps up to max_size connections open. The first checkout opens min_size
+    connections at once. Connections that have been idle for more than
+    max_idle seconds are closed, unless that would leave fewer than min_size
+    connections open. If all max_size connections are checked out,
+    get() waits up to timeout seconds (None means forever) for one to be put
+    back, then raises PoolTimeout.
+
+    connect is called with no arguments to open a new connection. reset is
+    called on every connection that's put back, to clear any state left by
+    the previous user; it defaults to rolling back. If is_usable is given,
+    it's called on an idle connection before it's handed out, and the
+    connection is replaced if it returns False.
+    """
+    def __init__(self, connect, min_size=0, max_size=10, timeout=30, max_idle=300, reset=_rollback, is_usable=None):
+        if max_size < 1:
+            raise ValueError, "max_size must be at least 1."
+        if min_size > max_size:
+            raise ValueError, "min_size can't be larger than max_size."
+        self.connect = connect
+        self.min_size, self.max_size = min_size, max_size
+        self.timeout, self.max_idle = timeout, max_idle
+        self.reset, self.is_usable = reset, is_usable
+        self._idle = [] # (connection, time it was put back), oldest first.
+        self._size = 0 # Number of open connections, idle or checked out.
+        self._filled = False # Whether min_size connections have been opened.
+        self._condition = threading.Condition(threading.Lock())
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.connects = 0
+        self.evictions = 0
+
+    def get(self):
+        "Checks out a connection, opening a new one if necessary."
+        if not self._filled:
+            self._fill()
+        self._condition.acquire()
+        try:
+            start = time()
+            waited = False
+            while 1:
+                self._evict_idle()
+                if self._idle:
+                    # Hand out the most recently used connection, so that
+                    # connections the pool doesn't need age out.
+                    connection = self._idle.pop()[0]
+                    break
+                if self._size < self.max_size:
+                    connection = None
+                    self._size += 1
+                    break
+                if self.timeout is None:
+                    remaining = None
+                else:
+                    remaining = start + self.timeout - time()
+                    if remaining <= 0:
+                        raise PoolTimeout, "No database connection became available within %s seconds." % self.timeout
+                waited = True
+                self._condition.wait(remaining)
+            self.checkouts += 1
+            if waited:
+                self.waits += 1
+                self.wait_time += time() - start
+        finally:
+            self._condition.release()
+        if connection is not None and self.is_usable is not None and not self.is_usable(connection):
+            _close_quietly(connection)
+            connection = None
+        if connection is None:
+            try:
+                connection = self.connect()
+            except:
+                self._release_slot()
+                raise
+            self._condition.acquire()
+            self.connects += 1
+            self._condition.release()
+        return connection
+
+    def put(self, connection):
+        "Returns a checked-out connection to the pool."
+        try:
+            self.reset(connection)
+        except Exception:
+            self.discard(connection)
+            return
+        self._condition.acquire()
+        try:
+            self._idle.append((connection, time()))
+            self._evict_idle()
+            self._condition.notify()
+        finally:
+            self._condition.release()
+
+    def discard(self, connection):
+        "Closes a checked-out connection instead of returning it to the pool."
+        _close_quietly(connection)
+        self._release_slot()
+
+    def close_all(self):
+        "Closes all idle connections. Checked-out connections aren't affected."
+        self._condition.acquire()
+        try:
+            for connection, returned in self._idle:
+                _close_quietly(connection)
+            self._size -= len(self._idle)
+            self._idle = []
+            self._filled = False
+            self._condition.notifyAll()
+        finally:
+            self._condition.release()
+
+    def stats(self):
+        "Returns a dictionary of the pool's size and usage counters."
+        self._condition.acquire()
+        try:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'wait_time': self.wait_time,
+                'connects': self.connects,
+                'evictions': self.evictions,
+            }
+        finally:
+            self._condition.release()
+
+    def _fill(self):
+        # Opens connections until there are min_size, without holding the
+        # lock while connecting.
+        self._condition.acquire()
+        try:
+            if self._filled:
+                return
+            self._filled = True
+            count = max(self.min_size - self._size, 0)
+            self._size += count
+        finally:
+            self._condition.release()
+        for i in range(count):
+            try:
+                connection = self.connect()
+            except:
+                self._condition.acquire()
+                self._size -= count - i
+                self._filled = False
+                self._condition.notifyAll()
+                self._condition.release()
+                raise
+            self._condition.acquire()
+            self.connects += 1
+            self._idle.append((connection, time()))
+            self._condition.notify()
+            self._condition.release()
+
+    def _release_slot(self):
+        self._condition.acquire()
+        try:
+            self._size -= 1
+            self._condition.notify()
+        finally:
+            self._condition.release()
+
+    def _evict_idle(self):
+        # Must be called with the lock held.
+        if self.max_idle is None:
+            return
+        cutoff = time() - self.max_idle
+        while self._idle and self._idle[0][1] < cutoff and self._size > self.min_size:
+            _close_quietly(self._idle.pop(0)[0])
+            self._size -= 1
+            self.evictions += 1
+
+def _close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
@@ -0,0 +1,145 @@
+"""
+Query budgets: a limit on the number of queries a piece of code may run, plus
+detection of "N+1" query patterns -- the same statement run over and over with
+different parameters by related-object lookups such as
+``article.get_reporter()`` in a loop.
+
+QueryBudgetMiddleware puts every view on a budget. In tests, use
+assert_max_queries()::
+
+    >>> from django.core.db.querybudget import assert_max_queries
+    >>> assert_max_queries(3, some_function, arg1, arg2)
+
+which raises QueryBudgetExceeded, with a report of what went wrong, if
+some_function runs more than 3 queries or an N+1 pattern.
+"""
+
+from django.core.db import instrumentation
+import os, sys
+
+try:
+    # Only exists in Python 2.4+
+    from threading import local
+except ImportError:
+    # Use the copy of _threading_local.py from Python 2.4
+    from django.utils._threading_local import local
+
+# The functions (in django.core.meta) whose queries are checked for N+1
+# patterns.
+N_PLUS_ONE_SOURCES = ('method_get_many_to_one', 'method_get_related')
+
+DJANGO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+class _Active(local):
+    def __init__(self):
+        self.budgets = []
+
+_active = _Active()
+
+class QueryBudget:
+    """
+    Counts the queries run in the current thread between start() and stop().
+
+    max_queries is the maximum number of queries allowed (None means no
+    limit). n_plus_one is the number of times a statement run by one of the
+    N_PLUS_ONE_SOURCES may be run with different parameters before it's
+    reported as an N+1 pattern (None disables the check). name (e.g. the name
+    of the view) is used in the report.
+    """
+    def __init__(self, max_queries=None, n_plus_one=None, name=''):
+        self.max_queries, self.n_plus_one, self.name = max_queries, n_plus_one, name
+        self.count = 0
+        # Maps raw SQL to [set of parameters, source function, call site].
+        self.related_queries = {}
+
+    def start(self):
+        _active.budgets.append(self)
+
+    def stop(self):
+        if self in _active.budgets:
+            _active.budgets.remove(self)
+
+    def record(self, sql, params, source):
+        self.count += 1
+        if source is not None:
+            entry = self.related_queries.get(sql)
+            if entry is None:
+                entry = self.related_queries[sql] = [{}, source[0], source[1]]
+            try:
+                entry[0][tuple(params)] = None
+            except TypeError: # Unhashable parameters.
+                pass
+
+    def violations(self):
+        "Returns a list of strings describing how the budget was exceeded."
+        result = []
+        if self.max_queries is not None and self.count > self.max_queries:
+            result.append("%s queries were run; the maximum is %s." % (self.count, self.max_queries))
+        if self.n_plus_one is not None:
+            for sql, (param_sets, source, call_site) in self.related_queries.items():
+                if len(param_sets) > self.n_plus_one:
+                    result.append("N+1 pattern: %s queries with different parameters from %s, called at %s: %s" % \
+                        (len(param_sets), source, call_site, instrumentation.normalize(sql)))
+        return result
+
+    def report(self):
+        violations = self.violations()
+        if not violations:
+            return ''
+        return "Query budget exceeded%s:\n    %s" % (self.name and (' in %s' % self.name) or '', '\n    '.join(violations))
+
+    def check(self):
+        "Raises QueryBudgetExceeded if the budget was exceeded."
+        report = self.report()
+        if report:
+            raise QueryBudgetExceeded, report
+
+def _find_source():
+    """
+    If the current query comes from one of the N_PLUS_ONE_SOURCES, returns a
+    tuple of the name of that function and its call site, as "file:line".
+    The call site is the innermost caller outside of Django, if any.
+    """
+    frame = sys._getframe(2)
+    while frame is not None and frame.f_code.co_name not in N_PLUS_ONE_SOURCES:
+        frame = frame.f_back
+    if frame is None:
+        return None
+    source = frame.f_code.co_name
+    caller = frame = frame.f_back
+    while frame is not None and frame.f_code.co_filename.startswith(DJANGO_DIR):
+        frame = frame.f_back
+    if frame is None:
+        frame = caller
+    if frame is None:
+        return source, 'unknown'
+    return source, '%s:%s' % (frame.f_code.co_filename, frame.f_lineno)
+
+def _listener(sql, params, time):
+    budgets = _active.budgets
+    if not budgets:
+        return
+    source = _find_source()
+    for budget in budgets:
+        budget.record(sql, params, source)
+
+instrumentation.listeners.append(_listener)
+
+def assert_max_queries(max_queries, func, *args, **kwargs):
+    """
+    Calls func(*args, **kwargs) and returns its result, raising
+    QueryBudgetExceeded if it ran more than max_queries queries or (with
+    QUERY_BUDGET_N_PLUS_ONE set) an N+1 pattern.
+    """
+    from django.conf.settings import QUERY_BUDGET_N_PLUS_ONE
+    budget = QueryBudget(max_queries, QUERY_BUDGET_N_PLUS_ONE, getattr(func, '__name__', ''))
+    budget.start()
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        budget.stop()
+    budget.check()
+    return result
@@ -42,14 +42,32 @@ class BaseHandler:
             if hasattr(mw_instance, 'process_exception'):
                 self._exception_middleware.insert(0, mw_instance.process_exception)
 
+        self.load_registry()
+
+    def load_registry(self):
+        """
+        Loads the content types and the current site into memory (see
+        django.models.core.Registry), so that requests don't have to. If that
+        fails -- say the tables don't exist yet -- they're loaded when first
+        needed instead.
+        """
+        from django.core import db
+        from django.models.core import registry
+        try:
+            registry.load()
+        except Exception:
+            registry.reset()
+            for wrapper in [db.db] + db.replicas:
+                wrapper.rollback()
+
     def get_response(self, path, request):
         "Returns an HttpResponse object for the given HttpRequest"
         from django.core import db, exceptions, urlresolvers
         from django.core.mail import mail_admins
         from django.conf.settings import DEBUG, INTERNAL_IPS, ROOT_URLCONF
 
-        # Reset query list per request.
-        db.db.queries = []
+        # Reset query list and counters per request.
+        db.reset_queries()
 
         # Apply request middleware
         for middleware_method in self._request_middleware:
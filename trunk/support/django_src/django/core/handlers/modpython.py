@@ -134,18 +134,26 @@ class ModPythonHandler(BaseHandler):
         if self._request_middleware is None:
             self.load_middleware()
 
+        # The database connection is given back only once response middleware
+        # (which may save the session, for instance) is done with it and the
+        # content has been written.
+        response = None
         try:
             request = ModPythonRequest(req)
             response = self.get_response(req.uri, request)
-        finally:
-            db.db.close()
 
-        # Apply response middleware
-        for middleware_method in self._response_middleware:
-            response = middleware_method(request, response)
+            # Apply response middleware
+            for middleware_method in self._response_middleware:
+                response = middleware_method(request, response)
 
-        # Convert our custom HttpResponse object back into the mod_python req.
-        populate_apache_request(response, req)
+            # Convert our custom HttpResponse object back into the mod_python req.
+            populate_apache_request(response, req)
+        finally:
+            try:
+                if response is not None:
+                    response.close()
+            finally:
+                db.end_request()
         return 0 # mod_python.apache.OK
 
 def populate_apache_request(http_response, mod_python_req):
@@ -158,7 +166,8 @@ def populate_apache_request(http_response, mod_python_req):
     for c in http_response.cookies.values():
         mod_python_req.headers_out.add('Set-Cookie', c.output(header=''))
     mod_python_req.status = http_response.status_code
-    mod_python_req.write(http_response.get_content_as_string(settings.DEFAULT_CHARSET))
+    for chunk in http_response.iter_content(settings.DEFAULT_CHARSET):
+        mod_python_req.write(chunk)
 
 def handler(req):
     # mod_python hooks into this function.
@@ -1,5 +1,6 @@
 from django.core.handlers.base import BaseHandler
 from django.utils import datastructures, httpwrappers
+from django.utils.functional import call_all
 from pprint import pformat
 
 # See http://www.w3.org/Protocols/rfc2616/rfc2616-sec10.html
@@ -149,24 +150,50 @@ class WSGIHandler(BaseHandler):
         if self._request_middleware is None:
             self.load_middleware()
 
+        # The database connection is given back only once response middleware
+        # (which may save the session, for instance) is done with it.
         try:
             request = WSGIRequest(environ)
             response = self.get_response(request.path, request)
-        finally:
-            db.db.close()
 
-        # Apply response middleware
-        for middleware_method in self._response_middleware:
-            response = middleware_method(request, response)
+            # Apply response middleware
+            for middleware_method in self._response_middleware:
+                response = middleware_method(request, response)
 
-        try:
-            status_text = STATUS_CODE_TEXT[response.status_code]
-        except KeyError:
-            status_text = 'UNKNOWN STATUS CODE'
-        status = '%s %s' % (response.status_code, status_text)
-        response_headers = response.headers.items()
-        for c in response.cookies.values():
-            response_headers.append(('Set-Cookie', c.output(header='')))
-        output = [response.get_content_as_string(settings.DEFAULT_CHARSET)]
+            try:
+                status_text = STATUS_CODE_TEXT[response.status_code]
+            except KeyError:
+                status_text = 'UNKNOWN STATUS CODE'
+            status = '%s %s' % (response.status_code, status_text)
+            response_headers = response.headers.items()
+            for c in response.cookies.values():
+                response_headers.append(('Set-Cookie', c.output(header='')))
+            output = response.iter_content(settings.DEFAULT_CHARSET)
+        except:
+            db.end_request()
+            raise
+        if response.is_streaming():
+            # The content is produced while the server sends it, so give back
+            # the connection once the server is done with it.
+            output = ClosingIterator(output, [response.close, db.end_request])
+        else:
+            call_all([response.close, db.end_request])
         start_response(status, response_headers)
         return output
+
+class ClosingIterator:
+    """
+    Wraps an iterable, closing it and then calling close_functions once the
+    server is done with it, as WSGI servers call close().
+    """
+    def __init__(self, iterable, close_functions):
+        self.iterable, self.close_functions = iterable, close_functions
+
+    def __iter__(self):
+        return iter(self.iterable)
+
+    def close(self):
+        functions = self.close_functions
+        if hasattr(self.iterable, 'close'):
+            functions = [self.iterable.close] + functions
+        call_all(functions)
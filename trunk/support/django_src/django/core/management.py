@@ -2,7 +2,7 @@
 # development-server initialization.
 
 import django
-import os, re, sys
+import os, re, sys, time
 
 MODULE_TEMPLATE = '''    {%% if perms.%(app)s.%(addperm)s or perms.%(app)s.%(changeperm)s %%}
     <tr>
@@ -47,6 +47,11 @@ def _get_contenttype_insert(opts):
         (db.quote_name('content_types'), db.quote_name('name'), db.quote_name('package'),
         db.quote_name('python_module_name'), opts.verbose_name, opts.app_label, opts.module_name)
 
+def _reset_registry():
+    "Makes the in-memory registry of content types and sites reload them."
+    from django.models.core import registry
+    registry.reset()
+
 def _is_valid_dir_name(s):
     return bool(re.search(r'^\w+$', s))
 
@@ -93,6 +98,8 @@ def get_sql_create(mod):
             full_statement.append('    %s%s' % (line, i < len(table_output)-1 and ',' or ''))
         full_statement.append(');')
         final_output.append('\n'.join(full_statement))
+        if opts.order_with_respect_to:
+            final_output.append(_get_order_index(opts)[1])
 
     for klass in mod._MODELS:
         opts = klass._meta
@@ -241,17 +248,33 @@ def get_sql_sequence_reset(mod):
 get_sql_sequence_reset.help_doc = "Prints the SQL statements for resetting PostgreSQL sequences for the given model module name(s)."
 get_sql_sequence_reset.args = APP_ARGS
 
+def _get_field_indexes(opts):
+    "Returns a list of (index name, CREATE INDEX statement) for the db_index fields of the given model."
+    from django.core.db import db
+    output = []
+    for f in opts.fields:
+        if f.db_index:
+            unique = f.unique and "UNIQUE " or ""
+            name = "%s_%s" % (opts.db_table, f.column)
+            output.append((name, "CREATE %sINDEX %s ON %s (%s);" % \
+                (unique, name, db.quote_name(opts.db_table), db.quote_name(f.column))))
+    return output
+
+def _get_order_index(opts):
+    "Returns (index name, CREATE INDEX statement) for the _order column of the given model."
+    from django.core.db import db
+    # Used to find the end of the list when adding objects, and to fetch them
+    # in order.
+    name = "%s_%s__order" % (opts.db_table, opts.order_with_respect_to.column)
+    return name, "CREATE INDEX %s ON %s (%s, %s);" % \
+        (name, db.quote_name(opts.db_table), db.quote_name(opts.order_with_respect_to.column),
+        db.quote_name('_order'))
+
 def get_sql_indexes(mod):
     "Returns a list of the CREATE INDEX SQL statements for the given module."
-    from django.core.db import db
     output = []
     for klass in mod._MODELS:
-        for f in klass._meta.fields:
-            if f.db_index:
-                unique = f.unique and "UNIQUE " or ""
-                output.append("CREATE %sINDEX %s_%s ON %s (%s);" % \
-                    (unique, klass._meta.db_table, f.column,
-                    db.quote_name(klass._meta.db_table), db.quote_name(f.column)))
+        output.extend([sql for name, sql in _get_field_indexes(klass._meta)])
     return output
 get_sql_indexes.help_doc = "Prints the CREATE INDEX SQL statements for the given model module name(s)."
 get_sql_indexes.args = APP_ARGS
@@ -370,6 +393,7 @@ def init():
         sys.exit(1)
     else:
         db.db.commit()
+        _reset_registry()
 init.args = ''
 
 def install(mod):
@@ -403,6 +427,7 @@ The full error: %s\n""" % \
         db.db.rollback()
         sys.exit(1)
     db.db.commit()
+    _reset_registry()
 install.help_doc = "Executes ``sqlall`` for the given model module name(s) in the current database."
 install.args = APP_ARGS
 
@@ -427,6 +452,214 @@ def installperms(mod):
 installperms.help_doc = "Installs any permissions for the given model module name(s), if needed."
 installperms.args = APP_ARGS
 
+# dumpdata writes, and loaddata reads, one line per row, with the row's values
+# separated by tabs. Each table's rows follow a header line that names the
+# model and the columns, like "@polls.polls\tid\tquestion\tpub_date", or the
+# model and the many-to-many field, like "@polls.polls.sites\tpoll_id\tsite_id".
+# In values, backslashes, tabs, newlines and carriage returns are escaped with
+# a backslash, as is a leading "@", and NULL is written as \N.
+LOADDATA_CHUNK_SIZE = 1000
+
+_dump_escapes = (('\\', '\\\\'), ('\t', '\\t'), ('\n', '\\n'), ('\r', '\\r'))
+_load_escapes = {'t': '\t', 'n': '\n', 'r': '\r'}
+_load_escape_re = re.compile(r'\\(.)')
+
+def _dump_value(value):
+    if value is None:
+        return '\\N'
+    if value is True or value is False:
+        return value and '1' or '0'
+    if isinstance(value, unicode):
+        value = value.encode('utf-8')
+    elif isinstance(value, float):
+        value = repr(value)
+    else:
+        value = str(value)
+    for char, escaped in _dump_escapes:
+        value = value.replace(char, escaped)
+    if value.startswith('@'):
+        value = '\\' + value
+    return value
+
+def _load_value(value):
+    if value == '\\N':
+        return None
+    if '\\' in value:
+        return _load_escape_re.sub(lambda m: _load_escapes.get(m.group(1), m.group(1)), value)
+    return value
+
+def _get_rate_report(verb, num_rows, preposition, table, seconds):
+    return "%s %s rows %s %s in %.2f seconds (%d rows/second)." % \
+        (verb, num_rows, preposition, table, seconds, num_rows / max(seconds, 0.001))
+
+def dumpdata(mod):
+    "Generator that returns the data of the given module's models in loaddata's format, one line at a time."
+    from django.core import db, meta
+    for klass in mod._MODELS:
+        opts = klass._meta
+        names = [f.name for f in opts.fields]
+        columns = [f.column for f in opts.fields]
+        if opts.order_with_respect_to:
+            names.append('_order')
+            columns.append('_order')
+        start, num_rows = time.time(), 0
+        yield '\t'.join(['@%s.%s' % (opts.app_label, opts.module_name)] + columns)
+        for row in meta.function_get_values_iterator(opts, klass, fields=names, order_by=(opts.pk.name,), stream=True):
+            yield '\t'.join([_dump_value(row[c]) for c in columns])
+            num_rows += 1
+        sys.stderr.write(_get_rate_report('Dumped', num_rows, 'from', opts.db_table, time.time() - start) + '\n')
+
+        for f in opts.many_to_many:
+            table = f.get_m2m_db_table(opts)
+            columns = [opts.object_name.lower() + '_id', f.rel.to.object_name.lower() + '_id']
+            start, num_rows = time.time(), 0
+            yield '\t'.join(['@%s.%s.%s' % (opts.app_label, opts.module_name, f.name)] + columns)
+            cursor = db.get_read_db().streaming_cursor()
+            cursor.execute("SELECT %s FROM %s ORDER BY %s" % \
+                (', '.join([db.db.quote_name(c) for c in columns]), db.db.quote_name(table),
+                ', '.join([db.db.quote_name(c) for c in columns])))
+            while 1:
+                rows = cursor.fetchmany(meta.GET_ITERATOR_CHUNK_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    yield '\t'.join([_dump_value(v) for v in row])
+                num_rows += len(rows)
+            sys.stderr.write(_get_rate_report('Dumped', num_rows, 'from', table, time.time() - start) + '\n')
+dumpdata.help_doc = "Prints the data of the given model module name(s) in the format that loaddata reads."
+dumpdata.args = APP_ARGS
+
+def _get_fixture_table(header):
+    """
+    Returns (model module package, model options, table name) for the given
+    header line of a dumpdata file, after checking that the table has the
+    columns it names.
+    """
+    from django.core import meta
+    names = header[1:].split('\t')
+    path, columns = names[0].split('.'), names[1:]
+    if len(path) not in (2, 3):
+        raise ValueError, "%r doesn't name a model" % names[0]
+    mod = meta.get_app(path[0])
+    for klass in mod._MODELS:
+        if klass._meta.module_name == path[1]:
+            opts = klass._meta
+            break
+    else:
+        raise ValueError, "%r doesn't name a model" % names[0]
+    if len(path) == 3:
+        try:
+            f = [f for f in opts.many_to_many if f.name == path[2]][0]
+        except IndexError:
+            raise ValueError, "%r doesn't name a many-to-many field" % names[0]
+        table = f.get_m2m_db_table(opts)
+        valid_columns = [opts.object_name.lower() + '_id', f.rel.to.object_name.lower() + '_id']
+    else:
+        table = opts.db_table
+        valid_columns = [f.column for f in opts.fields]
+        if opts.order_with_respect_to:
+            valid_columns.append('_order')
+    for column in columns:
+        if column not in valid_columns:
+            raise ValueError, "%s has no column %r" % (table, column)
+    return mod, opts, table
+
+def _drop_indexes(cursor, opts):
+    """
+    Drops the indexes of db_index fields and order_with_respect_to from the
+    given model's table, and returns the CREATE INDEX statements to put back
+    the ones that existed. Does nothing if the backend can't list indexes.
+    """
+    from django.core import db
+    indexes = _get_field_indexes(opts)
+    if opts.order_with_respect_to:
+        indexes.append(_get_order_index(opts))
+    try:
+        existing = db.get_index_names(cursor, opts.db_table)
+    except NotImplementedError:
+        return []
+    dropped = []
+    for name, sql in indexes:
+        if name in existing:
+            cursor.execute(db.get_drop_index_sql(db.db.quote_name(opts.db_table), name))
+            dropped.append(sql)
+    return dropped
+
+def loaddata(fixture_filename):
+    """
+    Loads a file written by dumpdata ("-" means standard input) into the
+    database, and returns a list of lines reporting how long it took.
+    """
+    from django.core import db
+    if fixture_filename == '-':
+        f = sys.stdin
+    else:
+        f = open(fixture_filename)
+    cursor = db.db.cursor()
+    mod_list, index_sql, report = [], [], []
+    total_start, total_rows, table = time.time(), 0, None
+    def insert_rows():
+        if rows:
+            cursor.executemany(insert_sql, rows)
+        report.append(_get_rate_report('Loaded', num_rows, 'into', table, time.time() - start))
+    try:
+        try:
+            for line_number, line in enumerate(f):
+                # Carriage returns in values are escaped, so any that are
+                # left are part of the line ending.
+                line = line.rstrip('\r\n')
+                if line.startswith('@'):
+                    if table is not None:
+                        insert_rows()
+                    mod, opts, table = _get_fixture_table(line)
+                    if mod not in mod_list:
+                        mod_list.append(mod)
+                    columns = line.split('\t')[1:]
+                    start, num_rows, rows = time.time(), 0, []
+                    # Indexes are put back once all the rows are in, which
+                    # is quicker than updating them for every row. That's
+                    # only safe if dropping an index doesn't commit the rows
+                    # inserted so far: if the load fails, rolling back the
+                    # transaction puts back the dropped indexes too.
+                    if table == opts.db_table and db.db.supports_transactional_ddl:
+                        index_sql.extend(_drop_indexes(cursor, opts))
+                    insert_sql = "INSERT INTO %s (%s) VALUES (%s)" % \
+                        (db.db.quote_name(table), ', '.join([db.db.quote_name(c) for c in columns]),
+                        ', '.join(['%s'] * len(columns)))
+                elif table is None:
+                    raise ValueError, "line %s: the first line must be a header line starting with '@'" % (line_number + 1)
+                else:
+                    values = [_load_value(v) for v in line.split('\t')]
+                    if len(values) != len(columns):
+                        raise ValueError, "line %s: expected %s values, got %s" % (line_number + 1, len(columns), len(values))
+                    rows.append(values)
+                    num_rows += 1
+                    total_rows += 1
+                    if len(rows) == LOADDATA_CHUNK_SIZE:
+                        cursor.executemany(insert_sql, rows)
+                        rows = []
+            if table is not None:
+                insert_rows()
+            for sql in index_sql:
+                cursor.execute(sql)
+            if db.DATABASE_ENGINE == 'postgresql':
+                for mod in mod_list:
+                    for sql in get_sql_sequence_reset(mod):
+                        cursor.execute(sql)
+        finally:
+            if f is not sys.stdin:
+                f.close()
+    except Exception, e:
+        sys.stderr.write("Error: %s couldn't be loaded, so the transaction loading it was rolled back. The full error: %s\n" % (fixture_filename, e))
+        db.db.rollback()
+        sys.exit(1)
+    db.db.commit()
+    _reset_registry()
+    report.append(_get_rate_report('Loaded', total_rows, 'into', 'the database', time.time() - total_start))
+    return report
+loaddata.help_doc = "Loads a file written by dumpdata into the database, in one transaction."
+loaddata.args = "[filename]"
+
 def _start_helper(app_or_project, name, directory, other_name=''):
     other = {'project': 'app', 'app': 'project'}[app_or_project]
     if not _is_valid_dir_name(name):
@@ -581,6 +814,54 @@ def inspectdb(db_name):
 inspectdb.help_doc = "Introspects the database tables in the given database and outputs a Django model module."
 inspectdb.args = "[dbname]"
 
+def adviseindexes(log_filename):
+    "Generator that reads a query log and returns suggested CREATE INDEX statements, one line at a time."
+    from django.core import db
+    from django.core.db import advisor
+
+    unexplained = []
+    def format_statement(sql, params):
+        if params is None:
+            return ["-- %s" % sql]
+        return ["-- %s" % sql, "-- with parameters %r" % (tuple(params),)]
+
+    def get_table_scans(cursor, sql, params):
+        try:
+            return db.get_table_scans(cursor, sql, params)
+        except db.DatabaseError:
+            db.db.rollback()
+            unexplained.append((sql, params))
+            return []
+
+    def count_rows(cursor, table):
+        cursor.execute("SELECT COUNT(*) FROM %s" % db.db.quote_name(table))
+        return cursor.fetchone()[0]
+
+    f = open(log_filename)
+    try:
+        statements = advisor.read_log(f)
+    finally:
+        f.close()
+    cursor = db.db.cursor()
+    suggestions = advisor.advise(cursor, statements, get_table_scans, count_rows)
+    yield "-- %s distinct SELECT statements read from %s." % (len(statements), log_filename)
+    if unexplained:
+        yield "-- %s of them couldn't be explained by the database; the first one was:" % len(unexplained)
+        for line in format_statement(*unexplained[0]):
+            yield line
+    if not suggestions:
+        yield "-- No indexes to suggest."
+    for score, table, columns, frequency, sql, params in suggestions:
+        yield ''
+        yield "-- Score %s: %s statement(s), each scanning about %s rows of %s. For example:" % \
+            (score, frequency, score / frequency, table)
+        for line in format_statement(sql, params):
+            yield line
+        yield "CREATE INDEX %s_%s ON %s (%s);" % (table, '_'.join(columns),
+            db.db.quote_name(table), ', '.join([db.db.quote_name(c) for c in columns]))
+adviseindexes.help_doc = "Reads a query log and suggests CREATE INDEX statements for the lookups that scan whole tables."
+adviseindexes.args = "[logfile]"
+
 class ModelErrorCollection:
     def __init__(self, outfile=sys.stdout):
         self.errors = []
@@ -5,7 +5,7 @@ from django.core.exceptions import ObjectDoesNotExist
 from django.core.meta.fields import *
 from django.utils.functional import curry
 from django.utils.text import capfirst
-import copy, datetime, os, re, sys, types
+import copy, datetime, os, re, sys, types, urllib
 
 # Admin stages.
 ADD, CHANGE, BOTH = 1, 2, 3
@@ -14,6 +14,18 @@ ADD, CHANGE, BOTH = 1, 2, 3
 # Larger values are slightly faster at the expense of more storage space.
 GET_ITERATOR_CHUNK_SIZE = 100
 
+# With stream=True, get_iterator calls fetch about this many bytes of rows at
+# a time, as estimated from the field types, unless chunk_size is given.
+GET_ITERATOR_STREAM_BUFFER_SIZE = 256 * 1024
+
+# Maximum number of IDs in each query made by get_in_bulk calls. The database
+# backend's MAX_QUERY_PARAMS may lower it.
+GET_IN_BULK_CHUNK_SIZE = 500
+
+# get_in_bulk calls with more IDs than this load the IDs into a temporary
+# table and join against it, instead of making one query per chunk.
+GET_IN_BULK_TEMP_TABLE_THRESHOLD = 10000
+
 # Prefix (in Python path style) to location of models.
 MODEL_PREFIX = 'django.models'
 
@@ -153,7 +165,7 @@ class Options:
         fields=None, ordering=None, unique_together=None, admin=None, has_related_links=False,
         where_constraints=None, object_name=None, app_label=None,
         exceptions=None, permissions=None, get_latest_by=None,
-        order_with_respect_to=None, module_constants=None):
+        order_with_respect_to=None, module_constants=None, cache_pk_lookups=None):
 
         # Save the original function args, for use by copy(). Note that we're
         # NOT using copy.deepcopy(), because that would create a new copy of
@@ -198,6 +210,7 @@ class Options:
             self.order_with_respect_to = None
         self.module_constants = module_constants or {}
         self.admin = admin
+        self.cache_pk_lookups = cache_pk_lookups
 
         # Calculate one_to_one_field.
         self.one_to_one_field = None
@@ -238,10 +251,8 @@ class Options:
 
     def get_content_type_id(self):
         "Returns the content-type ID for this object type."
-        if not hasattr(self, '_content_type_id'):
-            mod = get_module('core', 'contenttypes')
-            self._content_type_id = mod.get_object(python_module_name__exact=self.module_name, package__label__exact=self.app_label).id
-        return self._content_type_id
+        from django.models.core import registry
+        return registry.get_content_type_by_name(self.app_label, self.module_name).id
 
     def get_field(self, name, many_to_many=True):
         """
@@ -466,6 +477,7 @@ class ModelBase(type):
                 get_latest_by = meta_attrs.pop('get_latest_by', None),
                 order_with_respect_to = meta_attrs.pop('order_with_respect_to', None),
                 module_constants = meta_attrs.pop('module_constants', None),
+                cache_pk_lookups = meta_attrs.pop('cache_pk_lookups', None),
             )
 
         if meta_attrs != {}:
@@ -805,9 +817,14 @@ def method_save(opts, self):
         db_values = [f.get_db_prep_save(f.pre_save(getattr(self, f.attname), True)) for f in opts.fields if not isinstance(f, AutoField)]
         if opts.order_with_respect_to:
             field_names.append(db.db.quote_name('_order'))
+            # New objects go to the end. MAX() rather than COUNT(), so that the
+            # index on (order_with_respect_to, _order) answers it without
+            # reading every row, and so that deletions don't cause
+            # duplicates.
             # TODO: This assumes the database supports subqueries.
-            placeholders.append('(SELECT COUNT(*) FROM %s WHERE %s = %%s)' % \
-                (db.db.quote_name(opts.db_table), db.db.quote_name(opts.order_with_respect_to.column)))
+            placeholders.append('(SELECT COALESCE(MAX(%s), -1) + 1 FROM %s WHERE %s = %%s)' % \
+                (db.db.quote_name('_order'), db.db.quote_name(opts.db_table),
+                db.db.quote_name(opts.order_with_respect_to.column)))
             db_values.append(getattr(self, opts.order_with_respect_to.attname))
         cursor.execute("INSERT INTO %s (%s) VALUES (%s)" % \
             (db.db.quote_name(opts.db_table), ','.join(field_names),
@@ -815,6 +832,9 @@ def method_save(opts, self):
         if opts.has_auto_field:
             setattr(self, opts.pk.attname, db.get_last_insert_id(cursor, opts.db_table, opts.pk.column))
     db.db.commit()
+    if opts.cache_pk_lookups is not None:
+        from django.core.cache import cache
+        cache.delete(_get_pk_cache_key(opts, getattr(self, opts.pk.attname)))
     # Run any post-save hooks.
     if hasattr(self, '_post_save'):
         self._post_save()
@@ -850,6 +870,9 @@ def method_delete(opts, self):
         (db.db.quote_name(opts.db_table), db.db.quote_name(opts.pk.column)),
         [getattr(self, opts.pk.attname)])
     db.db.commit()
+    if opts.cache_pk_lookups is not None:
+        from django.core.cache import cache
+        cache.delete(_get_pk_cache_key(opts, getattr(self, opts.pk.attname)))
     setattr(self, opts.pk.attname, None)
     for f in opts.fields:
         if isinstance(f, FileField) and getattr(self, f.attname):
@@ -918,34 +941,14 @@ def method_get_many_to_many(field_with_rel, self):
 # Handles setting many-to-many relationships.
 # Example: Poll.set_sites()
 def method_set_many_to_many(rel_field, self, id_list):
-    current_ids = [obj.id for obj in method_get_many_to_many(rel_field, self)]
-    ids_to_add, ids_to_delete = dict([(i, 1) for i in id_list]), []
-    for current_id in current_ids:
-        if current_id in id_list:
-            del ids_to_add[current_id]
-        else:
-            ids_to_delete.append(current_id)
-    ids_to_add = ids_to_add.keys()
-    # Now ids_to_add is a list of IDs to add, and ids_to_delete is a list of IDs to delete.
-    if not ids_to_delete and not ids_to_add:
-        return False # No change
     rel = rel_field.rel.to
-    m2m_table = rel_field.get_m2m_db_table(self._meta)
-    cursor = db.db.cursor()
-    this_id = getattr(self, self._meta.pk.attname)
-    if ids_to_delete:
-        sql = "DELETE FROM %s WHERE %s = %%s AND %s IN (%s)" % \
-            (db.db.quote_name(m2m_table),
-            db.db.quote_name(self._meta.object_name.lower() + '_id'),
-            db.db.quote_name(rel.object_name.lower() + '_id'), ','.join(map(str, ids_to_delete)))
-        cursor.execute(sql, [this_id])
-    if ids_to_add:
-        sql = "INSERT INTO %s (%s, %s) VALUES (%%s, %%s)" % \
-            (db.db.quote_name(m2m_table),
-            db.db.quote_name(self._meta.object_name.lower() + '_id'),
-            db.db.quote_name(rel.object_name.lower() + '_id'))
-        cursor.executemany(sql, [(this_id, i) for i in ids_to_add])
-    db.db.commit()
+    if isinstance(rel.pk, AutoField):
+        id_list = map(int, id_list) # normalize to integers
+    changed = _set_many_to_many_ids(rel_field.get_m2m_db_table(self._meta),
+        self._meta.object_name.lower() + '_id', rel.object_name.lower() + '_id',
+        getattr(self, self._meta.pk.attname), id_list)
+    if not changed:
+        return False # No change
     try:
         delattr(self, '_%s_cache' % rel_field.name) # clear cache, if it exists
     except AttributeError:
@@ -986,30 +989,69 @@ def method_get_related_many_to_many(method_name, opts, rel_mod, rel_field, self,
 def method_set_related_many_to_many(rel_opts, rel_field, self, id_list):
     id_list = map(int, id_list) # normalize to integers
     rel = rel_field.rel.to
-    m2m_table = rel_field.get_m2m_db_table(rel_opts)
-    this_id = getattr(self, self._meta.pk.attname)
+    return _set_many_to_many_ids(rel_field.get_m2m_db_table(rel_opts),
+        rel.object_name.lower() + '_id', rel_opts.object_name.lower() + '_id',
+        getattr(self, self._meta.pk.attname), id_list)
+
+def _set_many_to_many_ids(m2m_table, this_column, other_column, this_id, id_list):
+    """
+    Makes the rows of m2m_table whose this_column is this_id point at exactly
+    the IDs in id_list. Only the rows that change are deleted or inserted, in
+    a single transaction. Returns True if anything changed.
+    """
     cursor = db.db.cursor()
-    cursor.execute("DELETE FROM %s WHERE %s = %%s" % \
-        (db.db.quote_name(m2m_table),
-        db.db.quote_name(rel.object_name.lower() + '_id')), [this_id])
-    sql = "INSERT INTO %s (%s, %s) VALUES (%%s, %%s)" % \
-        (db.db.quote_name(m2m_table),
-        db.db.quote_name(rel.object_name.lower() + '_id'),
-        db.db.quote_name(rel_opts.object_name.lower() + '_id'))
-    cursor.executemany(sql, [(this_id, i) for i in id_list])
+    cursor.execute("SELECT %s FROM %s WHERE %s = %%s" % \
+        (db.db.quote_name(other_column), db.db.quote_name(m2m_table), db.db.quote_name(this_column)), [this_id])
+    current_ids = dict([(row[0], None) for row in cursor.fetchall()])
+    new_ids = dict([(i, None) for i in id_list])
+    ids_to_delete = [i for i in current_ids.keys() if not new_ids.has_key(i)]
+    ids_to_add = [i for i in new_ids.keys() if not current_ids.has_key(i)]
+    if not ids_to_delete and not ids_to_add:
+        return False
+    chunk_size = GET_IN_BULK_CHUNK_SIZE
+    if db.MAX_QUERY_PARAMS is not None:
+        chunk_size = min(chunk_size, db.MAX_QUERY_PARAMS - 1)
+    try:
+        for i in range(0, len(ids_to_delete), chunk_size):
+            chunk = ids_to_delete[i:i+chunk_size]
+            cursor.execute("DELETE FROM %s WHERE %s = %%s AND %s IN (%s)" % \
+                (db.db.quote_name(m2m_table), db.db.quote_name(this_column),
+                db.db.quote_name(other_column), ','.join(['%s'] * len(chunk))), [this_id] + chunk)
+        if ids_to_add:
+            cursor.executemany("INSERT INTO %s (%s, %s) VALUES (%%s, %%s)" % \
+                (db.db.quote_name(m2m_table), db.db.quote_name(this_column), db.db.quote_name(other_column)),
+                [(this_id, i) for i in ids_to_add])
+    except:
+        db.db.rollback()
+        raise
     db.db.commit()
+    return True
 
 # ORDERING METHODS #########################
 
 def method_set_order(ordered_obj, self, id_list):
     cursor = db.db.cursor()
+    rel_val = getattr(self, ordered_obj.order_with_respect_to.rel.field_name)
+    # Only rewrite the objects whose position changes.
+    # Example: "SELECT id, _order FROM poll_choices WHERE poll_id = %s"
+    cursor.execute("SELECT %s, %s FROM %s WHERE %s = %%s" % \
+        (db.db.quote_name(ordered_obj.pk.column), db.db.quote_name('_order'),
+        db.db.quote_name(ordered_obj.db_table),
+        db.db.quote_name(ordered_obj.order_with_respect_to.column)), [rel_val])
+    current_order = dict(cursor.fetchall())
+    changes = [(i, rel_val, j) for i, j in enumerate(id_list) if current_order.get(j) != i]
+    if not changes:
+        return
     # Example: "UPDATE poll_choices SET _order = %s WHERE poll_id = %s AND id = %s"
     sql = "UPDATE %s SET %s = %%s WHERE %s = %%s AND %s = %%s" % \
         (db.db.quote_name(ordered_obj.db_table), db.db.quote_name('_order'),
         db.db.quote_name(ordered_obj.order_with_respect_to.column),
         db.db.quote_name(ordered_obj.pk.column))
-    rel_val = getattr(self, ordered_obj.order_with_respect_to.rel.field_name)
-    cursor.executemany(sql, [(i, rel_val, j) for i, j in enumerate(id_list)])
+    try:
+        cursor.executemany(sql, changes)
+    except:
+        db.db.rollback()
+        raise
     db.db.commit()
 
 def method_get_order(ordered_obj, self):
@@ -1126,8 +1168,12 @@ def _get_where_clause(lookup_type, table_prefix, field_name, value):
         pass
     if lookup_type == 'in':
         return '%s%s IN (%s)' % (table_prefix, field_name, ','.join(['%s' for v in value]))
-    elif lookup_type in ('range', 'year'):
+    elif lookup_type == 'range':
         return '%s%s BETWEEN %%s AND %%s' % (table_prefix, field_name)
+    elif lookup_type == 'year':
+        # A half-open range rather than BETWEEN, so that datetimes late on
+        # December 31 match, and so that an index on the field can be used.
+        return '%s%s >= %%s AND %s%s < %%s' % (table_prefix, field_name, table_prefix, field_name)
     elif lookup_type in ('month', 'day'):
         return "%s = %%s" % db.get_date_extract_sql(lookup_type, table_prefix + field_name)
     elif lookup_type == 'isnull':
@@ -1135,12 +1181,45 @@ def _get_where_clause(lookup_type, table_prefix, field_name, value):
     raise TypeError, "Got invalid lookup_type: %s" % repr(lookup_type)
 
 def function_get_object(opts, klass, does_not_exist_exception, **kwargs):
+    cache_key = None
+    if opts.cache_pk_lookups is not None and len(kwargs) == 1 and not opts.pk.rel:
+        key, value = kwargs.items()[0]
+        if key in ('pk', '%s__exact' % opts.pk.name):
+            from django.core.cache import cache
+            cache_key = _get_pk_cache_key(opts, value)
+            values = cache.get(cache_key)
+            if values is not None:
+                return klass(*values)
     obj_list = function_get_list(opts, klass, **kwargs)
     if len(obj_list) < 1:
         raise does_not_exist_exception, "%s does not exist for %s" % (opts.object_name, kwargs)
     assert len(obj_list) == 1, "get_object() returned more than one %s -- it returned %s! Lookup parameters were %s" % (opts.object_name, len(obj_list), kwargs)
+    if cache_key is not None:
+        # Cache the field values rather than the object, so that every
+        # lookup gets a fresh object, without any related-object caches. The
+        # key comes from the primary key as loaded, which is the one save()
+        # and delete() invalidate, whatever the lookup value looked like.
+        cache.set(_get_pk_cache_key(opts, getattr(obj_list[0], opts.pk.attname)),
+            [getattr(obj_list[0], f.attname) for f in opts.fields], opts.cache_pk_lookups)
     return obj_list[0]
 
+def _get_pk_cache_key(opts, pk_val):
+    """
+    Returns the cache key of the object with the given primary key, for models
+    with cache_pk_lookups. Integer primary keys are normalized first, so that
+    1, 1L and '01' all give the same key.
+    """
+    if isinstance(opts.pk, (AutoField, IntegerField)):
+        try:
+            pk_val = int(pk_val)
+        except (TypeError, ValueError):
+            pass
+    else:
+        pk_val = opts.pk.get_db_prep_lookup('exact', pk_val)[0]
+    if isinstance(pk_val, unicode):
+        pk_val = pk_val.encode('utf-8')
+    return 'django.models.%s.%s:%s' % (opts.app_label, opts.module_name, urllib.quote(str(pk_val)))
+
 def _get_cached_row(opts, row, index_start):
     "Helper function that recursively returns an object with cache filled"
     index_end = index_start + len(opts.fields)
@@ -1156,15 +1235,12 @@ def function_get_iterator(opts, klass, **kwargs):
     # undefined, so we convert it to a list of tuples internally.
     kwargs['select'] = kwargs.get('select', {}).items()
 
-    cursor = db.db.cursor()
+    stream, chunk_size = kwargs.pop('stream', False), kwargs.pop('chunk_size', None)
     select, sql, params = function_get_sql_clause(opts, **kwargs)
-    cursor.execute("SELECT " + (kwargs.get('distinct') and "DISTINCT " or "") + ",".join(select) + sql, params)
+    sql = "SELECT " + (kwargs.get('distinct') and "DISTINCT " or "") + ",".join(select) + sql
     fill_cache = kwargs.get('select_related')
     index_end = len(opts.fields)
-    while 1:
-        rows = cursor.fetchmany(GET_ITERATOR_CHUNK_SIZE)
-        if not rows:
-            raise StopIteration
+    for rows in _fetch_chunks(sql, params, stream, chunk_size, opts.fields):
         for row in rows:
             if fill_cache:
                 obj, index_end = _get_cached_row(opts, row, 0)
@@ -1183,7 +1259,7 @@ def function_get_count(opts, **kwargs):
     kwargs['limit'] = None
     kwargs['select_related'] = False
     _, sql, params = function_get_sql_clause(opts, **kwargs)
-    cursor = db.db.cursor()
+    cursor = db.get_read_db().cursor()
     cursor.execute("SELECT COUNT(*)" + sql, params)
     return cursor.fetchone()[0]
 
@@ -1192,22 +1268,60 @@ def function_get_values_iterator(opts, klass, **kwargs):
     kwargs['select_related'] = False
     kwargs['select'] = {}
 
-    # 'fields' is a list of field names to fetch.
+    # 'fields' is a list of field names to fetch. For models with
+    # order_with_respect_to, '_order' fetches each object's position.
     try:
-        fields = [opts.get_field(f).column for f in kwargs.pop('fields')]
+        fields = [(f == '_order' and opts.order_with_respect_to) and f or opts.get_field(f).column for f in kwargs.pop('fields')]
     except KeyError: # Default to all fields.
         fields = [f.column for f in opts.fields]
 
-    cursor = db.db.cursor()
+    stream, chunk_size = kwargs.pop('stream', False), kwargs.pop('chunk_size', None)
     _, sql, params = function_get_sql_clause(opts, **kwargs)
     select = ['%s.%s' % (db.db.quote_name(opts.db_table), db.db.quote_name(f)) for f in fields]
-    cursor.execute("SELECT " + (kwargs.get('distinct') and "DISTINCT " or "") + ",".join(select) + sql, params)
+    sql = "SELECT " + (kwargs.get('distinct') and "DISTINCT " or "") + ",".join(select) + sql
+    field_objs = [f for f in opts.fields if f.column in fields]
+    for rows in _fetch_chunks(sql, params, stream, chunk_size, field_objs):
+        for row in rows:
+            yield dict(zip(fields, row))
+
+def _fetch_chunks(sql, params, stream, chunk_size, fields):
+    """
+    Runs the given SELECT on the read database and yields its rows in lists
+    of chunk_size. With stream=True, the rows come from a server-side cursor,
+    if the backend has them, so that only one chunk at a time is held in
+    memory, and the default chunk_size depends on the width of the given
+    fields.
+    """
+    read_db = db.get_read_db()
+    if stream:
+        cursor = read_db.streaming_cursor()
+        if chunk_size is None:
+            chunk_size = _get_stream_chunk_size(fields)
+    else:
+        cursor = read_db.cursor()
+        if chunk_size is None:
+            chunk_size = GET_ITERATOR_CHUNK_SIZE
+    cursor.execute(sql, params)
     while 1:
-        rows = cursor.fetchmany(GET_ITERATOR_CHUNK_SIZE)
+        rows = cursor.fetchmany(chunk_size)
         if not rows:
+            if stream:
+                cursor.close()
             raise StopIteration
-        for row in rows:
-            yield dict(zip(fields, row))
+        yield rows
+
+def _get_stream_chunk_size(fields):
+    "Returns how many rows of the given fields fit in GET_ITERATOR_STREAM_BUFFER_SIZE."
+    width = 0
+    for f in fields:
+        if f.maxlength:
+            width += f.maxlength
+        elif isinstance(f, TextField):
+            width += 1000 # A guess.
+        else:
+            width += 8
+    # Don't let tiny rows make for huge fetches, or huge rows for tiny ones.
+    return min(10000, max(10, GET_ITERATOR_STREAM_BUFFER_SIZE / max(width, 1)))
 
 def function_get_values(opts, klass, **kwargs):
     return list(function_get_values_iterator(opts, klass, **kwargs))
@@ -1420,10 +1534,78 @@ def function_get_sql_clause(opts, **kwargs):
 def function_get_in_bulk(opts, klass, *args, **kwargs):
     id_list = args and args[0] or kwargs['id_list']
     assert id_list != [], "get_in_bulk() cannot be passed an empty list."
-    kwargs['where'] = ["%s.%s IN (%s)" % (db.db.quote_name(opts.db_table), db.db.quote_name(opts.pk.column), ",".join(['%s'] * len(id_list)))]
-    kwargs['params'] = id_list
-    obj_list = function_get_list(opts, klass, **kwargs)
-    return dict([(getattr(o, opts.pk.attname), o) for o in obj_list])
+    kwargs.pop('id_list', None)
+    # _temp_table=True or False forces or prevents the use of a temporary
+    # table; by default, it's used for more than
+    # GET_IN_BULK_TEMP_TABLE_THRESHOLD IDs, if the backend supports it.
+    use_temp_table = kwargs.pop('_temp_table', None)
+    if use_temp_table is None:
+        use_temp_table = len(id_list) > GET_IN_BULK_TEMP_TABLE_THRESHOLD
+    if use_temp_table:
+        try:
+            obj_list = _get_in_bulk_with_temp_table(opts, klass, id_list, kwargs)
+        except NotImplementedError:
+            pass
+        else:
+            return dict([(getattr(o, opts.pk.attname), o) for o in obj_list])
+    where = kwargs.get('where', [])[:]
+    params = kwargs.get('params', [])[:]
+    chunk_size = GET_IN_BULK_CHUNK_SIZE
+    if db.MAX_QUERY_PARAMS is not None:
+        # Leave room for the parameters of the other lookups.
+        _, _, other_params = function_get_sql_clause(opts, **kwargs)
+        chunk_size = max(1, min(chunk_size, db.MAX_QUERY_PARAMS - len(other_params)))
+    in_clause = "%s.%s IN (%%s)" % (db.db.quote_name(opts.db_table), db.db.quote_name(opts.pk.column))
+    result = {}
+    for i in range(0, len(id_list), chunk_size):
+        chunk = id_list[i:i+chunk_size]
+        kwargs['where'] = where + [in_clause % ",".join(['%s'] * len(chunk))]
+        kwargs['params'] = params + list(chunk)
+        for obj in function_get_iterator(opts, klass, **kwargs):
+            result[getattr(obj, opts.pk.attname)] = obj
+    return result
+
+def _get_in_bulk_with_temp_table(opts, klass, id_list, kwargs):
+    """
+    Returns the objects for get_in_bulk() by loading id_list into a temporary
+    table and joining against it. Raises NotImplementedError if the database
+    backend doesn't support temporary tables.
+    """
+    pk_field = opts.pk
+    while pk_field.rel:
+        pk_field = pk_field.rel.get_related_field()
+    data_type = pk_field.get_internal_type()
+    if data_type == 'AutoField':
+        data_type = 'IntegerField'
+    table_name = 'django_in_bulk'
+    columns = '%s %s NOT NULL PRIMARY KEY' % (db.db.quote_name('id'), db.DATA_TYPES[data_type] % pk_field.__dict__)
+    create_sql = db.get_create_temp_table_sql(db.db.quote_name(table_name), columns)
+    drop_sql = db.get_drop_temp_table_sql(db.db.quote_name(table_name))
+    # Use the primary database, so that the temporary table is there for the
+    # query below: creating the table counts as a write, after which
+    # get_read_db() returns the primary database.
+    cursor = db.db.cursor()
+    cursor.execute(create_sql)
+    try:
+        unique_ids = dict([(pk_field.get_db_prep_save(i), None) for i in id_list]).keys()
+        cursor.executemany("INSERT INTO %s (%s) VALUES (%%s)" % (db.db.quote_name(table_name), db.db.quote_name('id')),
+            [[i] for i in unique_ids])
+        kwargs['tables'] = kwargs.get('tables', []) + [table_name]
+        kwargs['where'] = kwargs.get('where', []) + ["%s.%s = %s.%s" % \
+            (db.db.quote_name(opts.db_table), db.db.quote_name(opts.pk.column),
+            db.db.quote_name(table_name), db.db.quote_name('id'))]
+        obj_list = function_get_list(opts, klass, **kwargs)
+    except:
+        # Drop the table, but raise the original error if that fails too (for
+        # instance, because PostgreSQL aborted the transaction).
+        exc_info = sys.exc_info()
+        try:
+            cursor.execute(drop_sql)
+        except db.DatabaseError:
+            pass
+        raise exc_info[0], exc_info[1], exc_info[2]
+    cursor.execute(drop_sql)
+    return obj_list
 
 def function_get_latest(opts, klass, does_not_exist_exception, **kwargs):
     kwargs['order_by'] = ('-' + opts.get_latest_by,)
@@ -1445,7 +1627,7 @@ def function_get_date_list(opts, field, *args, **kwargs):
             (db.db.quote_name(opts.db_table), db.db.quote_name(field.column)))
     select, sql, params = function_get_sql_clause(opts, **kwargs)
     sql = 'SELECT %s %s GROUP BY 1 ORDER BY 1' % (db.get_date_trunc_sql(kind, '%s.%s' % (db.db.quote_name(opts.db_table), db.db.quote_name(field.column))), sql)
-    cursor = db.db.cursor()
+    cursor = db.get_read_db().cursor()
     cursor.execute(sql, params)
     # We have to manually run typecast_timestamp(str()) on the results, because
     # MySQL doesn't automatically cast the result of date functions as datetime
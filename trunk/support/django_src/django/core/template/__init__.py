@@ -54,9 +54,16 @@ times with multiple contexts)
 >>> t.render(c)
 '\n<html>\n\n</html>\n'
 """
-import re
+import imp, re, sys
 from django.conf.settings import DEFAULT_CHARSET
 
+try:
+    # Only exists in Python 2.4+
+    from threading import local
+except ImportError:
+    # Use the copy of _threading_local.py from Python 2.4
+    from django.utils._threading_local import local
+
 __all__ = ('Template','Context','compile_string')
 
 TOKEN_TEXT = 0
@@ -84,6 +91,9 @@ registered_tags = {}
 # global dict used by register_filter; maps custom filters to callback functions
 registered_filters = {}
 
+# maps tag library names to the Library objects that {% load %} uses
+libraries = {}
+
 class TemplateSyntaxError(Exception):
     pass
 
@@ -113,7 +123,33 @@ class Template:
 
     def render(self, context):
         "Display stage -- can be called many times"
-        return self.nodelist.render(context)
+        # The blocks of a template that's rendered from within another one,
+        # such as by {% ssi %}, aren't overridden by the outer template's
+        # children.
+        blocks = context.render_state.get('blocks')
+        if blocks is None:
+            return self.nodelist.render(context)
+        context.render_state['blocks'] = None
+        try:
+            return self.nodelist.render(context)
+        finally:
+            context.render_state['blocks'] = blocks
+
+    def render_iter(self, context):
+        """
+        Like render(), but returns an iterator over the rendered template, in
+        pieces, so that it can be sent while it's rendered.
+        """
+        blocks = context.render_state.get('blocks')
+        context.render_state['blocks'] = None
+        # Python before 2.5 doesn't allow yield within try/finally.
+        try:
+            for bit in self.nodelist.render_iter(context):
+                yield bit
+        except:
+            context.render_state['blocks'] = blocks
+            raise
+        context.render_state['blocks'] = blocks
 
 def compile_string(template_string):
     "Compiles template_string into NodeList ready for rendering"
@@ -126,6 +162,10 @@ class Context:
     def __init__(self, dict=None):
         dict = dict or {}
         self.dicts = [dict]
+        # Compiled templates are shared (see loader.get_template()), so nodes
+        # that need to remember something from one render() call to the next,
+        # such as {% cycle %}, keep it here, keyed by node.
+        self.render_state = {}
 
     def __repr__(self):
         return repr(self.dicts)
@@ -193,11 +233,47 @@ def create_token(token_string):
     else:
         return Token(TOKEN_TEXT, token_string)
 
+# The parsers at work in each thread, the innermost last, so that filters can
+# be looked up in the tag libraries loaded by the template being parsed.
+_parsing = local()
+
 class Parser:
     def __init__(self, tokens):
         self.tokens = tokens
+        # The tags and filters of the libraries loaded with {% load %}.
+        self.tags, self.filters = {}, {}
+
+    def add_library(self, library):
+        "Makes the tags and filters of the given Library available to the rest of the template."
+        self.tags.update(library.tags)
+        self.filters.update(library.filters)
+
+    def find_tag(self, command):
+        "Returns the compilation function for the given tag. Raises KeyError."
+        try:
+            return self.tags[command]
+        except KeyError:
+            return registered_tags[command]
+
+    def find_filter(self, filter_name):
+        "Returns (function, has_arg) for the given filter. Raises KeyError."
+        try:
+            return self.filters[filter_name]
+        except KeyError:
+            return registered_filters[filter_name]
 
     def parse(self, parse_until=[]):
+        try:
+            parsers = _parsing.parsers
+        except AttributeError:
+            parsers = _parsing.parsers = []
+        parsers.append(self)
+        try:
+            return self._parse(parse_until)
+        finally:
+            parsers.pop()
+
+    def _parse(self, parse_until):
         nodelist = NodeList()
         while self.tokens:
             token = self.next_token()
@@ -218,7 +294,7 @@ class Parser:
                     raise TemplateSyntaxError, "Empty block tag"
                 try:
                     # execute callback function for this tag and append resulting node
-                    nodelist.append(registered_tags[command](self, token))
+                    nodelist.append(self.find_tag(command)(self, token))
                 except KeyError:
                     raise TemplateSyntaxError, "Invalid block tag: '%s'" % command
         if parse_until:
@@ -420,11 +496,13 @@ class FilterParser:
     def read_filters(self):
         while 1:
             filter_name, arg = self.read_filter()
-            if not registered_filters.has_key(filter_name):
+            try:
+                has_arg = find_filter(filter_name)[1]
+            except KeyError:
                 raise TemplateSyntaxError, "Invalid filter: '%s'" % filter_name
-            if registered_filters[filter_name][1] == True and arg is None:
+            if has_arg == True and arg is None:
                 raise TemplateSyntaxError, "Filter '%s' requires an argument" % filter_name
-            if registered_filters[filter_name][1] == False and arg is not None:
+            if has_arg == False and arg is not None:
                 raise TemplateSyntaxError, "Filter '%s' should not have an argument (argument is %r)" % (filter_name, arg)
             self.filters.append((filter_name, arg))
             if self.current is None:
@@ -513,33 +591,32 @@ def resolve_variable(path, context):
 
     (The example assumes VARIABLE_ATTRIBUTE_SEPARATOR is '.')
     """
-    if path[0] in ('"', "'") and path[0] == path[-1]:
-        current = path[1:-1]
-    else:
-        current = context
-        bits = path.split(VARIABLE_ATTRIBUTE_SEPARATOR)
-        while bits:
-            try: # dictionary lookup
-                current = current[bits[0]]
-            except (TypeError, AttributeError, KeyError):
-                try: # attribute lookup
-                    current = getattr(current, bits[0])
-                    if callable(current):
-                        if getattr(current, 'alters_data', False):
+    return Variable(path).resolve(context)
+
+def resolve_lookups(bits, context):
+    "Looks up each of the given attribute names in turn, starting with the context."
+    current = context
+    for bit in bits:
+        try: # dictionary lookup
+            current = current[bit]
+        except (TypeError, AttributeError, KeyError):
+            try: # attribute lookup
+                current = getattr(current, bit)
+                if callable(current):
+                    if getattr(current, 'alters_data', False):
+                        current = ''
+                    else:
+                        try: # method call (assuming no args required)
+                            current = current()
+                        except SilentVariableFailure:
                             current = ''
-                        else:
-                            try: # method call (assuming no args required)
-                                current = current()
-                            except SilentVariableFailure:
-                                current = ''
-                            except TypeError: # arguments *were* required
-                                current = '' # invalid method call
-                except (TypeError, AttributeError):
-                    try: # list-index lookup
-                        current = current[int(bits[0])]
-                    except (IndexError, ValueError, KeyError):
-                        raise VariableDoesNotExist, "Failed lookup for key [%s] in %r" % (bits[0], current) # missing attribute
-            del bits[0]
+                        except TypeError: # arguments *were* required
+                            current = '' # invalid method call
+            except (TypeError, AttributeError):
+                try: # list-index lookup
+                    current = current[int(bit)]
+                except (IndexError, ValueError, KeyError):
+                    raise VariableDoesNotExist, "Failed lookup for key [%s] in %r" % (bit, current) # missing attribute
     return current
 
 def resolve_variable_with_filters(var_string, context):
@@ -547,22 +624,74 @@ def resolve_variable_with_filters(var_string, context):
     var_string is a full variable expression with optional filters, like:
         a.b.c|lower|date:"y/m/d"
     This function resolves the variable in the context, applies all filters and
-    returns the object.
+    returns the object. Filters from tag libraries can be used once a template
+    has loaded the library (see find_filter()).
+
+    Nodes that resolve the same expression at every render should create a
+    FilterExpression when they're compiled instead.
     """
-    var, filters = get_filters_from_token(var_string)
-    try:
-        obj = resolve_variable(var, context)
-    except VariableDoesNotExist:
-        obj = ''
-    for name, arg in filters:
-        obj = registered_filters[name][0](obj, arg)
-    return obj
+    return FilterExpression(var_string).resolve(context)
+
+class Variable:
+    """
+    A variable, with optional attribute syntax, or a hard-coded string, as
+    taken by resolve_variable(), split up once so that it can be resolved in
+    many contexts.
+    """
+    def __init__(self, path):
+        self.path = path
+        if path[0] in ('"', "'") and path[0] == path[-1]:
+            self.literal, self.lookups = path[1:-1], None
+        else:
+            self.literal, self.lookups = None, tuple(path.split(VARIABLE_ATTRIBUTE_SEPARATOR))
+
+    def __repr__(self):
+        return "<Variable: %s>" % self.path
+
+    def resolve(self, context):
+        "Returns the variable's value in the given context. Raises VariableDoesNotExist."
+        if self.lookups is None:
+            return self.literal
+        return resolve_lookups(self.lookups, context)
+
+class FilterExpression:
+    """
+    A variable expression with optional filters, like a.b.c|lower|date:"y/m/d",
+    parsed once, with its filter functions looked up, so that it can be
+    resolved in many contexts. Raises TemplateSyntaxError if the expression is
+    invalid.
+    """
+    def __init__(self, token):
+        self.token = token
+        var, filters = get_filters_from_token(token)
+        self.var = Variable(var)
+        self.filters = [(find_filter(name)[0], arg) for name, arg in filters]
+
+    def __repr__(self):
+        return "<FilterExpression: %s>" % self.token
+
+    def resolve(self, context):
+        "Does what resolve_variable_with_filters() does for this expression."
+        try:
+            obj = self.var.resolve(context)
+        except VariableDoesNotExist:
+            obj = ''
+        for func, arg in self.filters:
+            obj = func(obj, arg)
+        return obj
 
 class Node:
     def render(self, context):
         "Return the node rendered as a string"
         pass
 
+    def render_iter(self, context):
+        """
+        Return an iterator over the rendered node, in pieces. Nodes that
+        render a lot of output, such as ForNode, yield it as they go.
+        """
+        yield self.render(context)
+
     def __iter__(self):
         yield self
 
@@ -585,6 +714,14 @@ class NodeList(list):
                 bits.append(node)
         return ''.join(bits)
 
+    def render_iter(self, context):
+        for node in self:
+            if isinstance(node, Node):
+                for bit in node.render_iter(context):
+                    yield bit
+            else:
+                yield node
+
     def get_nodes_by_type(self, nodetype):
         "Return a list of all nodes of the given type"
         nodes = []
@@ -605,12 +742,13 @@ class TextNode(Node):
 class VariableNode(Node):
     def __init__(self, var_string):
         self.var_string = var_string
+        self.filter_expression = FilterExpression(var_string)
 
     def __repr__(self):
         return "<Variable Node: %s>" % self.var_string
 
     def render(self, context):
-        output = resolve_variable_with_filters(self.var_string, context)
+        output = self.filter_expression.resolve(context)
         # Check type so that we don't run str() on a Unicode object
         if not isinstance(output, basestring):
             output = str(output)
@@ -618,14 +756,100 @@ class VariableNode(Node):
             output = output.encode(DEFAULT_CHARSET)
         return output
 
+def find_filter(filter_name):
+    """
+    Returns (function, has_arg) for the given filter: one of the built-in
+    filters, or, while a template is being parsed, one from the tag libraries
+    it loads. Raises KeyError.
+
+    Outside parsing -- as when resolve_variable_with_filters() is called at
+    render time -- there's no template to say which libraries it loads, so
+    the filters of every library loaded so far are used, the libraries taken
+    in order of name.
+    """
+    parsers = getattr(_parsing, 'parsers', None)
+    if parsers:
+        return parsers[-1].find_filter(filter_name)
+    try:
+        return registered_filters[filter_name]
+    except KeyError:
+        library_names = libraries.keys()
+        library_names.sort()
+        for library_name in library_names:
+            filters = libraries[library_name].filters
+            if filters.has_key(filter_name):
+                return filters[filter_name]
+        raise KeyError, filter_name
+
+class Library:
+    """
+    The tags and filters that a tag library -- a module in a templatetags
+    package -- registers when it's imported. They're only available to the
+    templates that load it with {% load %}.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.tags, self.filters = {}, {}
+
+    def __repr__(self):
+        return "<Library: %s>" % self.name
+
+# The libraries being imported, the innermost last. Python's import lock
+# guards it, so that only one thread imports libraries at a time.
+_loading_libraries = []
+
+def get_library(library_name):
+    """
+    Returns the Library for the given tag library, importing the module in
+    django.templatetags the first time. Raises ImportError.
+
+    If TEMPLATE_RELOAD_TAG_LIBRARIES is True, the module is reloaded every
+    time, so that changes show up without a restart.
+    """
+    from django.conf.settings import TEMPLATE_RELOAD_TAG_LIBRARIES
+    library = libraries.get(library_name)
+    if library is not None and not TEMPLATE_RELOAD_TAG_LIBRARIES:
+        return library
+    module_name = 'django.templatetags.%s' % library_name.split('.')[-1]
+    imp.acquire_lock()
+    try:
+        library = libraries.get(library_name)
+        if library is None or TEMPLATE_RELOAD_TAG_LIBRARIES:
+            library = Library(library_name)
+            _loading_libraries.append(library)
+            try:
+                # A module that was imported some other way is run again, so
+                # that its tags and filters are registered in the library.
+                imported = sys.modules.has_key(module_name)
+                module = __import__(module_name, '', '', [''])
+                if imported:
+                    reload(module)
+            finally:
+                _loading_libraries.pop()
+            libraries[library_name] = library
+        return library
+    finally:
+        imp.release_lock()
+
 def register_tag(token_command, callback_function):
-    registered_tags[token_command] = callback_function
+    """
+    Registers a tag. Tags registered by a tag library, as it's imported by
+    {% load %}, belong to that library; others are available everywhere.
+    """
+    if _loading_libraries:
+        _loading_libraries[-1].tags[token_command] = callback_function
+    else:
+        registered_tags[token_command] = callback_function
 
 def unregister_tag(token_command):
     del registered_tags[token_command]
 
 def register_filter(filter_name, callback_function, has_arg):
-    registered_filters[filter_name] = (callback_function, has_arg)
+    "Registers a filter. Like tags, filters can belong to a tag library."
+    if _loading_libraries:
+        _loading_libraries[-1].filters[filter_name] = (callback_function, has_arg)
+    else:
+        registered_filters[filter_name] = (callback_function, has_arg)
 
 def unregister_filter(filter_name):
     del registered_filters[filter_name]
@@ -0,0 +1,157 @@
+"""
+Compiles parsed templates into Python functions.
+
+Rendering a template walks its tree of nodes, calling render() on each one and
+joining the results. compile_template() does that walk once instead: it
+generates the source of a Python function that renders the template's nodes
+in place -- text is appended as-is, variables are resolved and converted to
+strings, and {% for %}, {% if %} and {% ifequal %} become Python loops and
+conditions around their contents -- and compiles it.
+
+Nodes the compiler doesn't know about, such as {% block %}, {% extends %} and
+the tags in add-on libraries, are still rendered by calling their render()
+methods, but the NodeLists they contain are compiled in turn, so the blocks
+that a child template overrides run compiled code, too.
+
+Each NodeList is compiled twice: into a function for render(), which joins
+the output, and into a generator for render_iter(), which yields it.
+
+Compiled templates render exactly like interpreted ones. They're used when
+the TEMPLATE_COMPILE setting is True.
+"""
+
+from django.core.template import Node, NodeList, TextNode, VariableNode
+from django.core.template.defaulttags import ForNode, IfNode, IfEqualNode
+from django.conf.settings import DEFAULT_CHARSET
+
+# Python refuses to compile more than 20 nested blocks, so {% for %} tags
+# nested deeper than this are rendered by their nodes.
+MAX_LOOP_DEPTH = 15
+
+def to_string(output):
+    "Converts the value of a variable to a string, as VariableNode.render() does."
+    if not isinstance(output, basestring):
+        return str(output)
+    elif isinstance(output, unicode):
+        return output.encode(DEFAULT_CHARSET)
+    return output
+
+class CompiledNodeList(NodeList):
+    """
+    A NodeList whose render() and render_iter() call the functions compiled
+    from its nodes. It holds the same nodes, so get_nodes_by_type() and
+    friends work as usual.
+    """
+    def __init__(self, nodelist, render_function, render_iter_function):
+        NodeList.__init__(self, nodelist)
+        self.render_function, self.render_iter_function = render_function, render_iter_function
+
+    def render(self, context):
+        return self.render_function(context)
+
+    def render_iter(self, context):
+        # A generated function without a yield statement isn't a generator;
+        # it has nothing to output, and returns None.
+        return self.render_iter_function(context) or iter(())
+
+class CodeGenerator:
+    """
+    Generates the source of the function that renders a NodeList, or, if
+    streaming is True, of the generator that yields its output.
+    """
+    def __init__(self, streaming=False):
+        self.streaming = streaming
+        self.lines = []
+        self.namespace = {'to_string': to_string}
+
+    def add_object(self, prefix, obj):
+        "Makes obj available to the generated code, and returns its name."
+        name = '%s%d' % (prefix, len(self.namespace))
+        self.namespace[name] = obj
+        return name
+
+    def emit(self, indent, line):
+        self.lines.append('    ' * indent + line)
+
+    def emit_output(self, indent, expression):
+        if self.streaming:
+            self.emit(indent, 'yield %s' % expression)
+        else:
+            self.emit(indent, 'append(%s)' % expression)
+
+    def generate_nodelist(self, nodelist, indent, loop_depth):
+        start = len(self.lines)
+        for node in nodelist:
+            self.generate_node(node, indent, loop_depth)
+        if len(self.lines) == start:
+            self.emit(indent, 'pass')
+
+    def generate_node(self, node, indent, loop_depth):
+        # Subclasses of the built-in nodes may render differently, so only
+        # the built-in classes themselves are compiled.
+        cls = getattr(node, '__class__', None)
+        if not isinstance(node, Node):
+            self.emit_output(indent, self.add_object('s', node))
+        elif cls is TextNode:
+            self.emit_output(indent, self.add_object('s', node.s))
+        elif cls is VariableNode:
+            self.emit_output(indent, 'to_string(%s.resolve(context))' % self.add_object('e', node.filter_expression))
+        elif cls is ForNode and loop_depth < MAX_LOOP_DEPTH:
+            # The same loop as ForNode.render(), with the body in place.
+            name = self.add_object('n', node)
+            names = {'node': name, 'n': name[1:]}
+            self.emit(indent, 'values%(n)s, forloop%(n)s, loop_dict%(n)s = %(node)s.start_loop(context)' % names)
+            self.emit(indent, 'for i%(n)s, item%(n)s in enumerate(values%(n)s):' % names)
+            self.emit(indent + 1, 'forloop%(n)s.counter0 = i%(n)s' % names)
+            if node.unpack:
+                self.emit(indent + 1, '%(node)s.set_loop_vars(loop_dict%(n)s, item%(n)s)' % names)
+            else:
+                names['loopvar'] = self.add_object('s', node.loopvar)
+                self.emit(indent + 1, 'loop_dict%(n)s[%(loopvar)s] = item%(n)s' % names)
+            self.generate_nodelist(node.nodelist_loop, indent + 1, loop_depth + 1)
+            self.emit(indent, 'context.pop()')
+        elif cls in (IfNode, IfEqualNode):
+            self.emit(indent, 'if %s.is_true(context):' % self.add_object('n', node))
+            self.generate_nodelist(node.nodelist_true, indent + 1, loop_depth)
+            if node.nodelist_false:
+                self.emit(indent, 'else:')
+                self.generate_nodelist(node.nodelist_false, indent + 1, loop_depth)
+        else:
+            compile_child_nodelists(node)
+            if self.streaming:
+                self.emit(indent, 'for bit in %s.render_iter(context):' % self.add_object('n', node))
+                self.emit(indent + 1, 'yield bit')
+            else:
+                self.emit_output(indent, '%s.render(context)' % self.add_object('n', node))
+
+    def get_source(self):
+        if self.streaming:
+            return '\n'.join(['def render(context):'] + self.lines + [''])
+        return '\n'.join(['def render(context):', '    output = []', '    append = output.append'] +
+            self.lines + ["    return ''.join(output)", ''])
+
+    def get_function(self):
+        exec compile(self.get_source(), '<compiled template>', 'exec') in self.namespace
+        return self.namespace['render']
+
+def compile_child_nodelists(node):
+    "Compiles the NodeLists that are attributes of the given node, in place."
+    for name, value in node.__dict__.items():
+        if isinstance(value, NodeList):
+            setattr(node, name, compile_nodelist(value))
+
+def compile_nodelist(nodelist):
+    "Returns a CompiledNodeList for the given NodeList."
+    if isinstance(nodelist, CompiledNodeList):
+        return nodelist
+    functions = []
+    for streaming in (False, True):
+        generator = CodeGenerator(streaming)
+        generator.generate_nodelist(nodelist, 1, 0)
+        functions.append(generator.get_function())
+    return CompiledNodeList(nodelist, *functions)
+
+def compile_template(template):
+    "Compiles the given Template in place, and returns it."
+    template.nodelist = compile_nodelist(template.nodelist)
+    return template
@@ -1,8 +1,70 @@
 "Default tags used by the template system, available to all templates."
 
-from django.core.template import Node, NodeList, Template, Context, resolve_variable, resolve_variable_with_filters, get_filters_from_token, registered_filters
+from django.core.template import Node, NodeList, Template, Context, Variable, FilterExpression, get_library
 from django.core.template import TemplateSyntaxError, VariableDoesNotExist, BLOCK_TAG_START, BLOCK_TAG_END, VARIABLE_TAG_START, VARIABLE_TAG_END, register_tag
-import sys
+import sys, threading
+
+class FragmentCacheStats:
+    """
+    Counts how often the {% cache %} tags in this process found their
+    fragments in the cache, and how often they had to render them. The counts
+    are shared by all threads, so they're updated with a lock held.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._lock.acquire()
+        try:
+            self.hits = self.misses = 0
+        finally:
+            self._lock.release()
+
+    def record(self, hit):
+        "Counts one lookup: a hit if hit is true, a miss if not."
+        self._lock.acquire()
+        try:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        finally:
+            self._lock.release()
+
+fragment_cache_stats = FragmentCacheStats()
+
+class CacheNode(Node):
+    def __init__(self, nodelist, timeout, fragment_name, vary_on):
+        self.nodelist, self.timeout, self.fragment_name = nodelist, timeout, fragment_name
+        self.vary_on = [FilterExpression(var) for var in vary_on]
+
+    def __repr__(self):
+        return "<Cache Node: %s>" % self.fragment_name
+
+    def get_cache_key(self, context):
+        import md5
+        from django.utils.translation import get_language
+        ctx = md5.new()
+        # Each value is prefixed with its length, so that ('a:b', 'c') and
+        # ('a', 'b:c') don't make the same key.
+        for value in [expression.resolve(context) for expression in self.vary_on] + [get_language()]:
+            if isinstance(value, unicode):
+                value = value.encode('utf-8')
+            else:
+                value = str(value)
+            ctx.update('%d:%s' % (len(value), value))
+        return 'template.cache.%s.%s' % (self.fragment_name, ctx.hexdigest())
+
+    def render(self, context):
+        from django.core.cache import cache
+        key = self.get_cache_key(context)
+        value = cache.get(key)
+        fragment_cache_stats.record(value is not None)
+        if value is None:
+            value = self.nodelist.render(context)
+            cache.set(key, value, self.timeout)
+        return value
 
 class CommentNode(Node):
     def render(self, context):
@@ -12,11 +74,11 @@ class CycleNode(Node):
     def __init__(self, cyclevars):
         self.cyclevars = cyclevars
         self.cyclevars_len = len(cyclevars)
-        self.counter = -1
 
     def render(self, context):
-        self.counter += 1
-        return self.cyclevars[self.counter % self.cyclevars_len]
+        counter = context.render_state.get(self, -1) + 1
+        context.render_state[self] = counter
+        return self.cyclevars[counter % self.cyclevars_len]
 
 class DebugNode(Node):
     def render(self, context):
@@ -27,30 +89,71 @@ class DebugNode(Node):
         return ''.join(output)
 
 class FilterNode(Node):
-    def __init__(self, filters, nodelist):
-        self.filters, self.nodelist = filters, nodelist
+    def __init__(self, filter_expression, nodelist):
+        self.filter_expression, self.nodelist = filter_expression, nodelist
 
     def render(self, context):
         output = self.nodelist.render(context)
         # apply filters
-        for f in self.filters:
-            output = registered_filters[f[0]][0](output, f[1])
+        for func, arg in self.filter_expression.filters:
+            output = func(output, arg)
         return output
 
 class FirstOfNode(Node):
     def __init__(self, vars):
-        self.vars = vars
+        self.vars = [Variable(var) for var in vars]
 
     def render(self, context):
         for var in self.vars:
-            value = resolve_variable(var, context)
+            value = var.resolve(context)
             if value:
                 return str(value)
         return ''
 
+class ForLoop:
+    """
+    The "forloop" variable within a {% for %} loop. There's one per loop,
+    updated in place each time through it, and everything but counter0 is
+    worked out when it's looked up, so that a loop allocates nothing per item
+    for it. revcounter, revcounter0 and last need the length of the sequence,
+    and don't exist if it hasn't got one.
+    """
+    def __init__(self, sequence, parentloop):
+        self.sequence, self.parentloop = sequence, parentloop
+        self.counter0 = 0
+
+    def __repr__(self):
+        return "<ForLoop: counter0=%d>" % self.counter0
+
+    def __getitem__(self, key):
+        if key == 'counter':
+            return self.counter0 + 1
+        elif key == 'counter0':
+            return self.counter0
+        elif key == 'first':
+            return self.counter0 == 0
+        elif key == 'last':
+            return self.counter0 == len(self.sequence) - 1
+        elif key == 'revcounter':
+            return len(self.sequence) - self.counter0
+        elif key == 'revcounter0':
+            return len(self.sequence) - self.counter0 - 1
+        elif key == 'parentloop':
+            return self.parentloop
+        raise KeyError, key
+
+    def has_key(self, key):
+        return key in ('counter', 'counter0', 'first', 'last', 'revcounter', 'revcounter0', 'parentloop')
+
 class ForNode(Node):
-    def __init__(self, loopvar, sequence, reversed, nodelist_loop):
-        self.loopvar, self.sequence = loopvar, sequence
+    def __init__(self, loopvars, sequence, reversed, nodelist_loop):
+        # For backwards compatibility, loopvars may be a single name.
+        if isinstance(loopvars, basestring):
+            loopvars = [loopvars]
+        self.loopvars, self.sequence = loopvars, sequence
+        self.loopvar = loopvars[0]
+        self.unpack = len(loopvars) > 1
+        self.sequence_expression = FilterExpression(sequence)
         self.reversed = reversed
         self.nodelist_loop = nodelist_loop
 
@@ -60,7 +163,7 @@ class ForNode(Node):
         else:
             reversed = ''
         return "<For Node: for %s in %s, tail_len: %d%s>" % \
-            (self.loopvar, self.sequence, len(self.nodelist_loop), reversed)
+            (', '.join(self.loopvars), self.sequence, len(self.nodelist_loop), reversed)
 
     def __iter__(self):
         for node in self.nodelist_loop:
@@ -73,82 +176,144 @@ class ForNode(Node):
         nodes.extend(self.nodelist_loop.get_nodes_by_type(nodetype))
         return nodes
 
-    def render(self, context):
-        nodelist = NodeList()
+    def start_loop(self, context):
+        """
+        Pushes the context and sets up 'forloop' in it. Returns the sequence
+        to loop over, the ForLoop, whose counter0 is to be set each time
+        through the loop, and the context dictionary to set the loop
+        variables in (see set_loop_vars()). Call context.pop() afterwards.
+        """
         if context.has_key('forloop'):
             parentloop = context['forloop']
         else:
             parentloop = {}
         context.push()
         try:
-            values = resolve_variable_with_filters(self.sequence, context)
+            values = self.sequence_expression.resolve(context)
         except VariableDoesNotExist:
             values = []
         if values is None:
             values = []
-        len_values = len(values)
         if self.reversed:
-            # From http://www.python.org/doc/current/tut/node11.html
-            def reverse(data):
-                for index in range(len(data)-1, -1, -1):
-                    yield data[index]
-            values = reverse(values)
+            values = list(values)
+            values.reverse()
+        forloop = ForLoop(values, parentloop)
+        loop_dict = context.dicts[0]
+        loop_dict['forloop'] = forloop
+        return values, forloop, loop_dict
+
+    def set_loop_vars(self, loop_dict, item):
+        """
+        Sets the loop variables for the given item. If there are several, the
+        item is unpacked into them; any that it has no value for are set to
+        the empty string.
+        """
+        if not self.unpack:
+            loop_dict[self.loopvar] = item
+            return
+        try:
+            values = tuple(item)
+        except TypeError:
+            values = ()
+        if len(values) != len(self.loopvars):
+            values = (values + ('',) * len(self.loopvars))[:len(self.loopvars)]
+        for var, value in zip(self.loopvars, values):
+            loop_dict[var] = value
+
+    def iterate(self, context):
+        """
+        Generator that sets the loop variables and 'forloop' in the context
+        for each time through the loop, and yields the current item.
+        """
+        values, forloop, loop_dict = self.start_loop(context)
         for i, item in enumerate(values):
-            context['forloop'] = {
-                # shortcuts for current loop iteration number
-                'counter0': i,
-                'counter': i+1,
-                # reverse counter iteration numbers
-                'revcounter': len_values - i,
-                'revcounter0': len_values - i - 1,
-                # boolean values designating first and last times through loop
-                'first': (i == 0),
-                'last': (i == len_values - 1),
-                'parentloop': parentloop,
-            }
-            context[self.loopvar] = item
-            for node in self.nodelist_loop:
-                nodelist.append(node.render(context))
+            forloop.counter0 = i
+            self.set_loop_vars(loop_dict, item)
+            yield item
         context.pop()
-        return nodelist.render(context)
+
+    def render(self, context):
+        values, forloop, loop_dict = self.start_loop(context)
+        output = []
+        append = output.append
+        renders = [node.render for node in self.nodelist_loop]
+        if self.unpack:
+            for i, item in enumerate(values):
+                forloop.counter0 = i
+                self.set_loop_vars(loop_dict, item)
+                for render in renders:
+                    append(render(context))
+        else:
+            loopvar = self.loopvar
+            for i, item in enumerate(values):
+                forloop.counter0 = i
+                loop_dict[loopvar] = item
+                for render in renders:
+                    append(render(context))
+        context.pop()
+        return ''.join(output)
+
+    def render_iter(self, context):
+        for item in self.iterate(context):
+            for bit in self.nodelist_loop.render_iter(context):
+                yield bit
 
 class IfChangedNode(Node):
-    def __init__(self, nodelist):
+    def __init__(self, nodelist, vars=None):
         self.nodelist = nodelist
-        self._last_seen = None
+        self.vars = [FilterExpression(var) for var in vars or ()]
 
     def render(self, context):
-        content = self.nodelist.render(context)
-        if content != self._last_seen:
-            firstloop = (self._last_seen == None)
-            self._last_seen = content
-            context.push()
-            context['ifchanged'] = {'firstloop': firstloop}
-            content = self.nodelist.render(context)
-            context.pop()
-            return content
+        # What was seen last is kept per run of the enclosing loop, so a
+        # loop that's run again starts afresh.
+        forloop = context['forloop']
+        state = context.render_state.get(self)
+        if state is None or state[0] is not forloop:
+            last_seen = None
         else:
-            return ''
+            last_seen = state[1]
+        if self.vars:
+            compare_to = [var.resolve(context) for var in self.vars]
+            if last_seen is not None and compare_to == last_seen:
+                return ''
+        context.push()
+        context['ifchanged'] = {'firstloop': last_seen is None}
+        content = self.nodelist.render(context)
+        context.pop()
+        if not self.vars:
+            if content == last_seen:
+                return ''
+            compare_to = content
+        context.render_state[self] = (forloop, compare_to)
+        return content
 
 class IfEqualNode(Node):
     def __init__(self, var1, var2, nodelist_true, nodelist_false, negate):
-        self.var1, self.var2 = var1, var2
+        self.var1, self.var2 = Variable(var1), Variable(var2)
         self.nodelist_true, self.nodelist_false = nodelist_true, nodelist_false
         self.negate = negate
 
     def __repr__(self):
         return "<IfEqualNode>"
 
+    def is_true(self, context):
+        val1 = self.var1.resolve(context)
+        val2 = self.var2.resolve(context)
+        return (self.negate and val1 != val2) or (not self.negate and val1 == val2)
+
     def render(self, context):
-        val1 = resolve_variable(self.var1, context)
-        val2 = resolve_variable(self.var2, context)
-        if (self.negate and val1 != val2) or (not self.negate and val1 == val2):
+        if self.is_true(context):
             return self.nodelist_true.render(context)
         return self.nodelist_false.render(context)
 
+    def render_iter(self, context):
+        if self.is_true(context):
+            return self.nodelist_true.render_iter(context)
+        return self.nodelist_false.render_iter(context)
+
 class IfNode(Node):
     def __init__(self, boolvars, nodelist_true, nodelist_false):
-        self.boolvars = boolvars
+        self.boolvars = [(ifnot, FilterExpression(boolvar)) for ifnot, boolvar in boolvars]
         self.nodelist_true, self.nodelist_false = nodelist_true, nodelist_false
 
     def __repr__(self):
@@ -168,34 +333,50 @@ class IfNode(Node):
         nodes.extend(self.nodelist_false.get_nodes_by_type(nodetype))
         return nodes
 
-    def render(self, context):
+    def is_true(self, context):
         for ifnot, boolvar in self.boolvars:
             try:
-                value = resolve_variable_with_filters(boolvar, context)
+                value = boolvar.resolve(context)
             except VariableDoesNotExist:
                 value = None
             if (value and not ifnot) or (ifnot and not value):
-                return self.nodelist_true.render(context)
+                return True
+        return False
+
+    def render(self, context):
+        if self.is_true(context):
+            return self.nodelist_true.render(context)
         return self.nodelist_false.render(context)
 
+    def render_iter(self, context):
+        if self.is_true(context):
+            return self.nodelist_true.render_iter(context)
+        return self.nodelist_false.render_iter(context)
+
 class RegroupNode(Node):
     def __init__(self, target_var, expression, var_name):
         self.target_var, self.expression = target_var, expression
         self.var_name = var_name
+        self.target = FilterExpression(target_var)
+        # The expression is looked up on each object, as if it were the
+        # context.
+        self.grouper = FilterExpression(expression)
 
     def render(self, context):
-        obj_list = resolve_variable_with_filters(self.target_var, context)
+        obj_list = self.target.resolve(context)
         if obj_list == '': # target_var wasn't found in context; fail silently
             context[self.var_name] = []
             return ''
         output = [] # list of dictionaries in the format {'grouper': 'key', 'list': [list of contents]}
+        resolve_grouper = self.grouper.resolve
+        current_list = None
         for obj in obj_list:
-            grouper = resolve_variable_with_filters('var.%s' % self.expression, \
-                Context({'var': obj}))
-            if output and repr(output[-1]['grouper']) == repr(grouper):
-                output[-1]['list'].append(obj)
+            grouper = resolve_grouper(obj)
+            if current_list is not None and current_grouper == grouper:
+                current_list.append(obj)
             else:
-                output.append({'grouper': grouper, 'list': [obj]})
+                current_grouper, current_list = grouper, [obj]
+                output.append({'grouper': grouper, 'list': current_list})
         context[self.var_name] = output
         return ''
 
@@ -238,18 +419,8 @@ class LoadNode(Node):
     def __init__(self, taglib):
         self.taglib = taglib
 
-    def load_taglib(taglib):
-        mod = __import__("django.templatetags.%s" % taglib.split('.')[-1], '', '', [''])
-        reload(mod)
-        return mod
-    load_taglib = staticmethod(load_taglib)
-
     def render(self, context):
-        "Import the relevant module"
-        try:
-            self.__class__.load_taglib(self.taglib)
-        except ImportError:
-            pass # Fail silently for invalid loads.
+        # The library was loaded when the template was parsed.
         return ''
 
 class NowNode(Node):
@@ -276,14 +447,14 @@ class TemplateTagNode(Node):
 
 class WidthRatioNode(Node):
     def __init__(self, val_var, max_var, max_width):
-        self.val_var = val_var
-        self.max_var = max_var
+        self.val_var = FilterExpression(val_var)
+        self.max_var = FilterExpression(max_var)
         self.max_width = max_width
 
     def render(self, context):
         try:
-            value = resolve_variable_with_filters(self.val_var, context)
-            maxvalue = resolve_variable_with_filters(self.max_var, context)
+            value = self.val_var.resolve(context)
+            maxvalue = self.max_var.resolve(context)
         except VariableDoesNotExist:
             return ''
         try:
@@ -294,6 +465,35 @@ class WidthRatioNode(Node):
             return ''
         return str(int(round(ratio)))
 
+def do_cache(parser, token):
+    """
+    Cache the contents of the block for a given number of seconds, so that
+    it's only rendered again when it has expired, using the cache set up by
+    the CACHE_BACKEND setting::
+
+        {% cache 500 sidebar %}
+            .. sidebar ..
+        {% endcache %}
+
+    The fragment's name must be unique. Any further arguments are variables
+    (with optional filters) that the contents depend on; a separate copy is
+    cached for each combination of their values, and for each language::
+
+        {% cache 500 sidebar request.user.id %}
+            .. sidebar for the logged in user ..
+        {% endcache %}
+    """
+    bits = token.contents.split()
+    if len(bits) < 3:
+        raise TemplateSyntaxError, "'%s' tag takes at least two arguments: a timeout and the name of the fragment" % bits[0]
+    try:
+        timeout = int(bits[1])
+    except ValueError:
+        raise TemplateSyntaxError, "First argument to '%s' tag must be a number of seconds" % bits[0]
+    nodelist = parser.parse(('endcache',))
+    parser.delete_first_token()
+    return CacheNode(nodelist, timeout, bits[2], bits[3:])
+
 def do_comment(parser, token):
     """
     Ignore everything between ``{% comment %}`` and ``{% endcomment %}``
@@ -387,10 +587,10 @@ def do_filter(parser, token):
         {% endfilter %}
     """
     _, rest = token.contents.split(None, 1)
-    _, filters = get_filters_from_token('var|%s' % rest)
+    filter_expression = FilterExpression('var|%s' % rest)
     nodelist = parser.parse(('endfilter',))
     parser.delete_first_token()
-    return FilterNode(filters, nodelist)
+    return FilterNode(filter_expression, nodelist)
 
 def do_firstof(parser, token):
     """
@@ -435,6 +635,11 @@ def do_for(parser, token):
     You can also loop over a list in reverse by using
     ``{% for obj in list reversed %}``.
 
+    If the items are sequences themselves, you can unpack them into several
+    variables::
+
+        {% for name, score in scores %}{{ name }}: {{ score }}{% endfor %}
+
     The for loop sets a number of variables available within the loop:
 
         ==========================  ================================================
@@ -454,18 +659,20 @@ def do_for(parser, token):
 
     """
     bits = token.contents.split()
-    if len(bits) == 5 and bits[4] != 'reversed':
-        raise TemplateSyntaxError, "'for' statements with five words should end in 'reversed': %s" % token.contents
-    if len(bits) not in (4, 5):
-        raise TemplateSyntaxError, "'for' statements should have either four or five words: %s" % token.contents
-    if bits[2] != 'in':
-        raise TemplateSyntaxError, "'for' statement must contain 'in' as the second word: %s" % token.contents
-    loopvar = bits[1]
-    sequence = bits[3]
-    reversed = (len(bits) == 5)
+    if len(bits) < 4:
+        raise TemplateSyntaxError, "'for' statements should have at least four words: %s" % token.contents
+    reversed = bits[-1] == 'reversed' and bits[-3] == 'in'
+    in_index = reversed and -3 or -2
+    if bits[in_index] != 'in':
+        raise TemplateSyntaxError, "'for' statements should use the format 'for x in y' or 'for x, y in z': %s" % token.contents
+    loopvars = [var.strip() for var in ' '.join(bits[1:in_index]).split(',')]
+    for var in loopvars:
+        if not var or ' ' in var:
+            raise TemplateSyntaxError, "'for' tag received an invalid argument: %s" % token.contents
+    sequence = bits[in_index + 1]
     nodelist_loop = parser.parse(('endfor',))
     parser.delete_first_token()
-    return ForNode(loopvar, sequence, reversed, nodelist_loop)
+    return ForNode(loopvars, sequence, reversed, nodelist_loop)
 
 def do_ifequal(parser, token, negate):
     """
@@ -579,13 +786,18 @@ def do_ifchanged(parser, token):
         {% ifchanged %}<h3>{{ date|date:"F" }}</h3>{% endifchanged %}
         <a href="{{ date|date:"M/d"|lower }}/">{{ date|date:"j" }}</a>
         {% endfor %}
+
+    Given one or more variables, it checks whether any of them has changed
+    instead, which saves rendering the contents when they haven't::
+
+        {% for date in days %}
+        {% ifchanged date.month %}<h3>{{ date|date:"F" }}</h3>{% endifchanged %}
+        {% endfor %}
     """
     bits = token.contents.split()
-    if len(bits) != 1:
-        raise TemplateSyntaxError, "'ifchanged' tag takes no arguments"
     nodelist = parser.parse(('endifchanged',))
     parser.delete_first_token()
-    return IfChangedNode(nodelist)
+    return IfChangedNode(nodelist, bits[1:])
 
 def do_ssi(parser, token):
     """
@@ -625,9 +837,8 @@ def do_load(parser, token):
     if len(bits) != 2:
         raise TemplateSyntaxError, "'load' statement takes one argument"
     taglib = bits[1]
-    # check at compile time that the module can be imported
     try:
-        LoadNode.load_taglib(taglib)
+        parser.add_library(get_library(taglib))
     except ImportError:
         raise TemplateSyntaxError, "'%s' is not a valid tag library" % taglib
     return LoadNode(taglib)
@@ -758,6 +969,7 @@ def do_widthratio(parser, token):
         raise TemplateSyntaxError("widthratio final argument must be an integer")
     return WidthRatioNode(this_value_var, max_value_var, max_width)
 
+register_tag('cache', do_cache)
 register_tag('comment', do_comment)
 register_tag('cycle', do_cycle)
 register_tag('debug', do_debug)
@@ -15,10 +15,16 @@
 # For example, the eggs loader (which is capable of loading templates from
 # Python eggs) sets is_usable to False if the "pkg_resources" module isn't
 # installed, because pkg_resources is necessary to read eggs.
+#
+# A loader that reads templates from files can also have a
+# "find_template_file" attribute: a callable that takes the same arguments
+# and returns the path of the file the template is read from, or None. The
+# template cache uses it to notice when a template file changes.
 
 from django.core.exceptions import ImproperlyConfigured
-from django.core.template import Template, Context, Node, TemplateDoesNotExist, TemplateSyntaxError, resolve_variable_with_filters, register_tag
+from django.core.template import Template, Context, Node, FilterExpression, TemplateDoesNotExist, TemplateSyntaxError, register_tag
 from django.conf.settings import TEMPLATE_LOADERS
+import os, threading, time
 
 template_source_loaders = []
 for path in TEMPLATE_LOADERS:
@@ -39,28 +45,135 @@ for path in TEMPLATE_LOADERS:
         template_source_loaders.append(func)
 
 def load_template_source(name, dirs=None):
+    return find_template_source(name, dirs)[0]
+
+def find_template_source(name, dirs=None):
+    "Returns (source, loader) for the first of the template loaders that finds the given template."
     for loader in template_source_loaders:
         try:
-            return loader(name, dirs)
+            return loader(name, dirs), loader
         except TemplateDoesNotExist:
             pass
     raise TemplateDoesNotExist, name
 
+def _get_mtime(filename):
+    try:
+        return os.stat(filename).st_mtime
+    except (OSError, TypeError):
+        return None
+
+# How long, in seconds, the template cache remembers that a template doesn't
+# exist.
+MISSING_TEMPLATE_TIMEOUT = 10
+
+# How many parent templates each {% extends %} tag remembers the inheritance
+# for. More than one is only needed for {% extends variable %}.
+MAX_INHERITANCES = 10
+
+class TemplateCache:
+    """
+    A thread-safe cache of compiled templates, keyed by template name and
+    directories, that holds at most TEMPLATE_CACHE_SIZE of them, dropping the
+    least recently used first. Templates that don't exist are remembered for
+    MISSING_TEMPLATE_TIMEOUT seconds.
+
+    If TEMPLATE_CACHE_CHECK_MTIME is True (or None, the default, and DEBUG is
+    True), the template file is checked each time a template is fetched, and
+    the template is loaded again if the file has changed. Templates that
+    didn't exist, or that don't come from a file, aren't reused then.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self._lock.acquire()
+        try:
+            # Maps key to (Template, filename, mtime), or, for templates that
+            # don't exist, to (TemplateDoesNotExist, None, expiry time).
+            self._entries = {}
+            self._last_used = {} # Maps key to the value of _clock when it was last used.
+            self._clock = 0
+        finally:
+            self._lock.release()
+
+    def _use(self, key):
+        # A lost update only makes a template look a little older, so this
+        # doesn't take the lock.
+        self._clock += 1
+        self._last_used[key] = self._clock
+
+    def _add(self, key, entry, max_size):
+        self._lock.acquire()
+        try:
+            self._entries[key] = entry
+            self._use(key)
+            while len(self._entries) > max_size:
+                oldest = min([(self._last_used.get(k, 0), k) for k in self._entries.keys()])[1]
+                del self._entries[oldest]
+                self._last_used.pop(oldest, None)
+        finally:
+            self._lock.release()
+
+    def get_template(self, name, dirs=None):
+        from django.conf import settings
+        max_size, check_mtime = settings.TEMPLATE_CACHE_SIZE, settings.TEMPLATE_CACHE_CHECK_MTIME
+        if check_mtime is None:
+            check_mtime = settings.DEBUG
+        key = (name, dirs and tuple(dirs) or None)
+        entry = self._entries.get(key)
+        if entry is not None:
+            template, filename, mtime = entry
+            if isinstance(template, TemplateDoesNotExist):
+                if not check_mtime and time.time() < mtime:
+                    raise template
+            # Templates that can't be checked are loaded again each time.
+            elif not check_mtime or (filename is not None and _get_mtime(filename) == mtime):
+                self._use(key)
+                return template
+        try:
+            source, loader = find_template_source(name, dirs)
+        except TemplateDoesNotExist, e:
+            if not check_mtime:
+                self._add(key, (e, None, time.time() + MISSING_TEMPLATE_TIMEOUT), max_size)
+            raise
+        filename = None
+        if hasattr(loader, 'find_template_file'):
+            filename = loader.find_template_file(name, dirs)
+        mtime = _get_mtime(filename)
+        template = get_template_from_string(source)
+        self._add(key, (template, filename, mtime), max_size)
+        return template
+
+template_cache = TemplateCache()
+
 class ExtendsError(Exception):
     pass
 
-def get_template(template_name):
+def get_template(template_name, dirs=None):
     """
     Returns a compiled Template object for the given template name,
-    handling template inheritance recursively.
+    handling template inheritance recursively. dirs is an optional list of
+    directories to search instead of TEMPLATE_DIRS.
+
+    The compiled template comes from the template cache, if it's on, so it
+    may be shared with other threads: render it, but don't change it.
     """
-    return get_template_from_string(load_template_source(template_name))
+    from django.conf.settings import TEMPLATE_CACHE_SIZE
+    if TEMPLATE_CACHE_SIZE:
+        return template_cache.get_template(template_name, dirs)
+    return get_template_from_string(load_template_source(template_name, dirs))
 
 def get_template_from_string(source):
     """
     Returns a compiled Template object for the given template code,
-    handling template inheritance recursively.
+    handling template inheritance recursively. If TEMPLATE_COMPILE is True,
+    the template is compiled to Python code.
     """
+    from django.conf.settings import TEMPLATE_COMPILE
+    if TEMPLATE_COMPILE:
+        from django.core.template.compiler import compile_template
+        return compile_template(Template(source))
     return Template(source)
 
 def render_to_string(template_name, dictionary=None, context_instance=None):
@@ -92,73 +205,143 @@ def select_template(template_name_list):
     raise TemplateDoesNotExist, ', '.join(template_name_list)
 
 class BlockNode(Node):
-    def __init__(self, name, nodelist, parent=None):
-        self.name, self.nodelist, self.parent = name, nodelist, parent
+    def __init__(self, name, nodelist):
+        self.name, self.nodelist = name, nodelist
 
     def __repr__(self):
         return "<Block Node: %s. Contents: %r>" % (self.name, self.nodelist)
 
     def render(self, context):
+        # Render the most derived version of this block, if the template is
+        # being rendered for a child template that overrides it.
+        blocks = context.render_state.get('blocks')
+        return BlockContext(blocks and blocks.get(self.name) or (self,), context).render()
+
+    def render_iter(self, context):
+        blocks = context.render_state.get('blocks')
+        return BlockContext(blocks and blocks.get(self.name) or (self,), context).render_iter()
+
+class BlockContext:
+    """
+    The "block" template variable within a block: renders the block's most
+    derived version, with {{ block.super }} rendering the one it overrides.
+    """
+    def __init__(self, versions, context):
+        self.versions, self.context = versions, context
+
+    def render(self):
+        context = self.context
         context.push()
-        # Save context in case of block.super().
-        self.context = context
         context['block'] = self
-        result = self.nodelist.render(context)
+        result = self.versions[0].nodelist.render(context)
         context.pop()
         return result
 
+    def render_iter(self):
+        context = self.context
+        context.push()
+        context['block'] = self
+        for bit in self.versions[0].nodelist.render_iter(context):
+            yield bit
+        context.pop()
+
     def super(self):
-        if self.parent:
-            return self.parent.render(self.context)
+        if len(self.versions) > 1:
+            return BlockContext(self.versions[1:], self.context).render()
         return ''
 
-    def add_parent(self, nodelist):
-        if self.parent:
-            self.parent.add_parent(nodelist)
-        else:
-            self.parent = BlockNode(self.name, nodelist)
+class Inheritance:
+    """
+    A template's inheritance, resolved: the nodelist of the topmost template,
+    which is what's rendered, and a dictionary mapping each block name to a
+    tuple of the BlockNodes for that name, the most derived first. It's built
+    once and never changed, so renders in different threads can share it.
+    """
+    def __init__(self, nodelist, blocks):
+        self.nodelist, self.blocks = nodelist, blocks
 
 class ExtendsNode(Node):
     def __init__(self, nodelist, parent_name, parent_name_var, template_dirs=None):
         self.nodelist = nodelist
         self.parent_name, self.parent_name_var = parent_name, parent_name_var
+        if parent_name_var:
+            self.parent_name_expression = FilterExpression(parent_name_var)
         self.template_dirs = template_dirs
+        self.blocks = dict([(n.name, n) for n in nodelist.get_nodes_by_type(BlockNode)])
+        # Maps parent name to (parent, Inheritance), where parent is the
+        # compiled parent template, or the parent's own Inheritance if it
+        # extends another template in turn. It holds at most
+        # MAX_INHERITANCES entries.
+        self._inheritances = {}
 
-    def get_parent(self, context):
+    def get_parent_name(self, context):
         if self.parent_name_var:
-            self.parent_name = resolve_variable_with_filters(self.parent_name_var, context)
-        parent = self.parent_name
+            parent = self.parent_name_expression.resolve(context)
+        else:
+            parent = self.parent_name
         if not parent:
             error_msg = "Invalid template name in 'extends' tag: %r." % parent
             if self.parent_name_var:
                 error_msg += " Got this from the %r variable." % self.parent_name_var
             raise TemplateSyntaxError, error_msg
+        return parent
+
+    def get_parent(self, parent):
+        "Returns the compiled parent template with the given name."
         try:
-            return get_template_from_string(load_template_source(parent, self.template_dirs))
+            return get_template(parent, self.template_dirs)
         except TemplateDoesNotExist:
             raise TemplateSyntaxError, "Template %r cannot be extended, because it doesn't exist" % parent
 
-    def render(self, context):
-        compiled_parent = self.get_parent(context)
-        parent_is_child = isinstance(compiled_parent.nodelist[0], ExtendsNode)
-        parent_blocks = dict([(n.name, n) for n in compiled_parent.nodelist.get_nodes_by_type(BlockNode)])
-        for block_node in self.nodelist.get_nodes_by_type(BlockNode):
-            # Check for a BlockNode with this node's name, and replace it if found.
-            try:
-                parent_block = parent_blocks[block_node.name]
-            except KeyError:
-                # This BlockNode wasn't found in the parent template, but the
-                # parent block might be defined in the parent's *parent*, so we
-                # add this BlockNode to the parent's ExtendsNode nodelist, so
-                # it'll be checked when the parent node's render() is called.
-                if parent_is_child:
-                    compiled_parent.nodelist[0].nodelist.append(block_node)
+    def get_inheritance(self, context):
+        """
+        Returns the Inheritance for this template. It's worked out the first
+        time the template is rendered with a given parent, and kept until the
+        template cache hands out a different parent template (because the
+        parent, or one of its ancestors, was changed or dropped from the
+        cache).
+        """
+        parent_name = self.get_parent_name(context)
+        compiled_parent = self.get_parent(parent_name)
+        if compiled_parent.nodelist and isinstance(compiled_parent.nodelist[0], ExtendsNode):
+            parent = compiled_parent.nodelist[0].get_inheritance(context)
+        else:
+            parent = compiled_parent
+        cached = self._inheritances.get(parent_name)
+        if cached is None or cached[0] is not parent:
+            if isinstance(parent, Inheritance):
+                blocks = parent.blocks.copy()
             else:
-                # Keep any existing parents and add a new one. Used by BlockNode.
-                parent_block.parent = block_node.parent
-                parent_block.add_parent(parent_block.nodelist)
-                parent_block.nodelist = block_node.nodelist
-        return compiled_parent.render(context)
+                blocks = dict([(n.name, (n,)) for n in parent.nodelist.get_nodes_by_type(BlockNode)])
+            for name, block_node in self.blocks.items():
+                blocks[name] = (block_node,) + blocks.get(name, ())
+            if cached is None and len(self._inheritances) >= MAX_INHERITANCES:
+                self._inheritances.clear()
+            cached = self._inheritances[parent_name] = (parent, Inheritance(parent.nodelist, blocks))
+        return cached[1]
+
+    def render(self, context):
+        inheritance = self.get_inheritance(context)
+        # BlockNodes look up their most derived versions here.
+        old_blocks = context.render_state.get('blocks')
+        context.render_state['blocks'] = inheritance.blocks
+        try:
+            return inheritance.nodelist.render(context)
+        finally:
+            context.render_state['blocks'] = old_blocks
+
+    def render_iter(self, context):
+        inheritance = self.get_inheritance(context)
+        old_blocks = context.render_state.get('blocks')
+        context.render_state['blocks'] = inheritance.blocks
+        # Python before 2.5 doesn't allow yield within try/finally.
+        try:
+            for bit in inheritance.nodelist.render_iter(context):
+                yield bit
+        except:
+            context.render_state['blocks'] = old_blocks
+            raise
+        context.render_state['blocks'] = old_blocks
 
 def do_block(parser, token):
     """
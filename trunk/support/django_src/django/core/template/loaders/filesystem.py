@@ -20,3 +20,12 @@ def load_template_source(template_name, template_dirs=None):
         error_msg = "Your TEMPLATE_DIRS setting is empty. Change it to point to at least one template directory."
     raise TemplateDoesNotExist, error_msg
 load_template_source.is_usable = True
+
+def find_template_file(template_name, template_dirs=None):
+    "Returns the path of the file the given template is loaded from, or None."
+    for template_dir in template_dirs or TEMPLATE_DIRS:
+        filepath = os.path.join(template_dir, template_name) + TEMPLATE_FILE_EXTENSION
+        if os.path.isfile(filepath):
+            return filepath
+    return None
+load_template_source.find_template_file = find_template_file
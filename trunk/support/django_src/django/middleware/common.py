@@ -62,8 +62,9 @@ class CommonMiddleware:
                         "Referrer: %s\nRequested URL: %s\n" % (referer, request.get_full_path()))
                 return response
 
-        # Use ETags, if requested.
-        if settings.USE_ETAGS:
+        # Use ETags, if requested. A streamed response would have to be read
+        # into memory to work out its ETag, so it doesn't get one.
+        if settings.USE_ETAGS and not response.is_streaming():
             etag = md5.new(response.get_content_as_string(settings.DEFAULT_CHARSET)).hexdigest()
             if request.META.get('HTTP_IF_NONE_MATCH') == etag:
                 response = httpwrappers.HttpResponseNotModified()
@@ -1,5 +1,5 @@
 import re
-from django.utils.text import compress_string
+from django.utils.text import compress_string, compress_sequence
 from django.utils.cache import patch_vary_headers
 
 re_accepts_gzip = re.compile(r'\bgzip\b')
@@ -19,6 +19,10 @@ class GZipMiddleware:
         if not re_accepts_gzip.search(ae):
             return response
 
-        response.content = compress_string(response.content)
+        if response.is_streaming():
+            from django.conf.settings import DEFAULT_CHARSET
+            response.iterator = compress_sequence(response.iter_content(DEFAULT_CHARSET))
+        else:
+            response.content = compress_string(response.content)
         response['Content-Encoding'] = 'gzip'
         return response
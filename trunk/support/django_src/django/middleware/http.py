@@ -8,12 +8,13 @@ class ConditionalGetMiddleware:
 
     Removes the content from any response to a HEAD request.
 
-    Also sets the Date and Content-Length response-headers.
+    Also sets the Date and Content-Length response-headers. Content-Length
+    isn't set for streamed responses, whose length isn't known in advance.
     """
     def process_response(self, request, response):
         now = datetime.datetime.utcnow()
         response['Date'] = now.strftime('%a, %d %b %Y %H:%M:%S GMT')
-        if not response.has_header('Content-Length'):
+        if not response.has_header('Content-Length') and not response.is_streaming():
             response['Content-Length'] = str(len(response.content))
 
         if response.has_header('ETag'):
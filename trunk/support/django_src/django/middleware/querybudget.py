@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.db.querybudget import QueryBudget, QueryBudgetExceeded
+import sys
+
+class QueryBudgetMiddleware:
+    """
+    Puts every view on a query budget: at most QUERY_BUDGET_MAX_QUERIES
+    queries (or the number given with the query_budget view decorator), and
+    no N+1 patterns longer than QUERY_BUDGET_N_PLUS_ONE. Violations raise
+    QueryBudgetExceeded if QUERY_BUDGET_RAISE is True, and are written to
+    stderr otherwise.
+
+    The templates of a streamed response run their queries while it's sent,
+    so its budget is checked when the response is closed, after it has been
+    sent.
+    """
+    def process_view(self, request, view_func, param_dict):
+        max_queries = getattr(view_func, 'query_budget', settings.QUERY_BUDGET_MAX_QUERIES)
+        name = "%s.%s" % (view_func.__module__, getattr(view_func, '__name__', view_func.__class__.__name__))
+        request._query_budget = QueryBudget(max_queries, settings.QUERY_BUDGET_N_PLUS_ONE, name)
+        request._query_budget.start()
+
+    def process_response(self, request, response):
+        budget = getattr(request, '_query_budget', None)
+        if budget is None:
+            return response
+        if response.is_streaming():
+            response.close_functions.append(lambda: self.check_budget(request, budget))
+        else:
+            self.check_budget(request, budget)
+        return response
+
+    def check_budget(self, request, budget):
+        budget.stop()
+        report = budget.report()
+        if report:
+            if settings.QUERY_BUDGET_RAISE:
+                raise QueryBudgetExceeded, report
+            sys.stderr.write("%s (%s)\n" % (report, request.path))
@@ -1,8 +1,124 @@
-import base64, md5, random, sys
+import base64, md5, random, sys, threading, time
 import cPickle as pickle
 from django.core import meta
 from django.utils.translation import gettext_lazy as _
 
+class Registry:
+    """
+    Process-wide cache of the content types and the current site, which
+    hardly ever change while the process runs. The request handlers load
+    them all at startup (see load()); anything missing is loaded from the
+    database the first time it's needed. After that, it's served from
+    memory. Saving or deleting a ContentType or Site resets the
+    registry; call reset() after changing them any other way, as the
+    management commands do.
+
+    Content types that another process adds are picked up by loading them
+    all again when a lookup misses, but at most every reload_interval
+    seconds, and for IDs only when the ID is higher than any known one --
+    the IDs looked up often come from URLs.
+
+    The objects are shared by all threads, so don't modify them.
+    """
+    reload_interval = 60
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        "Forgets everything, so that it's loaded again when next needed."
+        self._content_types = None # Maps ID to ContentType.
+        self._content_types_by_name = {} # Maps (package, python_module_name) to ContentType.
+        self._max_id = 0 # The highest content type ID.
+        self._loaded_at = 0 # When the content types were last (re)loaded.
+        self._sites = {} # Maps SITE_ID to Site.
+        self._model_modules = {} # Maps (package, python_module_name) to model module.
+
+    def load(self):
+        "Loads all content types and, if SITE_ID is set, the current site."
+        from django.conf import settings
+        self._load_content_types()
+        if hasattr(settings, 'SITE_ID'):
+            self.get_current_site()
+
+    def _load_content_types(self):
+        from django.models.core import contenttypes
+        # The query runs without the lock held, so that other threads aren't
+        # kept waiting for it.
+        by_id, by_name = {}, {}
+        for ct in contenttypes.get_list():
+            by_id[ct.id] = ct
+            by_name[(ct.package_id, ct.python_module_name)] = ct
+        self._lock.acquire()
+        try:
+            self._content_types_by_name = by_name
+            self._content_types = by_id
+            self._max_id = max(by_id.keys() + [0])
+            self._loaded_at = time.time()
+        finally:
+            self._lock.release()
+
+    def _get(self, mapping_name, key, could_be_new=True):
+        if self._content_types is None:
+            self._load_content_types()
+        try:
+            return getattr(self, mapping_name)[key]
+        except KeyError:
+            pass
+        if could_be_new:
+            # Only one thread reloads, and only once per reload_interval.
+            self._lock.acquire()
+            try:
+                reload = time.time() - self._loaded_at >= self.reload_interval
+                if reload:
+                    self._loaded_at = time.time()
+            finally:
+                self._lock.release()
+            if reload:
+                self._load_content_types()
+                try:
+                    return getattr(self, mapping_name)[key]
+                except KeyError:
+                    pass
+        from django.models.core import contenttypes
+        raise contenttypes.ContentTypeDoesNotExist, "ContentType does not exist for %r" % (key,)
+
+    def get_content_type(self, id):
+        "Returns the ContentType with the given ID, which may be a string."
+        try:
+            id = int(id)
+        except ValueError:
+            from django.models.core import contenttypes
+            raise contenttypes.ContentTypeDoesNotExist, "ContentType does not exist for %r" % id
+        if self._content_types is None:
+            self._load_content_types()
+        # IDs are handed out in order, so a missing ID that's lower than a
+        # known one won't turn up later.
+        return self._get('_content_types', id, id > self._max_id)
+
+    def get_content_type_by_name(self, package, python_module_name):
+        "Returns the ContentType for the given package label and module name."
+        return self._get('_content_types_by_name', (package, python_module_name))
+
+    def get_current_site(self):
+        "Returns the Site whose ID is SITE_ID."
+        from django.conf.settings import SITE_ID
+        site = self._sites.get(SITE_ID)
+        if site is None:
+            from django.models.core import sites
+            site = self._sites[SITE_ID] = sites.get_object(pk=SITE_ID)
+        return site
+
+    def get_model_module(self, package, python_module_name):
+        key = (package, python_module_name)
+        mod = self._model_modules.get(key)
+        if mod is None:
+            mod = self._model_modules[key] = __import__('django.models.%s.%s' % key, '', '', [''])
+        return mod
+
+registry = Registry()
+
 class Site(meta.Model):
     domain = meta.CharField(_('domain name'), maxlength=100)
     name = meta.CharField(_('display name'), maxlength=50)
@@ -11,6 +127,7 @@ class Site(meta.Model):
         verbose_name_plural = _('sites')
         db_table = 'sites'
         ordering = ('domain',)
+        module_constants = {'registry': registry}
         admin = meta.Admin(
             list_display = ('domain', 'name'),
             search_fields = ('domain', 'name'),
@@ -19,10 +136,15 @@ class Site(meta.Model):
     def __repr__(self):
         return self.domain
 
+    def _post_save(self):
+        registry.reset()
+
+    def _post_delete(self):
+        registry.reset()
+
     def _module_get_current():
         "Returns the current site, according to the SITE_ID constant."
-        from django.conf.settings import SITE_ID
-        return get_object(pk=SITE_ID)
+        return registry.get_current_site()
 
 class Package(meta.Model):
     label = meta.CharField(_('label'), maxlength=20, primary_key=True)
@@ -46,13 +168,20 @@ class ContentType(meta.Model):
         db_table = 'content_types'
         ordering = ('package', 'name')
         unique_together = (('package', 'python_module_name'),)
+        module_constants = {'registry': registry}
 
     def __repr__(self):
         return "%s | %s" % (self.package_id, self.name)
 
+    def _post_save(self):
+        registry.reset()
+
+    def _post_delete(self):
+        registry.reset()
+
     def get_model_module(self):
         "Returns the Python model module for accessing this type of content."
-        return __import__('django.models.%s.%s' % (self.package_id, self.python_module_name), '', '', [''])
+        return registry.get_model_module(self.package_id, self.python_module_name)
 
     def get_object_for_this_type(self, **kwargs):
         """
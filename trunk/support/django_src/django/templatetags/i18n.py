@@ -1,6 +1,6 @@
 "Default tags used by the template system, available to all templates."
 
-from django.core.template import Node, NodeList, Template, Context, resolve_variable, resolve_variable_with_filters, registered_filters
+from django.core.template import Node, NodeList, Template, Context, FilterExpression, resolve_variable
 from django.core.template import TemplateSyntaxError, register_tag, TokenParser
 from django.core.template import TOKEN_BLOCK, TOKEN_TEXT, TOKEN_VAR
 from django.utils import translation
@@ -61,10 +61,10 @@ class BlockTranslateNode(Node):
     def render(self, context):
         context.push()
         for var,val in self.extra_context.items():
-            context[var] = resolve_variable_with_filters(val, context)
+            context[var] = val.resolve(context)
         singular = self.render_token_list(self.singular)
         if self.plural and self.countervar and self.counter:
-            count = resolve_variable_with_filters(self.counter, context)
+            count = self.counter.resolve(context)
             context[self.countervar] = count
             plural = self.render_token_list(self.plural)
             result = translation.ngettext(singular, plural, count) % context
@@ -193,9 +193,9 @@ def do_block_translate(parser, token):
                     value = self.value()
                     if self.tag() != 'as':
                         raise TemplateSyntaxError, "variable bindings in 'blocktrans' must be 'with value as variable'"
-                    extra_context[self.tag()] = value
+                    extra_context[self.tag()] = FilterExpression(value)
                 elif tag == 'count':
-                    counter = self.value()
+                    counter = FilterExpression(self.value())
                     if self.tag() != 'as':
                         raise TemplateSyntaxError, "counter specification in 'blocktrans' must be 'count value as variable'"
                     countervar = self.tag()
@@ -3,6 +3,18 @@ def curry(*args, **kwargs):
         return args[0](*(args[1:]+moreargs), **dict(kwargs.items() + morekwargs.items()))
     return _curried
 
+def call_all(functions):
+    """
+    Calls each of the given functions in order, even if an earlier one raises
+    an exception. The first exception is re-raised once they've all been
+    called.
+    """
+    if functions:
+        try:
+            functions[0]()
+        finally:
+            call_all(functions[1:])
+
 def lazy(func, *resultclasses):
     """
     Turns any callable into a lazy evaluated callable. You need to give result
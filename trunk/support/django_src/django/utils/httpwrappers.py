@@ -194,6 +194,21 @@ class HttpResponse:
             return self.content.encode(encoding)
         return self.content
 
+    def is_streaming(self):
+        "Returns True if the content is still to be read from an iterator."
+        return False
+
+    def iter_content(self, encoding):
+        """
+        Returns an iterable over the content, as strings, which is what the
+        request handlers send.
+        """
+        return [self.get_content_as_string(encoding)]
+
+    def close(self):
+        "Called by the request handlers once the content has been sent."
+        pass
+
     # The remaining methods partially implement the file-like object interface.
     # See http://docs.python.org/lib/bltin-file-objects.html
     def write(self, content):
@@ -205,6 +220,74 @@ class HttpResponse:
     def tell(self):
         return len(self.content)
 
+class HttpResponseStream(HttpResponse):
+    """
+    An HttpResponse whose content is read from an iterator over strings, such
+    as the one Template.render_iter() returns, as the response is sent, so
+    the server can start sending the page before it has all been produced.
+
+    The content can only be read once. Reading the content attribute reads
+    all of it into memory, so the response isn't streamed; setting it
+    replaces the iterator.
+
+    close() is called by the request handlers once the response has been sent,
+    or sending it has stopped. It calls the functions in close_functions, which
+    start out with the iterator's close(), if it has one.
+    """
+    chunk_size = 8192 # Smaller pieces are sent together.
+
+    def __init__(self, iterator, mimetype=None):
+        HttpResponse.__init__(self, mimetype=mimetype)
+        del self.content
+        self.close_functions = []
+        if hasattr(iterator, 'close'):
+            self.close_functions.append(iterator.close)
+        self.iterator = iter(iterator)
+
+    def __getattr__(self, name):
+        if name == 'content':
+            from django.conf.settings import DEFAULT_CHARSET
+            self.content = ''.join(self.iter_content(DEFAULT_CHARSET))
+            del self.iterator
+            return self.content
+        raise AttributeError, name
+
+    def __getstate__(self):
+        # Iterators can't be pickled, as the cache middleware does.
+        self.content
+        state = self.__dict__.copy()
+        if state.has_key('iterator'):
+            del state['iterator']
+        state['close_functions'] = []
+        return state
+
+    def is_streaming(self):
+        return not self.__dict__.has_key('content')
+
+    def iter_content(self, encoding):
+        if not self.is_streaming():
+            return HttpResponse.iter_content(self, encoding)
+        iterator, self.iterator = self.iterator, iter(())
+        return self._iter_chunks(iterator, encoding)
+
+    def close(self):
+        from django.utils.functional import call_all
+        functions, self.close_functions = self.close_functions, []
+        call_all(functions)
+
+    def _iter_chunks(self, iterator, encoding):
+        chunk, size = [], 0
+        for bit in iterator:
+            if isinstance(bit, unicode):
+                bit = bit.encode(encoding)
+            chunk.append(bit)
+            size += len(bit)
+            if size >= self.chunk_size:
+                yield ''.join(chunk)
+                chunk, size = [], 0
+        if chunk:
+            yield ''.join(chunk)
+
 class HttpResponseRedirect(HttpResponse):
     def __init__(self, redirect_to):
         HttpResponse.__init__(self)
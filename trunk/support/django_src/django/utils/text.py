@@ -90,3 +90,41 @@ def compress_string(s):
     zfile.write(s)
     zfile.close()
     return zbuf.getvalue()
+
+class StreamingBuffer:
+    "A file-like object that hands back what's written to it, each time it's read."
+    def __init__(self):
+        self.vals = []
+
+    def write(self, val):
+        self.vals.append(val)
+
+    def read(self):
+        ret = ''.join(self.vals)
+        self.vals = []
+        return ret
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+def compress_sequence(sequence):
+    """
+    Like compress_string(), for an iterable of strings. Returns an iterator
+    that yields the compressed data as it's produced.
+    """
+    import gzip, zlib
+    buf = StreamingBuffer()
+    zfile = gzip.GzipFile(mode='wb', compresslevel=6, fileobj=buf)
+    for item in sequence:
+        zfile.write(item)
+        # This is what GzipFile.flush() does from Python 2.6 on; before that,
+        # it didn't flush the compressor, which held on to everything.
+        buf.write(zfile.compress.flush(zlib.Z_SYNC_FLUSH))
+        data = buf.read()
+        if data:
+            yield data
+    zfile.close()
+    yield buf.read()
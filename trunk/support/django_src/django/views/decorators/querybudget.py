@@ -0,0 +1,14 @@
+def query_budget(max_queries):
+    """
+    A view decorator that sets the maximum number of queries the view may
+    run, overriding QUERY_BUDGET_MAX_QUERIES. It's enforced by
+    django.middleware.querybudget.QueryBudgetMiddleware. Usage:
+
+        @query_budget(10)
+        def index(request):
+            ...
+    """
+    def decorator(func):
+        func.query_budget = max_queries
+        return func
+    return decorator
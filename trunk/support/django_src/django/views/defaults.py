@@ -1,13 +1,13 @@
 from django.core.exceptions import Http404, ObjectDoesNotExist
 from django.core.template import Context, loader
-from django.models.core import sites, contenttypes
+from django.models.core import sites, registry
 from django.utils import httpwrappers
 
 def shortcut(request, content_type_id, object_id):
     "Redirect to an object's page based on a content-type ID and an object ID."
     # Look up the object, making sure it's got a get_absolute_url() function.
     try:
-        content_type = contenttypes.get_object(pk=content_type_id)
+        content_type = registry.get_content_type(content_type_id)
         obj = content_type.get_object_for_this_type(pk=object_id)
     except ObjectDoesNotExist:
         raise Http404, "Content type %s object %s doesn't exist" % (content_type_id, object_id)
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+"""
+Measures the cost of changing one membership of a large many-to-many set, as
+the admin does when a change form is saved: the old way (delete every row of
+the join table for the object, then insert them all again) against the
+diff-based update used by set_FOO() methods, which only touches the rows that
+change.
+
+The join table lives in the database of the settings module, so point it at a
+scratch database:
+
+    DJANGO_SETTINGS_MODULE=myproject.settings python m2m_set.py [-m MEMBERS] [-r REPEAT]
+"""
+
+from django.core import db, meta
+from optparse import OptionParser
+import time
+
+def rewrite_all(this_id, id_list):
+    cursor = db.db.cursor()
+    cursor.execute("DELETE FROM bench_group_members WHERE group_id = %s", [this_id])
+    cursor.executemany("INSERT INTO bench_group_members (group_id, member_id) VALUES (%s, %s)",
+        [(this_id, i) for i in id_list])
+    db.db.commit()
+
+def diff_update(this_id, id_list):
+    meta._set_many_to_many_ids('bench_group_members', 'group_id', 'member_id', this_id, id_list)
+
+def timed(func, members, repeat):
+    # Alternately drop and restore one member, so that every call changes a row.
+    start = time.time()
+    for i in range(repeat):
+        func(1, members[i % 2:])
+    return (time.time() - start) / repeat
+
+def main():
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option('-m', '--members', type='int', default=5000, help='Members in the set (default 5000).')
+    parser.add_option('-r', '--repeat', type='int', default=20, help='Updates to time (default 20).')
+    options, args = parser.parse_args()
+    cursor = db.db.cursor()
+    cursor.execute("CREATE TABLE bench_group_members (id integer NOT NULL PRIMARY KEY, group_id integer NOT NULL, member_id integer NOT NULL, UNIQUE (group_id, member_id))")
+    try:
+        members = range(1, options.members + 1)
+        rewrite_all(1, members)
+        print "Changing one membership of a set of %d:" % options.members
+        for name, func in (('delete and reinsert all', rewrite_all), ('diff-based update', diff_update)):
+            db.reset_queries()
+            elapsed = timed(func, members, options.repeat)
+            print "    %-24s %8.2f ms per update" % (name, elapsed * 1000)
+    finally:
+        cursor = db.db.cursor()
+        cursor.execute("DROP TABLE bench_group_members")
+        db.db.commit()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""
+Measures SQLite reader and writer throughput under different
+DATABASE_SQLITE_PRAGMAS profiles.
+
+Several reader threads and writer threads share a scratch database file for a
+few seconds; every thread uses its own connection through the sqlite3
+backend's DatabaseWrapper, as the threads of a web server would. The output
+shows the reads and writes per second, and how many operations failed with
+"database is locked".
+
+Usage (any settings module will do; only its sqlite3 backend is used):
+
+    DJANGO_SETTINGS_MODULE=myproject.settings python sqlite_concurrency.py [-r READERS] [-w WRITERS] [-s SECONDS]
+"""
+
+from django.core.db.backends import sqlite3
+from optparse import OptionParser
+import os, tempfile, threading, time
+
+PROFILES = (
+    ('default', {}),
+    ('busy_timeout', {'busy_timeout': 5000}),
+    ('wal', {'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'busy_timeout': 5000}),
+    ('wal+cache', {'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'busy_timeout': 5000,
+        'cache_size': -20000, 'mmap_size': 268435456, 'temp_store': 'MEMORY'}),
+)
+
+class Counter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ops = 0
+        self.locked = 0
+
+    def add(self, ops, locked):
+        self.lock.acquire()
+        self.ops += ops
+        self.locked += locked
+        self.lock.release()
+
+def reader(db, stop, counter):
+    ops = locked = 0
+    while not stop.isSet():
+        try:
+            cursor = db.cursor()
+            cursor.execute("SELECT COUNT(*), MAX(value) FROM bench WHERE id > %s", [ops % 1000])
+            cursor.fetchone()
+            ops += 1
+        except sqlite3.Database.OperationalError:
+            locked += 1
+    db.close()
+    counter.add(ops, locked)
+
+def writer(db, stop, counter):
+    ops = locked = 0
+    while not stop.isSet():
+        try:
+            cursor = db.cursor()
+            cursor.execute("INSERT INTO bench (value) VALUES (%s)", ['x' * 50])
+            db.commit()
+            ops += 1
+        except sqlite3.Database.OperationalError:
+            db.rollback()
+            locked += 1
+    db.close()
+    counter.add(ops, locked)
+
+def run_profile(pragmas, readers, writers, seconds):
+    filename = tempfile.mktemp('.db')
+    db = sqlite3.DatabaseWrapper({'DATABASE_NAME': filename, 'DATABASE_SQLITE_PRAGMAS': pragmas})
+    try:
+        cursor = db.cursor()
+        cursor.execute("CREATE TABLE bench (id integer NOT NULL PRIMARY KEY, value varchar(100) NOT NULL)")
+        cursor.executemany("INSERT INTO bench (value) VALUES (%s)", [['x' * 50]] * 1000)
+        db.commit()
+        db.close()
+
+        stop = threading.Event()
+        reads, writes = Counter(), Counter()
+        threads = [threading.Thread(target=reader, args=(db, stop, reads)) for i in range(readers)]
+        threads += [threading.Thread(target=writer, args=(db, stop, writes)) for i in range(writers)]
+        for t in threads:
+            t.start()
+        time.sleep(seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+        return reads, writes
+    finally:
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(filename + suffix):
+                os.remove(filename + suffix)
+
+def main():
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option('-r', '--readers', type='int', default=4, help='Number of reader threads (default 4).')
+    parser.add_option('-w', '--writers', type='int', default=2, help='Number of writer threads (default 2).')
+    parser.add_option('-s', '--seconds', type='float', default=5, help='Duration of each run (default 5).')
+    options, args = parser.parse_args()
+    print "%d readers, %d writers, %s seconds per profile" % (options.readers, options.writers, options.seconds)
+    print "%-14s %12s %12s %12s %12s" % ('profile', 'reads/s', 'writes/s', 'read locks', 'write locks')
+    for name, pragmas in PROFILES:
+        reads, writes = run_profile(pragmas, options.readers, options.writers, options.seconds)
+        print "%-14s %12.1f %12.1f %12d %12d" % (name, reads.ops / options.seconds,
+            writes.ops / options.seconds, reads.locked, writes.locked)
+
+if __name__ == "__main__":
+    main()
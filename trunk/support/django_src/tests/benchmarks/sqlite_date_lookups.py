@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""
+Compares the SQL the sqlite3 backend generates for date lookups (__year,
+__month, __day and get_FOO_list()) with the SQL it used to generate, which
+called Python functions (django_extract and django_date_trunc) once per row.
+
+A scratch database gets a table shaped like DemoTime -- an indexed datetime
+column -- filled with a row per minute. The output shows the time each query
+takes both ways, and the query plan of the current one.
+
+Usage (any settings module will do; only its sqlite3 backend is used):
+
+    DJANGO_SETTINGS_MODULE=myproject.settings python sqlite_date_lookups.py [-n ROWS] [-r REPEAT]
+"""
+
+from django.core.db.backends import sqlite3
+from django.core.db import typecasts
+from optparse import OptionParser
+import datetime, os, tempfile, time
+
+def old_extract(lookup_type, dt):
+    try:
+        dt = typecasts.typecast_timestamp(dt)
+    except (ValueError, TypeError):
+        return None
+    return str(getattr(dt, lookup_type))
+
+def old_date_trunc(lookup_type, dt):
+    try:
+        dt = typecasts.typecast_timestamp(dt)
+    except (ValueError, TypeError):
+        return None
+    if lookup_type == 'year':
+        return "%i-01-01 00:00:00" % dt.year
+    elif lookup_type == 'month':
+        return "%i-%02i-01 00:00:00" % (dt.year, dt.month)
+    elif lookup_type == 'day':
+        return "%i-%02i-%02i 00:00:00" % (dt.year, dt.month, dt.day)
+
+# (description, old SQL, old params, new SQL, new params)
+QUERIES = (
+    ('time__year=2006',
+        'SELECT COUNT(*) FROM demotime WHERE time BETWEEN %s AND %s', ['2006-01-01', '2006-12-31'],
+        'SELECT COUNT(*) FROM demotime WHERE time >= %s AND time < %s', ['2006-01-01', '2007-01-01']),
+    ('time__year=2006, time__month=3',
+        'SELECT COUNT(*) FROM demotime WHERE time BETWEEN %s AND %s AND django_extract("month", time) = %s', ['2006-01-01', '2006-12-31', '3'],
+        'SELECT COUNT(*) FROM demotime WHERE time >= %s AND time < %s AND ' + sqlite3.get_date_extract_sql('month', 'time') + ' = %s', ['2006-01-01', '2007-01-01', '3']),
+    ('time__day=15',
+        'SELECT COUNT(*) FROM demotime WHERE django_extract("day", time) = %s', ['15'],
+        'SELECT COUNT(*) FROM demotime WHERE ' + sqlite3.get_date_extract_sql('day', 'time') + ' = %s', ['15']),
+    ("get_time_list('month')",
+        'SELECT django_date_trunc("month", time) FROM demotime GROUP BY 1 ORDER BY 1', [],
+        'SELECT ' + sqlite3.get_date_trunc_sql('month', 'time') + ' FROM demotime GROUP BY 1 ORDER BY 1', []),
+)
+
+def timed(cursor, sql, params, repeat):
+    best = None
+    for i in range(repeat):
+        start = time.time()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def main():
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option('-n', '--rows', type='int', default=1000000, help='Number of rows (default 1000000).')
+    parser.add_option('-r', '--repeat', type='int', default=3, help='Runs of each query; the best is shown (default 3).')
+    options, args = parser.parse_args()
+    filename = tempfile.mktemp('.db')
+    db = sqlite3.DatabaseWrapper({'DATABASE_NAME': filename})
+    try:
+        cursor = db.cursor()
+        db.connection.create_function("django_extract", 2, old_extract)
+        db.connection.create_function("django_date_trunc", 2, old_date_trunc)
+        cursor.execute("CREATE TABLE demotime (id integer NOT NULL PRIMARY KEY, time datetime NOT NULL)")
+        start, minute = datetime.datetime(2005, 1, 1), datetime.timedelta(minutes=1)
+        rows = [[str(start + minute * i)] for i in xrange(options.rows)]
+        cursor.executemany("INSERT INTO demotime (time) VALUES (%s)", rows)
+        cursor.execute("CREATE INDEX demotime_time ON demotime (time)")
+        db.commit()
+        print "%d rows, from %s to %s" % (options.rows, start, start + minute * (options.rows - 1))
+        print
+        for description, old_sql, old_params, new_sql, new_params in QUERIES:
+            old_time = timed(cursor, old_sql, old_params, options.repeat)
+            new_time = timed(cursor, new_sql, new_params, options.repeat)
+            cursor.execute("EXPLAIN QUERY PLAN " + new_sql, new_params)
+            plan = '; '.join([str(row[-1]) for row in cursor.fetchall()])
+            print description
+            print "    Python functions: %8.3fs" % old_time
+            print "    native SQL:       %8.3fs (%.1fx)" % (new_time, old_time / max(new_time, 1e-6))
+            print "    plan: %s" % plan
+    finally:
+        db.close()
+        if os.path.exists(filename):
+            os.remove(filename)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""
+Measures what the compiled-template cache in loader.get_template() saves: the
+time to render a page-sized template alone, against the time to read, parse
+and render it, as every request did before the cache, and against fetching it
+from the cache (with and without checking the file for changes) and rendering
+it.
+
+The template is written to a scratch directory, so any settings module will
+do:
+
+    DJANGO_SETTINGS_MODULE=myproject.settings python template_cache.py [-n ROWS] [-r REPEAT]
+"""
+
+from django.conf import settings
+from django.core.template import Context, Template, loader
+from optparse import OptionParser
+import os, shutil, tempfile, time
+
+TEMPLATE = '''<html><head><title>{{ title|escape }}</title></head>
+<body>
+<h1>{{ title|escape }}</h1>
+{% if user %}<p>Logged in as {{ user|escape }}.</p>{% else %}<p><a href="/login/">Log in</a></p>{% endif %}
+<table>
+{% for course in courses %}
+<tr class="{% cycle odd,even %}">
+    <td>{{ forloop.counter }}</td>
+    <td><a href="/courses/{{ course.id }}/">{{ course.name|escape }}</a></td>
+    <td>{{ course.description|truncatewords:"8"|escape }}</td>
+    <td>{% ifequal course.slots 0 %}full{% else %}{{ course.slots }} free{% endifequal %}</td>
+</tr>
+{% endfor %}
+</table>
+<p>{{ courses|length }} courses.</p>
+</body></html>
+'''
+
+def timed(func, repeat):
+    start = time.time()
+    for i in range(repeat):
+        func()
+    return (time.time() - start) / repeat
+
+def main():
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option('-n', '--rows', type='int', default=20, help='Rows in the table (default 20).')
+    parser.add_option('-r', '--repeat', type='int', default=500, help='Renders to time (default 500).')
+    options, args = parser.parse_args()
+    dirname = tempfile.mkdtemp()
+    dirs = [dirname]
+    try:
+        f = open(os.path.join(dirname, 'courses') + settings.TEMPLATE_FILE_EXTENSION, 'w')
+        f.write(TEMPLATE)
+        f.close()
+        context = Context({'title': 'Courses', 'user': 'ann', 'courses': [
+            {'id': i, 'name': 'Course %s' % i, 'description': 'An introduction to topic number %s, with exercises' % i, 'slots': i % 4}
+            for i in range(options.rows)]})
+        t = loader.get_template('courses', dirs)
+
+        def load_parse_render():
+            Template(loader.load_template_source('courses', dirs)).render(context)
+        def cached_render(check_mtime):
+            settings.TEMPLATE_CACHE_CHECK_MTIME = check_mtime
+            def inner():
+                loader.get_template('courses', dirs).render(context)
+            return inner
+
+        print "A template with a %d-row table:" % options.rows
+        for name, func in (('load, parse and render', load_parse_render),
+                ('cached, checking mtime', cached_render(True)),
+                ('cached', cached_render(False)),
+                ('render only', lambda: t.render(context))):
+            print "    %-24s %8.3f ms" % (name, timed(func, options.repeat) * 1000)
+    finally:
+        shutil.rmtree(dirname)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""
+Measures rendering a 1,000-row table in a page that extends a base template,
+interpreted against compiled to Python code by django.core.template.compiler.
+
+Any settings module will do:
+
+    DJANGO_SETTINGS_MODULE=myproject.settings python template_compiler.py [-n ROWS] [-r REPEAT]
+"""
+
+from django.conf import settings
+from django.core import template
+from django.core.template import loader
+from optparse import OptionParser
+import time
+
+TEMPLATES = {
+    'base': '''<html><head><title>{% block title %}Students{% endblock %}</title></head>
+<body>
+{% if user %}<p>Logged in as {{ user|escape }}</p>{% endif %}
+{% block content %}{% endblock %}
+</body></html>''',
+    'table': '''{% extends "base" %}
+{% block content %}<table>
+{% for row in rows %}
+<tr class="{% cycle odd,even %}">
+    <td>{{ forloop.counter }}</td>
+    <td>{{ row.name|lower|escape }}</td>
+    <td>{{ row.email|default:"-"|escape }}</td>
+    <td>{{ row.bio|truncatewords:"5" }}</td>
+    <td>{% ifequal row.status "open" %}open{% else %}closed{% endifequal %}</td>
+    <td>{% if row.email %}yes{% else %}no{% endif %}</td>
+</tr>
+{% endfor %}
+</table>{% endblock %}''',
+}
+
+def benchmark_loader(template_name, template_dirs=None):
+    try:
+        return TEMPLATES[template_name]
+    except KeyError:
+        raise template.TemplateDoesNotExist, template_name
+
+def timed(t, context, repeat):
+    start = time.time()
+    for i in range(repeat):
+        t.render(context)
+    return (time.time() - start) / repeat
+
+def main():
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option('-n', '--rows', type='int', default=1000, help='Rows in the table (default 1000).')
+    parser.add_option('-r', '--repeat', type='int', default=10, help='Renders to time (default 10).')
+    options, args = parser.parse_args()
+    rows = [{'name': 'Student %s' % i, 'email': i % 3 and 'student%s@example.com' % i or '',
+        'bio': 'Studies topic %s and likes long walks on the beach' % i,
+        'status': i % 2 and 'open' or 'closed'} for i in range(options.rows)]
+    context = template.Context({'rows': rows, 'user': 'admin'})
+
+    old_settings = settings.TEMPLATE_COMPILE, settings.TEMPLATE_CACHE_CHECK_MTIME
+    old_loaders = loader.template_source_loaders
+    loader.template_source_loaders = [benchmark_loader]
+    settings.TEMPLATE_CACHE_CHECK_MTIME = False
+    try:
+        print "Rendering a %d-row table:" % options.rows
+        for title, compile in (('interpreted', False), ('compiled', True)):
+            settings.TEMPLATE_COMPILE = compile
+            loader.template_cache.clear()
+            t = loader.get_template('table')
+            print "    %-12s %8.2f ms" % (title, timed(t, context, options.repeat) * 1000)
+    finally:
+        settings.TEMPLATE_COMPILE, settings.TEMPLATE_CACHE_CHECK_MTIME = old_settings
+        loader.template_source_loaders = old_loaders
+        loader.template_cache.clear()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+# Unit tests for django.core.db.advisor
+
+>>> from django.core.db import advisor
+
+>>> advisor.read_log([
+...     'SELECT "a"."id" FROM "a" WHERE "a"."name" = \\'x\\'',
+...     '[2006-01-01 10:00:00] 1.204 SELECT "a"."id" FROM "a" WHERE "a"."name" = \\'y\\'',
+...     'UPDATE "a" SET "name" = \\'z\\'',
+...     '',
+... ])
+[('SELECT "a"."id" FROM "a" WHERE "a"."name" = \\'x\\'', None, 2)]
+
+# The slow query log gives the parameters after the SQL.
+>>> advisor.read_log([
+...     '[2006-01-01 10:00:00] 1.204 SELECT "a"."id" FROM "a" WHERE "a"."name" = %s -- params: (u\\'x -- params: \\',)',
+...     '[2006-01-01 10:00:01] 0.503 SELECT "a"."id" FROM "a" WHERE "a"."d" = %s -- params: (datetime.date(2006, 1, 1),)',
+...     '[2006-01-01 10:00:02] 0.503 SELECT "a"."id" FROM "a" WHERE "a"."d" = %s -- params: (open("x"),)',
+... ])
+[('SELECT "a"."id" FROM "a" WHERE "a"."name" = %s', (u'x -- params: ',), 1), ('SELECT "a"."id" FROM "a" WHERE "a"."d" = %s', (datetime.date(2006, 1, 1),), 2)]
+
+>>> aliases = advisor.get_table_aliases('SELECT "t1"."id" FROM "polls","choices" "t1" LEFT OUTER JOIN "votes" AS "v" ON "v"."id" = "t1"."id" WHERE 1')
+>>> items = aliases.items(); items.sort(); items
+[('choices', 'choices'), ('polls', 'polls'), ('t1', 'choices'), ('v', 'votes'), ('votes', 'votes')]
+
+# Columns compared with "=" come first.
+>>> advisor.get_filter_columns('SELECT * FROM "polls" "p" WHERE "p"."pub_date" > 5 AND "p"."slug" = 3 AND "other"."x" = 1 ORDER BY "p"."id"', {'p': 'polls'})
+{'polls': ['slug', 'pub_date']}
+"""
+
+from django.conf import settings
+from django.core import db, management
+import os, tempfile
+
+def run_tests(verbosity=0):
+    if settings.DATABASE_ENGINE != 'sqlite3':
+        return
+    log_name = tempfile.mktemp()
+    old_slow_settings = settings.DATABASE_SLOW_QUERY_TIME, settings.DATABASE_SLOW_QUERY_LOG
+    cursor = db.db.cursor()
+    try:
+        cursor.execute('CREATE TABLE "advisor_polls" ("id" integer NOT NULL PRIMARY KEY, "slug" varchar(50) NOT NULL, "votes" integer NOT NULL)')
+        cursor.executemany('INSERT INTO "advisor_polls" ("slug", "votes") VALUES (%s, %s)', [['poll%s' % i, i] for i in range(100)])
+        cursor.execute('CREATE TABLE "advisor_choices" ("id" integer NOT NULL PRIMARY KEY, "poll_id" integer NOT NULL)')
+        cursor.executemany('INSERT INTO "advisor_choices" ("poll_id") VALUES (%s)', [[i % 10] for i in range(10)])
+        db.db.commit()
+
+        # The queries are logged by DATABASE_SLOW_QUERY_LOG, with their
+        # parameters.
+        settings.DATABASE_SLOW_QUERY_TIME, settings.DATABASE_SLOW_QUERY_LOG = 0, log_name
+        db.reset_queries()
+        try:
+            for i in range(3):
+                cursor.execute('SELECT "advisor_polls"."id" FROM "advisor_polls" WHERE "advisor_polls"."slug" = %s', ["poll'%s" % i])
+            cursor.execute('SELECT "advisor_choices"."id" FROM "advisor_choices" WHERE "advisor_choices"."poll_id" = %s', [1])
+            # Primary key lookups use an index already.
+            cursor.execute('SELECT "advisor_polls"."id" FROM "advisor_polls" WHERE "advisor_polls"."id" = %s', [1])
+        finally:
+            settings.DATABASE_SLOW_QUERY_TIME, settings.DATABASE_SLOW_QUERY_LOG = old_slow_settings
+            db.reset_queries()
+        # Statements can also be given one per line, without parameters.
+        f = open(log_name, 'a')
+        f.write('SELECT "advisor_choices"."id" FROM "advisor_choices" WHERE "advisor_choices"."poll_id" = 3\n')
+        f.write('SELECT broken FROM\n')
+        f.close()
+
+        output = list(management.adviseindexes(log_name))
+        indexes = [line for line in output if line.startswith('CREATE INDEX')]
+        assert indexes == [
+            'CREATE INDEX advisor_polls_slug ON "advisor_polls" ("slug");',
+            'CREATE INDEX advisor_choices_poll_id ON "advisor_choices" ("poll_id");',
+        ], output
+        assert output[0] == '-- 4 distinct SELECT statements read from %s.' % log_name, output
+        assert "-- Score 300: 3 statement(s), each scanning about 100 rows of advisor_polls. For example:" in output, output
+        assert "-- with parameters (\"poll'0\",)" in output, output
+        assert "-- Score 20: 2 statement(s), each scanning about 10 rows of advisor_choices. For example:" in output, output
+        assert "-- 1 of them couldn't be explained by the database; the first one was:" in output, output
+    finally:
+        cursor = db.db.cursor()
+        cursor.execute('DROP TABLE "advisor_polls"')
+        cursor.execute('DROP TABLE "advisor_choices"')
+        db.db.commit()
+        if os.path.exists(log_name):
+            os.remove(log_name)
+
+if __name__ == "__main__":
+    run_tests(1)
@@ -0,0 +1,68 @@
+# Unit tests for the {% cache %} template tag.
+# Uses whatever cache backend is set in the test settings file.
+
+from django.core.cache import cache
+from django.core.template import Context, Template, TemplateSyntaxError
+from django.core.template.defaulttags import fragment_cache_stats
+from django.utils.translation import activate, deactivate
+import threading
+
+def run_tests(verbosity=0):
+    t = Template('{% cache 60 cache_tag_test user.name|lower %}{{ user.name }} {{ counter }}{% endcache %}/{{ counter }}')
+    render = lambda name, counter: t.render(Context({'user': {'name': name}, 'counter': counter}))
+    key = t.nodelist[0].get_cache_key(Context({'user': {'name': 'Ann'}}))
+    cache.delete(key)
+    fragment_cache_stats.reset()
+
+    # The fragment is rendered once, and then comes from the cache.
+    assert render('Ann', 1) == 'Ann 1/1'
+    assert render('Ann', 2) == 'Ann 1/2'
+    assert cache.get(key) == 'Ann 1'
+    assert (fragment_cache_stats.hits, fragment_cache_stats.misses) == (1, 1)
+
+    # It varies on the given variables, after filtering, and on the language.
+    assert render('ANN', 3) == 'Ann 1/3'
+    assert render('Bob', 4) == 'Bob 4/4'
+    activate('de')
+    try:
+        assert render('Ann', 5) == 'Ann 5/5'
+    finally:
+        deactivate()
+    assert (fragment_cache_stats.hits, fragment_cache_stats.misses) == (2, 3)
+
+    # The counts are shared by all threads, and none of their updates is lost.
+    fragment_cache_stats.reset()
+    def count():
+        for i in range(1000):
+            fragment_cache_stats.record(i % 2)
+    threads = [threading.Thread(target=count) for i in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert (fragment_cache_stats.hits, fragment_cache_stats.misses) == (2500, 2500)
+
+    # Values that run together differently make different keys.
+    t = Template('{% cache 60 cache_tag_test3 a b %}{{ a }}/{{ b }}{% endcache %}')
+    assert t.nodelist[0].get_cache_key(Context({'a': 'a:b', 'b': 'c'})) != \
+        t.nodelist[0].get_cache_key(Context({'a': 'a', 'b': 'b:c'}))
+    assert t.nodelist[0].get_cache_key(Context({'a': u'caf\xe9', 'b': 1})) == \
+        t.nodelist[0].get_cache_key(Context({'a': u'caf\xe9', 'b': '1'}))
+
+    # Without variables, there's one copy per language.
+    t = Template('{% cache 60 cache_tag_test2 %}{{ counter }}{% endcache %}')
+    cache.delete(t.nodelist[0].get_cache_key(Context()))
+    assert t.render(Context({'counter': 1})) == '1'
+    assert t.render(Context({'counter': 2})) == '1'
+
+    for source in ('{% cache %}{% endcache %}', '{% cache 60 %}{% endcache %}',
+            '{% cache foo bar %}{% endcache %}', '{% cache 60 bar %}'):
+        try:
+            Template(source)
+        except TemplateSyntaxError:
+            pass
+        else:
+            raise AssertionError, "%r should have raised TemplateSyntaxError" % source
+
+if __name__ == "__main__":
+    run_tests(1)
@@ -0,0 +1,100 @@
+# Unit tests for persistent, per-thread database connections.
+# The checks run in separate threads, so they don't touch the connection
+# that holds the test database of the main thread.
+
+from django.conf import settings
+from django.core.db import db
+import threading
+
+def check_connections():
+    old_max_age = settings.DATABASE_CONN_MAX_AGE
+    try:
+        # Persistent connections survive the end of a request.
+        settings.DATABASE_CONN_MAX_AGE = None
+        db.cursor()
+        connection = db.connection
+        assert connection is not None
+        db.end_request()
+        assert db.connection is connection
+        db.cursor()
+        assert db.connection is connection
+
+        # A connection that has gone away is replaced on the next request.
+        db.end_request()
+        db.connection.close()
+        db.cursor().execute("SELECT 1")
+        assert db.connection is not connection
+
+        # Connections older than DATABASE_CONN_MAX_AGE are closed.
+        settings.DATABASE_CONN_MAX_AGE = 0
+        db.end_request()
+        assert db.connection is None
+    finally:
+        settings.DATABASE_CONN_MAX_AGE = old_max_age
+        db.close()
+
+def run_in_thread(func):
+    errors = []
+    def wrapper():
+        try:
+            func()
+        except Exception, e:
+            errors.append(e)
+    t = threading.Thread(target=wrapper)
+    t.start()
+    t.join()
+    if errors:
+        raise errors[0]
+
+def check_per_thread():
+    main_connection = db.connection
+    def other_thread():
+        assert db.connection is None
+        db.cursor()
+        assert db.connection is not None
+        assert db.connection is not main_connection
+        db.close()
+    run_in_thread(other_thread)
+    assert db.connection is main_connection
+
+def check_handler_order():
+    # The request handler gives the connection back after response middleware
+    # has run, as that may use the database, too.
+    from django.core import db as db_module
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.utils.httpwrappers import HttpResponse, HttpResponseStream
+    events = []
+    def stream():
+        events.append('content')
+        yield 'x'
+    class Handler(WSGIHandler):
+        def get_response(self, path, request):
+            events.append('view')
+            return self.response
+    handler = Handler()
+    handler._request_middleware = []
+    handler._response_middleware = [lambda request, response: events.append('middleware') or response]
+    old_end_request = db_module.end_request
+    db_module.end_request = lambda: events.append('end_request')
+    try:
+        handler.response = HttpResponse('x')
+        handler({'PATH_INFO': '/', 'REQUEST_METHOD': 'GET'}, lambda status, headers: None)
+        assert events == ['view', 'middleware', 'end_request'], events
+        del events[:]
+        handler.response = HttpResponseStream(stream())
+        output = handler({'PATH_INFO': '/', 'REQUEST_METHOD': 'GET'}, lambda status, headers: None)
+        list(output)
+        output.close()
+        assert events == ['view', 'middleware', 'content', 'end_request'], events
+    finally:
+        db_module.end_request = old_end_request
+
+def run_tests(verbosity=0):
+    # The threads must not be started while this module is being imported,
+    # or they'd deadlock on the import lock.
+    run_in_thread(check_connections)
+    check_per_thread()
+    check_handler_order()
+
+if __name__ == "__main__":
+    run_tests(1)
@@ -0,0 +1,82 @@
+"""
+# Unit tests for django.core.db.instrumentation
+
+>>> from django.core.db.instrumentation import normalize, QueryRecord
+
+>>> normalize('SELECT "id" FROM "t" WHERE "id" = %s AND "name" = %s')
+'SELECT "id" FROM "t" WHERE "id" = ? AND "name" = ?'
+>>> normalize("SELECT * FROM t2 WHERE a IN (1, 2,3) AND b = 'it''s'  LIMIT 10")
+'SELECT * FROM t2 WHERE a IN (...) AND b = ? LIMIT ?'
+>>> normalize('SELECT * FROM "t" WHERE "id" IN (%s,%s,%s)')
+'SELECT * FROM "t" WHERE "id" IN (...)'
+
+# QueryRecords look like the dictionaries db.queries used to contain.
+>>> r = QueryRecord('SELECT %s, %s', [1, 'a'], 0.01234)
+>>> r['sql'], r['time']
+('SELECT 1, a', '0.012')
+>>> r.get('sql'), r.get('nonexistent')
+('SELECT 1, a', None)
+>>> QueryRecord('INSERT INTO t VALUES (%s)', [[1], [2]], 0, True)['sql']
+'MANY: INSERT INTO t VALUES (%s) ([1], [2])'
+"""
+
+from django.conf import settings
+from django.core import db
+from django.core.db import instrumentation
+from django.core.db.instrumentation import stats, listeners
+import os, tempfile
+
+def run_tests(verbosity=0):
+    old_slow_time, old_slow_log = settings.DATABASE_SLOW_QUERY_TIME, settings.DATABASE_SLOW_QUERY_LOG
+    log_name = tempfile.mktemp()
+    heard = []
+    listener = lambda sql, params, time: heard.append(sql)
+    listeners.append(listener)
+    try:
+        settings.DATABASE_SLOW_QUERY_TIME = 0
+        settings.DATABASE_SLOW_QUERY_LOG = log_name
+        db.reset_queries()
+        cursor = db.db.cursor()
+        for i in (1, 2, 2, 3):
+            cursor.execute("SELECT %s", [i])
+        cursor.execute("SELECT 1")
+
+        assert stats.count == 5
+        assert stats.total_time >= stats.max_time > 0
+        assert stats.duplicates() == [("SELECT %s", (2,), 2)]
+        assert stats.fingerprints() == {'SELECT ?': 5}
+        summary = stats.summary()
+        assert summary['count'] == 5 and summary['distinct'] == 2 and summary['duplicates'] == 1
+        assert len(stats.slow_queries) == 5
+        assert stats.slow_queries[0]['sql'] == 'SELECT 1'
+        assert len(open(log_name).readlines()) == 5
+        assert len(heard) == 5
+
+        settings.DATABASE_SLOW_QUERY_TIME = None
+        db.reset_queries()
+        assert stats.count == 0 and stats.duplicates() == []
+        cursor.execute("SELECT 1")
+        assert stats.count == 1 and stats.slow_queries == []
+
+        # Only so many distinct statements and executions are kept.
+        old_max_tracked, instrumentation.MAX_TRACKED = instrumentation.MAX_TRACKED, 2
+        try:
+            for i in range(4):
+                cursor.execute("SELECT %s" + " " * i, [i])
+            assert stats.count == 5
+            assert len(stats.statements) == 2 and len(stats.executions) == 2
+            cursor.execute("SELECT 1")
+            assert stats.statements["SELECT 1"] == 2
+        finally:
+            instrumentation.MAX_TRACKED = old_max_tracked
+    finally:
+        listeners.remove(listener)
+        settings.DATABASE_SLOW_QUERY_TIME, settings.DATABASE_SLOW_QUERY_LOG = old_slow_time, old_slow_log
+        db.reset_queries()
+        if os.path.exists(log_name):
+            os.remove(log_name)
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
+    run_tests(1)
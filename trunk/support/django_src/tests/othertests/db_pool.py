@@ -0,0 +1,138 @@
+# Unit tests for django.core.db.pool, using a fake DB-API connection.
+
+from django.core.db.pool import ConnectionPool, PoolTimeout
+from django.core.db import base
+import threading, time
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+    def execute(self, sql, params=()):
+        if self.connection.broken:
+            raise Exception, "Connection lost"
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.rollbacks = 0
+        self.broken = False
+    def cursor(self):
+        return FakeCursor(self)
+    def rollback(self):
+        if self.broken:
+            raise Exception, "Connection lost"
+        self.rollbacks += 1
+    def close(self):
+        self.closed = True
+
+def make_pool(**kwargs):
+    return ConnectionPool(FakeConnection, **kwargs)
+
+# Connections are reused, and rolled back when they're put back.
+pool = make_pool(max_size=2)
+c1 = pool.get()
+pool.put(c1)
+assert c1.rollbacks == 1
+assert pool.get() is c1
+c2 = pool.get()
+assert c2 is not c1
+stats = pool.stats()
+assert stats['size'] == 2 and stats['idle'] == 0
+assert stats['checkouts'] == 3 and stats['connects'] == 2 and stats['waits'] == 0
+
+# A full pool times out.
+pool.timeout = 0.1
+try:
+    pool.get()
+except PoolTimeout:
+    pass
+else:
+    raise AssertionError, "PoolTimeout wasn't raised."
+
+# Connections that can't be reset are discarded, freeing their slot.
+c2.broken = True
+pool.put(c2)
+assert c2.closed
+assert pool.stats()['size'] == 1
+c3 = pool.get()
+assert c3 is not c2
+pool.put(c1)
+pool.put(c3)
+
+# Idle connections are evicted, but not below min_size.
+pool = make_pool(min_size=1, max_size=3, max_idle=0)
+conns = [pool.get() for i in range(3)]
+for c in conns:
+    pool.put(c)
+stats = pool.stats()
+assert stats['size'] == 1 and stats['evictions'] == 2
+assert len([c for c in conns if c.closed]) == 2
+
+# The first checkout opens min_size connections, and they're kept open.
+pool = make_pool(min_size=2, max_size=3, max_idle=0)
+c1 = pool.get()
+stats = pool.stats()
+assert stats['size'] == 2 and stats['idle'] == 1 and stats['connects'] == 2
+pool.put(c1)
+assert pool.stats()['size'] == 2 and not c1.closed
+pool.close_all()
+pool.get()
+assert pool.stats()['size'] == 2
+
+# Unusable idle connections are replaced on checkout.
+pool = make_pool(is_usable=lambda c: not c.broken)
+c1 = pool.get()
+pool.put(c1)
+c1.broken = True
+c2 = pool.get()
+assert c2 is not c1 and c1.closed
+assert pool.stats()['size'] == 1
+
+# close_all() closes the idle connections.
+pool.put(c2)
+pool.close_all()
+assert c2.closed and pool.stats()['size'] == 0
+
+class PooledWrapper(base.BaseDatabaseWrapper):
+    supports_pooling = True
+    def _connect(self):
+        return FakeConnection()
+
+def run_tests(verbosity=0):
+    from django.conf import settings
+
+    # A checkout waits until another thread puts a connection back.
+    pool = make_pool(max_size=1, timeout=5)
+    c1 = pool.get()
+    got = []
+    t = threading.Thread(target=lambda: got.append(pool.get()))
+    t.start()
+    time.sleep(0.1)
+    pool.put(c1)
+    t.join()
+    assert got == [c1]
+    stats = pool.stats()
+    assert stats['waits'] == 1 and stats['wait_time'] > 0
+
+    # DatabaseWrappers that support pooling draw from a single shared pool.
+    old_max_size = settings.DATABASE_POOL_MAX_SIZE
+    settings.DATABASE_POOL_MAX_SIZE = 2
+    try:
+        db = PooledWrapper()
+        db._open_connection()
+        connection = db.connection
+        assert db.connection_pooled
+        db.end_request()
+        assert db.connection is None
+        assert db.get_pool().stats()['idle'] == 1
+        db._open_connection()
+        assert db.connection is connection
+        db.close()
+        assert connection.closed
+        assert db.get_pool().stats()['size'] == 0
+    finally:
+        settings.DATABASE_POOL_MAX_SIZE = old_max_size
+        del base.BaseDatabaseWrapper._pools[id(db)]
+
+if __name__ == "__main__":
+    run_tests(1)
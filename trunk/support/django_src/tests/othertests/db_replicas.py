@@ -0,0 +1,60 @@
+# Unit tests for routing reads to DATABASE_REPLICAS, using two SQLite files
+# as the primary database and the replica.
+
+from django.conf import settings
+from django.core import db, management
+from django.models import core
+from django.models.core import sites
+import os, tempfile
+
+def create_database(overrides):
+    wrapper = db.dbmod.DatabaseWrapper(overrides)
+    cursor = wrapper.cursor()
+    for sql in management.get_sql_create(core):
+        cursor.execute(sql)
+    wrapper.commit()
+    return wrapper
+
+def run_tests(verbosity=0):
+    if settings.DATABASE_ENGINE != 'sqlite3':
+        return
+    primary_name, replica_name = tempfile.mktemp(), tempfile.mktemp()
+    old_db, old_replicas = db.db, db.replicas
+    try:
+        db.db = create_database({'DATABASE_NAME': primary_name})
+        replica = create_database({'DATABASE_NAME': replica_name})
+        db.replicas = [replica]
+        replica.cursor().execute("INSERT INTO sites (domain, name) VALUES ('replica.example.com', 'Replica')")
+        replica.commit()
+        db.end_request()
+
+        # Reads go to the replica.
+        assert db.get_read_db() is replica
+        assert sites.get_count() == 1
+        assert [s.domain for s in sites.get_list()] == ['replica.example.com']
+        assert sites.get_values(fields=['name']) == [{'name': 'Replica'}]
+
+        # Reading from the primary database doesn't change that.
+        db.db.cursor().execute("SELECT COUNT(*) FROM sites")
+        assert db.get_read_db() is replica
+
+        # After a write, the rest of the request reads from the primary.
+        s = sites.Site(domain='primary.example.com', name='Primary')
+        s.save()
+        assert db.get_read_db() is db.db
+        assert [s.domain for s in sites.get_list()] == ['primary.example.com']
+
+        # The next request reads from the replica again.
+        db.end_request()
+        assert [s.domain for s in sites.get_list()] == ['replica.example.com']
+    finally:
+        for wrapper in [db.db] + db.replicas:
+            if wrapper is not old_db:
+                wrapper.close()
+        db.db, db.replicas = old_db, old_replicas
+        for name in (primary_name, replica_name):
+            if os.path.exists(name):
+                os.remove(name)
+
+if __name__ == "__main__":
+    run_tests(1)
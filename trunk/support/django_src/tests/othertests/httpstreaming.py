@@ -0,0 +1,117 @@
+# Unit tests for streamed responses: HttpResponseStream, Template.render_iter()
+# and the middleware that handles them.
+
+from django.core import db
+from django.core.db.querybudget import QueryBudgetExceeded
+from django.core.template import Context, Template
+from django.middleware.common import CommonMiddleware
+from django.middleware.gzip import GZipMiddleware
+from django.middleware.http import ConditionalGetMiddleware
+from django.middleware.querybudget import QueryBudgetMiddleware
+from django.utils.httpwrappers import HttpRequest, HttpResponse, HttpResponseStream
+from django.utils.text import compress_sequence
+import cPickle as pickle, gzip, cStringIO, zlib
+
+def get_request(**meta):
+    request = HttpRequest()
+    request.META = {'REQUEST_METHOD': 'GET'}
+    request.META.update(meta)
+    return request
+
+def get_response():
+    t = Template('{% for i in items %}{{ i }}:{{ text }}\n{% endfor %}')
+    return HttpResponseStream(t.render_iter(Context({'items': range(2000), 'text': u'caf\xe9'})))
+
+EXPECTED = ''.join([u'%s:caf\xe9\n' % i for i in range(2000)])
+
+def run_tests(verbosity=0):
+    # Small pieces are sent together, and the content can only be read once.
+    response = get_response()
+    assert response.is_streaming()
+    chunks = list(response.iter_content('utf-8'))
+    assert ''.join(chunks) == EXPECTED.encode('utf-8'), chunks[:1]
+    assert 1 < len(chunks) < 2000, len(chunks)
+    assert min(map(len, chunks[:-1])) >= HttpResponseStream.chunk_size
+    assert list(response.iter_content('utf-8')) == []
+
+    # Reading the content reads the iterator into memory.
+    response = get_response()
+    assert response.content == EXPECTED.encode('utf-8')
+    assert not response.is_streaming()
+    assert list(response.iter_content('utf-8')) == [EXPECTED.encode('utf-8')]
+    assert not HttpResponse('x').is_streaming()
+
+    # Streamed responses can be pickled, as the cache middleware does.
+    response = pickle.loads(pickle.dumps(get_response()))
+    assert response.content == EXPECTED.encode('utf-8')
+
+    # Gzip compresses the stream as it goes.
+    response = GZipMiddleware().process_response(get_request(HTTP_ACCEPT_ENCODING='gzip'), get_response())
+    assert response.is_streaming() and response['Content-Encoding'] == 'gzip'
+    data = ''.join(response.iter_content('utf-8'))
+    assert gzip.GzipFile(fileobj=cStringIO.StringIO(data)).read() == EXPECTED.encode('utf-8')
+    chunks = compress_sequence(['first', 'second'])
+    assert zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(chunks.next()) == 'first'
+
+    # Closing the response closes the iterator, then calls close_functions.
+    closed = []
+    def closing_iterator():
+        try:
+            yield 'x' * HttpResponseStream.chunk_size
+            yield 'x'
+        except GeneratorExit:
+            closed.append('iterator')
+            raise
+    response = HttpResponseStream(closing_iterator())
+    response.close_functions.append(lambda: closed.append('function'))
+    iterator = response.iter_content('utf-8')
+    iterator.next()
+    response.close()
+    assert closed == ['iterator', 'function'], closed
+
+    # The length and ETag of a streamed response aren't known in advance.
+    response = ConditionalGetMiddleware().process_response(get_request(), get_response())
+    assert response.is_streaming() and not response.has_header('Content-Length')
+    from django.conf import settings
+    old_use_etags, settings.USE_ETAGS = settings.USE_ETAGS, True
+    try:
+        response = CommonMiddleware().process_response(get_request(), get_response())
+    finally:
+        settings.USE_ETAGS = old_use_etags
+    assert response.is_streaming() and not response.has_header('ETag')
+
+    # A response that isn't modified, or to a HEAD request, isn't rendered.
+    response = get_response()
+    response['ETag'] = 'abc'
+    response = ConditionalGetMiddleware().process_response(get_request(HTTP_IF_NONE_MATCH='abc'), response)
+    assert response.status_code == 304 and not response.is_streaming()
+    assert list(response.iter_content('utf-8')) == ['']
+    response = ConditionalGetMiddleware().process_response(get_request(REQUEST_METHOD='HEAD'), get_response())
+    assert list(response.iter_content('utf-8')) == ['']
+
+    # The queries run while a streamed response is sent count against the
+    # view's query budget, which is checked when the response is closed.
+    from django.conf import settings
+    def view():
+        pass
+    view.query_budget = 0
+    def run_query():
+        db.db.cursor().execute("SELECT 1")
+        yield 'x'
+    old_raise, settings.QUERY_BUDGET_RAISE = settings.QUERY_BUDGET_RAISE, True
+    try:
+        middleware, request = QueryBudgetMiddleware(), get_request()
+        middleware.process_view(request, view, {})
+        response = middleware.process_response(request, HttpResponseStream(run_query()))
+        assert list(response.iter_content('utf-8')) == ['x']
+        try:
+            response.close()
+        except QueryBudgetExceeded:
+            pass
+        else:
+            raise AssertionError, "The query budget of a streamed response wasn't checked."
+    finally:
+        settings.QUERY_BUDGET_RAISE = old_raise
+
+if __name__ == "__main__":
+    run_tests(1)
@@ -0,0 +1,92 @@
+"""
+Tests for django.models.core.registry, the in-memory cache of content types
+and the current site.
+"""
+
+from django.conf import settings
+from django.core import db
+from django.core.db.instrumentation import stats
+from django.core.handlers.base import BaseHandler
+
+def run_tests(verbosity=0):
+    had_site_id = hasattr(settings, 'SITE_ID')
+    old_site_id = getattr(settings, 'SITE_ID', None)
+    try:
+        if had_site_id:
+            del settings.SITE_ID
+        check_registry()
+    finally:
+        settings.SITE_ID = old_site_id
+        if not had_site_id:
+            del settings.SITE_ID
+
+def check_registry():
+    from django.models.core import registry, contenttypes, sites
+    registry.reset()
+    ct = contenttypes.get_list()[0]
+
+    # Without SITE_ID, load() only loads the content types.
+    db.reset_queries()
+    registry.load()
+    assert stats.count == 1, stats.count
+
+    # The request handlers load the registry when they start up.
+    settings.SITE_ID = 1
+    registry.reset()
+    db.reset_queries()
+    BaseHandler().load_registry()
+    assert stats.count == 2, stats.count
+
+    # Everything is answered from memory now.
+    db.reset_queries()
+    assert registry.get_content_type(ct.id) is registry.get_content_type(str(ct.id))
+    assert registry.get_content_type_by_name(ct.package_id, ct.python_module_name).id == ct.id
+    assert ct.get_model_module() is ct.get_model_module()
+    assert ct.get_model_module().Klass._meta.get_content_type_id() == ct.id
+    site = sites.get_current()
+    assert sites.get_current() is site
+    assert stats.count == 0, stats.count
+
+    for bad_id in (999999, 'x', 0):
+        try:
+            registry.get_content_type(bad_id)
+        except contenttypes.ContentTypeDoesNotExist:
+            pass
+        else:
+            raise AssertionError, "get_content_type(%r) should have failed" % bad_id
+
+    # Misses reload the content types at most every reload_interval seconds,
+    # and IDs lower than a known one never do.
+    assert stats.count == 0, stats.count
+    old_interval, registry.reload_interval = registry.reload_interval, 0
+    try:
+        for bad_id in (999999, 0):
+            try:
+                registry.get_content_type(bad_id)
+            except contenttypes.ContentTypeDoesNotExist:
+                pass
+        assert stats.count == 1, stats.count
+    finally:
+        registry.reload_interval = old_interval
+
+    # Content types added later are found, too.
+    new_ct = contenttypes.ContentType(name='registry test', package=ct.get_package(), python_module_name='registrytests')
+    new_ct.save()
+    try:
+        assert registry.get_content_type_by_name(ct.package_id, 'registrytests').id == new_ct.id
+    finally:
+        new_ct.delete()
+    try:
+        registry.get_content_type_by_name(ct.package_id, 'registrytests')
+    except contenttypes.ContentTypeDoesNotExist:
+        pass
+    else:
+        raise AssertionError, "deleting a content type should reset the registry"
+
+    # Saving a site resets the registry.
+    site.save()
+    assert sites.get_current() is not site
+    registry.reset()
+
+if __name__ == "__main__":
+    run_tests(1)
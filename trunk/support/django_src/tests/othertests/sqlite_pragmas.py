@@ -0,0 +1,39 @@
+# Unit tests for DATABASE_SQLITE_PRAGMAS.
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+import os, tempfile
+
+def run_tests(verbosity=0):
+    if settings.DATABASE_ENGINE != 'sqlite3':
+        return
+    from django.core.db.backends import sqlite3
+    filename = tempfile.mktemp()
+    try:
+        db = sqlite3.DatabaseWrapper({'DATABASE_NAME': filename, 'DATABASE_SQLITE_PRAGMAS': {
+            'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'busy_timeout': 1234, 'cache_size': -2000,
+        }})
+        cursor = db.cursor()
+        for pragma, value in (('journal_mode', 'wal'), ('synchronous', 1), ('busy_timeout', 1234), ('cache_size', -2000)):
+            cursor.execute("PRAGMA %s" % pragma)
+            assert cursor.fetchone()[0] == value, pragma
+        db.close()
+
+        # Pragma names and values end up in the SQL, so they're checked.
+        db = sqlite3.DatabaseWrapper({'DATABASE_NAME': filename, 'DATABASE_SQLITE_PRAGMAS': {
+            'journal_mode': 'WAL; DROP TABLE foo',
+        }})
+        try:
+            db.cursor()
+        except ImproperlyConfigured:
+            pass
+        else:
+            raise AssertionError, "ImproperlyConfigured wasn't raised."
+        db.close()
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(filename + suffix):
+                os.remove(filename + suffix)
+
+if __name__ == "__main__":
+    run_tests(1)
@@ -0,0 +1,158 @@
+# Unit tests for the compiled-template cache in django.core.template.loader,
+# and for the inheritance that {% extends %} works out once per parent.
+
+from django.conf import settings
+from django.core.template import Context, TemplateDoesNotExist, loader
+from django.core.template.loaders import filesystem
+import os, shutil, tempfile, time
+
+def write(dirname, name, source):
+    f = open(os.path.join(dirname, name) + settings.TEMPLATE_FILE_EXTENSION, 'w')
+    f.write(source)
+    f.close()
+
+INHERITANCE_TEMPLATES = {
+    'base': '<{% block a %}base a{% endblock %}|{% block b %}base b{% endblock %}>',
+    'other_base': '[{% block a %}other a{% endblock %}]',
+    'middle': "{% extends 'base' %}{% block b %}middle b, {{ block.super }}{% endblock %}",
+    'child': '{% extends parent %}{% block a %}child a, {{ block.super }}{% endblock %}',
+}
+
+def inheritance_loader(template_name, template_dirs=None):
+    try:
+        return INHERITANCE_TEMPLATES[template_name]
+    except KeyError:
+        raise TemplateDoesNotExist, template_name
+
+def test_inheritance():
+    # Inheritance is worked out once per parent, and the parents are shared
+    # by every render, so rendering must not change them.
+    child = loader.get_template('child')
+    for i in range(2):
+        for parent, expected in (('base', '<child a, base a|base b>'), ('other_base', '[child a, other a]'),
+                ('middle', '<child a, base a|middle b, base b>')):
+            assert child.render(Context({'parent': parent})) == expected, (parent, i)
+    assert loader.get_template('middle').render(Context()) == '<base a|middle b, base b>'
+    assert loader.get_template('base').render(Context()) == '<base a|base b>'
+    extends_node = child.nodelist[0]
+    inheritance = extends_node.get_inheritance(Context({'parent': 'middle'}))
+    assert extends_node.get_inheritance(Context({'parent': 'middle'})) is inheritance
+    assert len(extends_node._inheritances) == 3
+
+    # A changed parent is picked up once the template cache reloads it, even
+    # two levels up.
+    old_base = INHERITANCE_TEMPLATES['base']
+    INHERITANCE_TEMPLATES['base'] = '({% block a %}new a{% endblock %}|{% block b %}new b{% endblock %})'
+    try:
+        loader.template_cache.clear()
+        child = loader.get_template('child')
+        assert child.render(Context({'parent': 'middle'})) == '(child a, new a|middle b, new b)'
+    finally:
+        INHERITANCE_TEMPLATES['base'] = old_base
+    loader.template_cache.clear()
+    assert child.render(Context({'parent': 'middle'})) == '<child a, base a|middle b, base b>'
+
+    # {% extends variable %} remembers at most MAX_INHERITANCES parents.
+    extends_node = child.nodelist[0]
+    for i in range(loader.MAX_INHERITANCES * 2):
+        INHERITANCE_TEMPLATES['base%s' % i] = '{%% block a %%}%s{%% endblock %%}' % i
+    try:
+        for i in range(loader.MAX_INHERITANCES * 2):
+            assert child.render(Context({'parent': 'base%s' % i})) == 'child a, %s' % i
+            assert len(extends_node._inheritances) <= loader.MAX_INHERITANCES
+    finally:
+        for i in range(loader.MAX_INHERITANCES * 2):
+            del INHERITANCE_TEMPLATES['base%s' % i]
+
+def run_tests(verbosity=0):
+    old_settings = settings.TEMPLATE_CACHE_SIZE, settings.TEMPLATE_CACHE_CHECK_MTIME
+    old_loaders = loader.template_source_loaders
+    loader.template_source_loaders = [filesystem.load_template_source]
+    dirname = tempfile.mkdtemp()
+    dirs = [dirname]
+    try:
+        settings.TEMPLATE_CACHE_SIZE, settings.TEMPLATE_CACHE_CHECK_MTIME = 3, False
+        loader.template_cache.clear()
+        write(dirname, 'rows', '{% for r in rows %}{% cycle odd,even %}{% ifchanged %}{{ r }}{% endifchanged %} {% endfor %}')
+        t = loader.get_template('rows', dirs)
+        assert loader.get_template('rows', dirs) is t
+
+        # Render state, such as {% cycle %}'s, isn't kept from one render to
+        # the next.
+        for i in range(2):
+            assert t.render(Context({'rows': [1, 1, 2]})) == 'odd1 even odd2 ', i
+
+        # Templates that don't exist are remembered, too, for a while.
+        try:
+            loader.get_template('missing', dirs)
+        except TemplateDoesNotExist:
+            pass
+        else:
+            raise AssertionError, "TemplateDoesNotExist wasn't raised."
+        write(dirname, 'missing', 'found')
+        try:
+            loader.get_template('missing', dirs)
+        except TemplateDoesNotExist:
+            pass
+        else:
+            raise AssertionError, "TemplateDoesNotExist wasn't cached."
+        old_timeout, loader.MISSING_TEMPLATE_TIMEOUT = loader.MISSING_TEMPLATE_TIMEOUT, 0
+        try:
+            try:
+                loader.get_template('missing_later', dirs)
+            except TemplateDoesNotExist:
+                pass
+            write(dirname, 'missing_later', 'found later')
+            assert loader.get_template('missing_later', dirs).render(Context()) == 'found later'
+        finally:
+            loader.MISSING_TEMPLATE_TIMEOUT = old_timeout
+
+        # Changes to files aren't noticed...
+        write(dirname, 'rows', 'changed')
+        os.utime(os.path.join(dirname, 'rows.html'), (time.time() + 10, time.time() + 10))
+        assert loader.get_template('rows', dirs) is t
+
+        # ...unless TEMPLATE_CACHE_CHECK_MTIME is on.
+        settings.TEMPLATE_CACHE_CHECK_MTIME = True
+        assert loader.get_template('rows', dirs).render(Context()) == 'changed'
+        assert loader.get_template('missing', dirs).render(Context()) == 'found'
+
+        # The cache holds at most TEMPLATE_CACHE_SIZE templates.
+        for name in ('a', 'b', 'c'):
+            write(dirname, name, name)
+            loader.get_template(name, dirs)
+        assert len(loader.template_cache._entries) == 3
+        assert not loader.template_cache._entries.has_key(('rows', tuple(dirs)))
+
+        # The least recently used template is dropped first.
+        loader.get_template('a', dirs)
+        write(dirname, 'd', 'd')
+        loader.get_template('d', dirs)
+        assert loader.template_cache._entries.has_key(('a', tuple(dirs)))
+        assert not loader.template_cache._entries.has_key(('b', tuple(dirs)))
+
+        # The directories are part of the key.
+        other_dirname = tempfile.mkdtemp()
+        try:
+            write(other_dirname, 'a', 'other a')
+            assert loader.get_template('a', [other_dirname]).render(Context()) == 'other a'
+            assert loader.get_template('a', dirs).render(Context()) == 'a'
+        finally:
+            shutil.rmtree(other_dirname)
+
+        # With TEMPLATE_CACHE_SIZE = 0, templates are loaded every time.
+        settings.TEMPLATE_CACHE_SIZE = 0
+        assert loader.get_template('a', dirs) is not loader.get_template('a', dirs)
+
+        settings.TEMPLATE_CACHE_SIZE, settings.TEMPLATE_CACHE_CHECK_MTIME = 10, False
+        loader.template_source_loaders = [inheritance_loader]
+        loader.template_cache.clear()
+        test_inheritance()
+    finally:
+        settings.TEMPLATE_CACHE_SIZE, settings.TEMPLATE_CACHE_CHECK_MTIME = old_settings
+        loader.template_source_loaders = old_loaders
+        loader.template_cache.clear()
+        shutil.rmtree(dirname)
+
+if __name__ == "__main__":
+    run_tests(1)
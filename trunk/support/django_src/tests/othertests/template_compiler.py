@@ -0,0 +1,61 @@
+# Conformance tests for django.core.template.compiler: every template in the
+# template tests must render the same compiled as it does interpreted, with
+# render() and with render_iter().
+
+from django.conf import settings
+from django.core import template
+from django.core.template import loader
+from django.core.template.compiler import CompiledNodeList, MAX_LOOP_DEPTH, compile_template
+from django.utils.translation import activate, deactivate
+from othertests.templates import TEMPLATE_TESTS, test_template_loader
+
+def render(name, vals, compile):
+    settings.TEMPLATE_COMPILE = compile
+    loader.template_cache.clear()
+    if 'LANGUAGE_CODE' in vals:
+        activate(vals['LANGUAGE_CODE'])
+    try:
+        try:
+            t = loader.get_template(name)
+            return t.render(template.Context(vals)), ''.join(t.render_iter(template.Context(vals)))
+        except Exception, e:
+            return e.__class__
+    finally:
+        if 'LANGUAGE_CODE' in vals:
+            deactivate()
+
+def run_tests(verbosity=0):
+    old_template_loaders, old_compile = loader.template_source_loaders, settings.TEMPLATE_COMPILE
+    loader.template_source_loaders = [test_template_loader]
+    failed_tests = []
+    try:
+        tests = TEMPLATE_TESTS.items()
+        tests.sort()
+        for name, vals in tests:
+            interpreted, compiled = render(name, vals[1], False), render(name, vals[1], True)
+            if interpreted != compiled:
+                if verbosity:
+                    print "Compiled template test: %s -- FAILED. Interpreted %r, compiled %r" % (name, interpreted, compiled)
+                failed_tests.append(name)
+
+        # The whole tree is compiled, including the blocks of child templates.
+        t = loader.get_template('inheritance02')
+        assert isinstance(t.nodelist, CompiledNodeList)
+        for block_node in t.nodelist[0].blocks.values():
+            assert isinstance(block_node.nodelist, CompiledNodeList)
+    finally:
+        loader.template_source_loaders, settings.TEMPLATE_COMPILE = old_template_loaders, old_compile
+        loader.template_cache.clear()
+    assert not failed_tests, "Compiled template tests %s failed." % failed_tests
+
+    # Loops nested too deeply for Python to compile are left to their nodes.
+    depth = MAX_LOOP_DEPTH + 10
+    source = '{% for x in items %}' * depth + '{{ x }}' + '{% endfor %}' * depth
+    t = compile_template(template.Template(source))
+    assert t.render(template.Context({'items': [1]})) == '1'
+    assert ''.join(t.render_iter(template.Context({'items': [1]}))) == '1'
+    t = compile_template(template.Template('{% if x %}{% endif %}'))
+    assert list(t.render_iter(template.Context())) == []
+
+if __name__ == "__main__":
+    run_tests(1)
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.core import template
 from django.core.template import loader
 from django.utils.translation import activate, deactivate
@@ -113,6 +114,27 @@ TEMPLATE_TESTS = {
     'for-tag-vars02': ("{% for val in values %}{{ forloop.counter0 }}{% endfor %}", {"values": [6, 6, 6]}, "012"),
     'for-tag-vars03': ("{% for val in values %}{{ forloop.revcounter }}{% endfor %}", {"values": [6, 6, 6]}, "321"),
     'for-tag-vars04': ("{% for val in values %}{{ forloop.revcounter0 }}{% endfor %}", {"values": [6, 6, 6]}, "210"),
+    'for-tag-vars05': ("{% for val in values %}{% if forloop.first %}f{% endif %}{{ val }}{% if forloop.last %}l{% endif %}{% endfor %}", {"values": [6, 6, 6]}, "f666l"),
+    'for-tag-vars06': ("{% for a in values %}{% for b in values reversed %}{{ forloop.parentloop.counter }}{{ b }}{% endfor %}{% endfor %}", {"values": [1, 2]}, "12112221"),
+    'for-tag-unpack01': ("{% for key,value in items %}{{ key }}:{{ value }}/{% endfor %}", {"items": (('one', 1), ('two', 2))}, "one:1/two:2/"),
+    'for-tag-unpack02': ("{% for key, value in items reversed %}{{ key }}:{{ value }}/{% endfor %}", {"items": (('one', 1), ('two', 2))}, "two:2/one:1/"),
+    'for-tag-unpack03': ("{% for key, value in items %}{{ key }}:{{ value }}/{% endfor %}", {"items": (('one', 1, 'x'), ('two',), 3)}, "one:1/two:/:/"),
+    'for-tag-invalid01': ("{% for key, in items %}{% endfor %}", {}, template.TemplateSyntaxError),
+    'for-tag-invalid02': ("{% for key from items %}{% endfor %}", {}, template.TemplateSyntaxError),
+
+    ### IFCHANGED TAG #########################################################
+    'ifchanged01': ('{% for n in num %}{% ifchanged %}{{ n }}{% endifchanged %}{% endfor %}', {'num': (1,2,3)}, '123'),
+    'ifchanged02': ('{% for n in num %}{% ifchanged %}{{ n }}{% endifchanged %}{% endfor %}', {'num': (1,1,3)}, '13'),
+    'ifchanged03': ('{% for n in num %}{% ifchanged %}{{ n }}{% endifchanged %}{% endfor %}', {'num': (1,1,1)}, '1'),
+
+    # Each time the outer loop starts the inner one over, it counts as a change
+    'ifchanged04': ('{% for n in num %}{% for x in numx %}{% ifchanged %}{{ x }}{% endifchanged %}{% endfor %},{% endfor %}', {'num': (1,2), 'numx': (1,1)}, '1,1,'),
+
+    # Given variables, only they are compared
+    'ifchanged05': ('{% for d in days %}{% ifchanged d.month %}{{ d.month }}:{% endifchanged %}{{ d.day }},{% endfor %}', {'days': [{'month': 1, 'day': 1}, {'month': 1, 'day': 2}, {'month': 2, 'day': 1}]}, '1:1,2,2:1,'),
+    'ifchanged06': ('{% for d in days %}{% ifchanged d.month d.year %}{{ d.year }}{% endifchanged %}{% endfor %}', {'days': [{'month': 1, 'year': 1}, {'month': 1, 'year': 2}, {'month': 1, 'year': 2}]}, '12'),
+    'ifchanged07': ('{% for d in days %}{% ifchanged d.name|lower %}{{ d.name }}{% endifchanged %}{% endfor %}', {'days': [{'name': 'A'}, {'name': 'a'}, {'name': 'b'}]}, 'Ab'),
+    'ifchanged08': ('{% for n in num %}{% ifchanged n %}{% if ifchanged.firstloop %}first{% endif %}{{ n }}{% endifchanged %}{% endfor %}', {'num': (1,2)}, 'first12'),
 
     ### IFEQUAL TAG ###########################################################
     'ifequal01': ("{% ifequal a b %}yes{% endifequal %}", {"a": 1, "b": 2}, ""),
@@ -132,6 +154,28 @@ TEMPLATE_TESTS = {
     'ifnotequal03': ("{% ifnotequal a b %}yes{% else %}no{% endifnotequal %}", {"a": 1, "b": 2}, "yes"),
     'ifnotequal04': ("{% ifnotequal a b %}yes{% else %}no{% endifnotequal %}", {"a": 1, "b": 1}, "no"),
 
+    ### REGROUP TAG ###########################################################
+    'regroup01': ('{% regroup data by bar as grouped %}{% for group in grouped %}{{ group.grouper }}:{% for item in group.list %}{{ item.foo }}{% endfor %},{% endfor %}',
+                  {'data': [{'foo': 'c', 'bar': 1}, {'foo': 'd', 'bar': 1}, {'foo': 'a', 'bar': 2}, {'foo': 'b', 'bar': 2}, {'foo': 'x', 'bar': 3}]},
+                  '1:cd,2:ab,3:x,'),
+
+    # Groupers are compared by value
+    'regroup02': ('{% regroup data by bar as grouped %}{% for group in grouped %}{{ group.grouper }}:{% for item in group.list %}{{ item.foo }}{% endfor %},{% endfor %}',
+                  {'data': [{'foo': 'a', 'bar': 1}, {'foo': 'b', 'bar': 1.0}, {'foo': 'c', 'bar': 2}]},
+                  '1:ab,2:c,'),
+
+    # Filters are applied to the groupers
+    'regroup05': ('{% regroup data by bar|lower as grouped %}{% for group in grouped %}{{ group.grouper }}:{% for item in group.list %}{{ item.foo }}{% endfor %},{% endfor %}',
+                  {'data': [{'foo': 'a', 'bar': 'X'}, {'foo': 'b', 'bar': 'x'}, {'foo': 'c', 'bar': 'y'}]},
+                  'x:ab,y:c,'),
+
+    # Objects without the attribute are grouped under ''
+    'regroup03': ('{% regroup data by bar as grouped %}{% for group in grouped %}{{ group.grouper }}:{{ group.list|length }},{% endfor %}',
+                  {'data': [{'foo': 'a'}, {'foo': 'b'}, {'bar': 1}]}, ':2,1:1,'),
+
+    # A missing list regroups to nothing
+    'regroup04': ('{% regroup data by bar as grouped %}{{ grouped|length }}', {}, '0'),
+
     ### INHERITANCE ###########################################################
 
     # Standard template with no inheritance
@@ -217,6 +261,15 @@ TEMPLATE_TESTS = {
     # Raise exception for custom tags used in child with {% load %} tag in parent, not in child
     'exception04': ("{% extends 'inheritance17' %}{% block first %}{% echo 400 %}5678{% endblock %}", {}, template.TemplateSyntaxError),
 
+    ### LOAD TAG ##############################################################
+
+    # Tags and filters from a library are available after it's loaded
+    'load01': ("{% load testtags %}{{ s|reverse_string }}{% filter reverse_string %}{% echo de f %}{% endfilter %}", {"s": "abc"}, 'cbaf ed'),
+
+    # ... but not in templates that don't load it, even after others have
+    'load02': ("{% echo 400 %}", {}, template.TemplateSyntaxError),
+    'load03': ("{{ s|reverse_string }}", {"s": "abc"}, template.TemplateSyntaxError),
+
     # simple translation of a string delimited by '
     'i18n01': ("{% load i18n %}{% trans 'xxxyyyxxx' %}", {}, "xxxyyyxxx"),
 
@@ -255,6 +308,9 @@ TEMPLATE_TESTS = {
 
     # translation of a constant string
     'i18n13': ('{{ _("Page not found") }}', {'LANGUAGE_CODE': 'de'}, 'Seite nicht gefunden'),
+
+    # filters from other tag libraries work in bindings
+    'i18n14': ('{% load i18n %}{% load testtags %}{% blocktrans with anton|reverse_string as berta %}{{ berta }}{% endblocktrans %}', {'anton': 'zyx'}, "xyz"),
 }
 
 def test_template_loader(template_name, template_dirs=None):
@@ -268,6 +324,7 @@ def run_tests(verbosity=0, standalone=False):
     # Register our custom template loader.
     old_template_loaders = loader.template_source_loaders
     loader.template_source_loaders = [test_template_loader]
+    loader.template_cache.clear()
 
     failed_tests = []
     tests = TEMPLATE_TESTS.items()
@@ -276,7 +333,11 @@ def run_tests(verbosity=0, standalone=False):
         if 'LANGUAGE_CODE' in vals[1]:
             activate(vals[1]['LANGUAGE_CODE'])
         try:
-            output = loader.get_template(name).render(template.Context(vals[1]))
+            t = loader.get_template(name)
+            output = t.render(template.Context(vals[1]))
+            # Rendering in pieces gives the same result.
+            if ''.join(t.render_iter(template.Context(vals[1]))) != output:
+                output = 'render_iter() gave %r' % ''.join(t.render_iter(template.Context(vals[1])))
         except Exception, e:
             if e.__class__ == vals[2]:
                 if verbosity:
@@ -296,6 +357,20 @@ def run_tests(verbosity=0, standalone=False):
                 print "Template test: %s -- FAILED. Expected %r, got %r" % (name, vals[2], output)
             failed_tests.append(name)
     loader.template_source_loaders = old_template_loaders
+    loader.template_cache.clear()
+
+    # Tag libraries are imported once, unless TEMPLATE_RELOAD_TAG_LIBRARIES
+    # is set.
+    library = template.get_library('testtags')
+    assert template.get_library('testtags') is library
+    old_reload, settings.TEMPLATE_RELOAD_TAG_LIBRARIES = settings.TEMPLATE_RELOAD_TAG_LIBRARIES, True
+    try:
+        assert template.get_library('testtags') is not library
+    finally:
+        settings.TEMPLATE_RELOAD_TAG_LIBRARIES = old_reload
+
+    # Outside parsing, the filters of the libraries loaded so far are found.
+    assert template.resolve_variable_with_filters('s|reverse_string|upper', template.Context({'s': 'abc'})) == 'CBA'
 
     if failed_tests and not standalone:
         msg = "Template tests %s failed." % failed_tests
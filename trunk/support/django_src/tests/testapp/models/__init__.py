@@ -1,4 +1,6 @@
 __all__ = ['basic', 'repr', 'custom_methods', 'many_to_one', 'many_to_many',
            'ordering', 'lookup', 'get_latest', 'm2m_intermediary', 'one_to_one',
            'm2o_recursive', 'm2o_recursive2', 'save_delete_hooks', 'custom_pk',
-           'subclassing', 'many_to_one_null', 'custom_columns', 'reserved_names']
+           'subclassing', 'many_to_one_null', 'custom_columns', 'reserved_names',
+           'query_budget', 'get_in_bulk', 'order_with_respect_to',
+           'streaming', 'cache_pk_lookups', 'fixtures']
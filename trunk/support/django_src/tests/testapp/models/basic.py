@@ -157,6 +157,16 @@ datetime.datetime(2005, 7, 31, 12, 30, 45)
 >>> a8.save()
 >>> a8.id
 8L
+
+# Year lookups include the whole of December 31.
+>>> a10 = articles.Article(headline='Article 10', pub_date=datetime(2005, 12, 31, 23, 59, 59))
+>>> a10.save()
+>>> articles.get_object(pub_date__year=2005, pub_date__month=12, pub_date__day=31).id == a10.id
+True
+>>> articles.get_count(pub_date__year=2006)
+0
+>>> articles.get_pub_date_list('month')[-2:]
+[datetime.datetime(2005, 7, 1, 0, 0), datetime.datetime(2005, 12, 1, 0, 0)]
 """
 
 from django.conf import settings
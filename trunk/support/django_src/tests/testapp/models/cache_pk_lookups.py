@@ -0,0 +1,111 @@
+"""
+23. Caching primary-key lookups
+
+Set ``cache_pk_lookups`` in ``class META`` to a number of seconds to keep the
+objects fetched with ``get_object(pk=...)`` (or ``get_object(id__exact=...)``)
+in the cache framework for that long. Related-object lookups, such as
+``get_section()`` below, go through the cache too. Saving or deleting an
+object removes it from the cache.
+"""
+
+from django.core import meta
+
+class Section(meta.Model):
+    name = meta.CharField(maxlength=50)
+    class META:
+        cache_pk_lookups = 60
+
+    def __repr__(self):
+        return self.name
+
+class Post(meta.Model):
+    title = meta.CharField(maxlength=50)
+    section = meta.ForeignKey(Section)
+
+    def __repr__(self):
+        return self.title
+
+class Tag(meta.Model):
+    name = meta.CharField(maxlength=50, primary_key=True)
+    class META:
+        cache_pk_lookups = 60
+
+    def __repr__(self):
+        return self.name
+
+API_TESTS = """
+>>> from django.core import db
+>>> from django.core.db.instrumentation import stats
+>>> c = sections.Section(name='News')
+>>> c.save()
+>>> e1 = posts.Post(title='First', section=c)
+>>> e1.save()
+>>> e2 = posts.Post(title='Second', section=c)
+>>> e2.save()
+
+# The first lookup hits the database; the others are served from the cache.
+>>> db.reset_queries()
+>>> sections.get_object(pk=c.id)
+News
+>>> sections.get_object(id__exact=c.id)
+News
+>>> posts.get_object(pk=e1.id).get_section(), posts.get_object(pk=e2.id).get_section()
+(News, News)
+>>> stats.count
+3
+
+# Every lookup gets its own object.
+>>> sections.get_object(pk=c.id) is sections.get_object(pk=c.id)
+False
+
+# Any spelling of the primary key finds the same cache entry, which saving
+# the object invalidates.
+>>> db.reset_queries()
+>>> sections.get_object(pk='0%d' % c.id)
+News
+>>> stats.count
+0
+>>> c.name = 'Headlines'
+>>> c.save()
+>>> sections.get_object(pk='0%d' % c.id)
+Headlines
+>>> sections.get_object(pk=long(c.id))
+Headlines
+>>> c.name = 'News'
+>>> c.save()
+
+# Other lookups aren't cached.
+>>> db.reset_queries()
+>>> sections.get_object(name__exact='News')
+News
+>>> stats.count
+1
+
+# Saving and deleting invalidate the cached object.
+>>> c.name = 'Headlines'
+>>> c.save()
+>>> sections.get_object(pk=c.id)
+Headlines
+>>> c2 = sections.Section(name='Sport')
+>>> c2.save()
+>>> sections.get_object(pk=c2.id)
+Sport
+>>> c2_id = c2.id
+>>> c2.delete()
+>>> sections.get_object(pk=c2_id)
+Traceback (most recent call last):
+    ...
+SectionDoesNotExist: Section does not exist for {'pk': 2}
+
+# Non-ASCII primary keys work too.
+>>> t = tags.Tag(name=u'caf\\xe9')
+>>> t.save()
+>>> tags.get_object(pk=u'caf\\xe9').name == u'caf\\xe9'
+True
+>>> db.reset_queries()
+>>> tags.get_object(pk=u'caf\\xe9').name == u'caf\\xe9'
+True
+>>> stats.count
+0
+>>> t.delete()
+"""
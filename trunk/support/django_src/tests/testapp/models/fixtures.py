@@ -0,0 +1,120 @@
+"""
+24. Dumping and loading data
+
+``django-admin.py dumpdata`` writes all the rows of the given applications'
+models to a compact text file, one row per line, and
+``django-admin.py loaddata`` reads such a file back into the database in a
+single transaction, inserting rows in batches. On backends where that doesn't
+commit the transaction, it drops the tables' indexes first and creates them
+only once all the rows are in.
+"""
+
+from django.core import meta
+
+class Tutor(meta.Model):
+    name = meta.CharField(maxlength=50)
+
+class Slot(meta.Model):
+    room = meta.CharField(maxlength=20, db_index=True)
+    starts = meta.DateTimeField()
+    is_open = meta.BooleanField()
+    note = meta.TextField(null=True)
+    tutors = meta.ManyToManyField(Tutor)
+
+API_TESTS = """
+>>> import datetime, os, sys, tempfile, StringIO
+>>> from django.core import db, management, meta
+>>> ann = tutors.Tutor(name='Ann')
+>>> ann.save()
+>>> bob = tutors.Tutor(name='Bob\\tBobson')
+>>> bob.save()
+>>> s = slots.Slot(room='@lab', starts=datetime.datetime(2006, 1, 9, 14, 0), is_open=True, note='Bring\\na laptop\\\\')
+>>> s.save()
+>>> s.set_tutors([ann.id, bob.id])
+True
+>>> s = slots.Slot(room='B2', starts=datetime.datetime(2006, 1, 9, 16, 0), is_open=False, note=None)
+>>> s.save()
+
+# Values are escaped, so that each row fits on one line. How fast each table
+# was dumped is reported to standard error.
+>>> sys.stderr = StringIO.StringIO()
+>>> lines = list(management.dumpdata(meta.get_app('fixtures')))
+>>> report, sys.stderr = sys.stderr.getvalue(), sys.__stderr__
+>>> for line in lines:
+...     print line.replace('\\t', ' | ')
+@fixtures.tutors | id | name
+1 | Ann
+2 | Bob\\tBobson
+@fixtures.slots | id | room | starts | is_open | note
+1 | \\@lab | 2006-01-09 14:00:00 | 1 | Bring\\na laptop\\\\
+2 | B2 | 2006-01-09 16:00:00 | 0 | \\N
+@fixtures.slots.tutors | slot_id | tutor_id
+1 | 1
+1 | 2
+>>> report.count('rows/second')
+3
+
+# Load the file into the emptied tables. Their indexes are there afterwards,
+# whether or not the backend dropped them while the rows went in.
+>>> fd, filename = tempfile.mkstemp()
+>>> n = os.write(fd, '\\n'.join(lines) + '\\n')
+>>> os.close(fd)
+>>> cursor = db.db.cursor()
+>>> for table in ('fixtures_slots_tutors', 'fixtures_slots', 'fixtures_tutors'):
+...     c = cursor.execute('DELETE FROM %s' % table)
+>>> for sql in management.get_sql_indexes(meta.get_app('fixtures')):
+...     c = cursor.execute(sql)
+>>> db.db.commit()
+>>> report = management.loaddata(filename)
+>>> len(report)
+4
+>>> report[1].startswith('Loaded 2 rows into fixtures_slots in ')
+True
+>>> [t.name for t in tutors.get_list(order_by=['id'])] == ['Ann', 'Bob\\tBobson']
+True
+>>> s = slots.get_object(pk=1)
+>>> s.room == '@lab', s.starts, s.is_open, s.note == 'Bring\\na laptop\\\\'
+(True, datetime.datetime(2006, 1, 9, 14, 0), True, True)
+>>> [t.id for t in s.get_tutor_list()]
+[1, 2]
+>>> s = slots.get_object(pk=2)
+>>> s.is_open, s.note
+(False, None)
+
+>>> 'fixtures_slots_room' in db.get_index_names(cursor, 'fixtures_slots')
+True
+
+# A bad file loads nothing.
+>>> fd, bad_filename = tempfile.mkstemp()
+>>> n = os.write(fd, '@fixtures.tutors\\tid\\tname\\n3\\tCarl\\n4\\n')
+>>> os.close(fd)
+>>> sys.stderr = StringIO.StringIO()
+>>> try:
+...     management.loaddata(bad_filename)
+... except SystemExit:
+...     print sys.stderr.getvalue().strip()
+Error: ... couldn't be loaded, so the transaction loading it was rolled back. The full error: line 3: expected 2 values, got 1
+>>> sys.stderr = sys.__stderr__
+>>> tutors.get_count()
+2
+
+# That includes a bad row in the indexed slots table, after rows went into
+# another table, and the index survives.
+>>> f = open(bad_filename, 'w')
+>>> f.write('@fixtures.tutors\\tid\\tname\\n3\\tCarl\\n')
+>>> f.write('@fixtures.slots\\tid\\troom\\tstarts\\tis_open\\tnote\\n3\\tC3\\n')
+>>> f.close()
+>>> sys.stderr = StringIO.StringIO()
+>>> try:
+...     management.loaddata(bad_filename)
+... except SystemExit:
+...     print sys.stderr.getvalue().strip()
+Error: ... couldn't be loaded, so the transaction loading it was rolled back. The full error: line 4: expected 5 values, got 2
+>>> sys.stderr = sys.__stderr__
+>>> tutors.get_count(), slots.get_count()
+(2, 2)
+>>> 'fixtures_slots_room' in db.get_index_names(cursor, 'fixtures_slots')
+True
+>>> os.remove(filename)
+>>> os.remove(bad_filename)
+"""
@@ -0,0 +1,68 @@
+"""
+20. Looking up many objects by ID
+
+``get_in_bulk()`` splits long lists of IDs into several queries, of at most
+``meta.GET_IN_BULK_CHUNK_SIZE`` IDs each, so that it doesn't hit limits on the
+number of parameters in a statement (999 in SQLite). Pass ``_temp_table=True``
+to load the IDs into a temporary table and look them up with a single query
+instead; that happens automatically for more than
+``meta.GET_IN_BULK_TEMP_TABLE_THRESHOLD`` IDs.
+"""
+
+from django.core import meta
+
+class Author(meta.Model):
+    name = meta.CharField(maxlength=30)
+
+    def __repr__(self):
+        return self.name
+
+class Book(meta.Model):
+    title = meta.CharField(maxlength=100)
+    author = meta.ForeignKey(Author)
+
+    def __repr__(self):
+        return self.title
+
+API_TESTS = """
+>>> from django.core.db.instrumentation import stats
+>>> from django.core import db, meta
+>>> a = authors.Author(name='Author')
+>>> a.save()
+>>> for i in range(1, 31):
+...     b = books.Book(title='Book %s' % i, author=a)
+...     b.save()
+
+>>> old_chunk_size = meta.GET_IN_BULK_CHUNK_SIZE
+>>> meta.GET_IN_BULK_CHUNK_SIZE = 7
+
+# 30 IDs, plus one that doesn't exist, take 5 queries.
+>>> db.reset_queries()
+>>> bulk = books.get_in_bulk(range(1, 32))
+>>> stats.count
+5
+>>> ids = bulk.keys(); ids.sort(); ids == range(1, 31)
+True
+>>> bulk[12].title == 'Book 12'
+True
+
+# Other lookups and select_related still apply.
+>>> bulk = books.get_in_bulk(range(1, 32), select_related=True, title__startswith='Book 1')
+>>> ids = bulk.keys(); ids.sort(); ids
+[1, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19]
+>>> bulk[15].get_author().name == 'Author'
+True
+
+# With a temporary table, there's a single query for the objects.
+>>> db.reset_queries()
+>>> bulk = books.get_in_bulk(range(1, 32) + [3], _temp_table=True, select_related=True)
+>>> ids = bulk.keys(); ids.sort(); ids == range(1, 31)
+True
+>>> len([q for q in stats.statements if q.startswith('SELECT')])
+1
+>>> bulk = books.get_in_bulk([4, 5], _temp_table=True)
+>>> ids = bulk.keys(); ids.sort(); ids
+[4, 5]
+
+>>> meta.GET_IN_BULK_CHUNK_SIZE = old_chunk_size
+"""
@@ -65,6 +65,23 @@ True
 >>> p1.get_article_list(order_by=['headline'])
 [Django lets you build Web apps easily, NASA uses Python]
 
+# IDs can be given as strings, as they come from forms. Only the rows that
+# change are written, so setting the same IDs again changes nothing.
+>>> a2.set_publications([str(p1.id), str(p2.id)])
+False
+
+# Publication objects can set their related Articles, too.
+>>> p2.set_articles([a1.id, a2.id])
+True
+>>> p2.set_articles([str(a2.id), str(a1.id)])
+False
+>>> articles.get_object(pk=a1.id).get_publication_list()
+[The Python Journal, Science News]
+>>> p2.set_articles([a2.id])
+True
+>>> p2.get_article_list()
+[NASA uses Python]
+
 # If we delete a Publication, its Articles won't be able to access it.
 >>> p1.delete()
 >>> publications.get_list()
@@ -0,0 +1,73 @@
+"""
+21. Ordering with respect to a related object
+
+``order_with_respect_to`` keeps the objects related to a given object in an
+explicit order, stored in an ``_order`` column. New objects are added at the
+end; ``set_FOO_order()`` rearranges them, and ``get_FOO_order()`` returns the
+IDs in order.
+"""
+
+from django.core import meta
+
+class Question(meta.Model):
+    text = meta.CharField(maxlength=200)
+
+    def __repr__(self):
+        return self.text
+
+class Answer(meta.Model):
+    text = meta.CharField(maxlength=200)
+    question = meta.ForeignKey(Question)
+    class META:
+        order_with_respect_to = 'question'
+
+    def __repr__(self):
+        return self.text
+
+API_TESTS = """
+>>> q1 = questions.Question(text='Which Beatle starts with the letter G?')
+>>> q1.save()
+>>> q2 = questions.Question(text='Which Beatle starts with the letter J?')
+>>> q2.save()
+>>> for text in ('John', 'Paul', 'George', 'Ringo'):
+...     a = answers.Answer(text=text, question=q1)
+...     a.save()
+>>> a5 = answers.Answer(text='John', question=q2)
+>>> a5.save()
+
+# Answers are ordered by the order they were added in.
+>>> answers.get_list(question__id__exact=q1.id)
+[John, Paul, George, Ringo]
+>>> q1.get_answer_order()
+[1, 2, 3, 4]
+>>> q2.get_answer_order()
+[5]
+
+>>> q1.set_answer_order([3, 1, 2, 4])
+>>> answers.get_list(question__id__exact=q1.id)
+[George, John, Paul, Ringo]
+
+# Only the answers that move are updated.
+>>> from django.core.db.instrumentation import listeners
+>>> updated = []
+>>> def listener(sql, params, time):
+...     if sql.startswith('UPDATE'):
+...         updated.extend([row[2] for row in params])
+>>> listeners.append(listener)
+>>> q1.set_answer_order([3, 1, 4, 2])
+>>> updated
+[4, 2]
+>>> q1.set_answer_order([3, 1, 4, 2])
+>>> updated
+[4, 2]
+>>> listeners.remove(listener)
+
+# After a deletion, new answers still go to the end.
+>>> answers.get_object(pk=1).delete()
+>>> a6 = answers.Answer(text='Pete', question=q1)
+>>> a6.save()
+>>> answers.get_list(question__id__exact=q1.id)
+[George, Ringo, Paul, Pete]
+>>> a6.get_previous_in_order()
+Paul
+"""
@@ -0,0 +1,78 @@
+"""
+19. Query budgets
+
+``django.core.db.querybudget`` counts the queries a piece of code runs, and
+notices "N+1" patterns: a related-object lookup, such as ``get_reporter()``,
+run once per object in a list instead of using ``select_related``.
+"""
+
+from django.core import meta
+
+class Reporter(meta.Model):
+    name = meta.CharField(maxlength=30)
+
+    def __repr__(self):
+        return self.name
+
+class Article(meta.Model):
+    headline = meta.CharField(maxlength=100)
+    reporter = meta.ForeignKey(Reporter)
+
+    def __repr__(self):
+        return self.headline
+
+API_TESTS = """
+>>> from django.core.db.querybudget import QueryBudget, QueryBudgetExceeded, assert_max_queries
+>>> for i in range(5):
+...     r = reporters.Reporter(name='Reporter %s' % i)
+...     r.save()
+...     a = articles.Article(headline='Article %s' % i, reporter=r)
+...     a.save()
+
+>>> def get_bylines(**kwargs):
+...     return [(a.headline, a.get_reporter().name) for a in articles.get_list(order_by=['id'], **kwargs)]
+
+# get_bylines() runs one query for the list, plus one per article.
+>>> budget = QueryBudget(max_queries=3, n_plus_one=3, name='bylines')
+>>> budget.start()
+>>> bylines = get_bylines()
+>>> budget.stop()
+>>> budget.count
+6
+>>> len(budget.violations())
+2
+>>> budget.violations()[0]
+'6 queries were run; the maximum is 3.'
+>>> budget.violations()[1].startswith('N+1 pattern: 5 queries with different parameters from method_get_many_to_one, called at <doctest')
+True
+>>> try:
+...     budget.check()
+... except QueryBudgetExceeded, e:
+...     print str(e).splitlines()[0]
+Query budget exceeded in bylines:
+
+# Queries run after stop() aren't counted.
+>>> bylines = get_bylines()
+>>> budget.count
+6
+
+# select_related avoids the extra queries.
+>>> bylines = assert_max_queries(1, get_bylines, select_related=True)
+>>> len(bylines)
+5
+
+>>> try:
+...     assert_max_queries(2, get_bylines)
+... except QueryBudgetExceeded, e:
+...     print str(e).splitlines()[:2]
+['Query budget exceeded in get_bylines:', '    6 queries were run; the maximum is 2.']
+
+# The same lookup repeated with the same parameters isn't an N+1 pattern.
+>>> budget = QueryBudget(n_plus_one=3)
+>>> budget.start()
+>>> for i in range(5):
+...     r = articles.get_object(pk=1).get_reporter()
+>>> budget.stop()
+>>> budget.count, budget.violations()
+(10, [])
+"""
@@ -0,0 +1,43 @@
+"""
+22. Streaming large result sets
+
+``get_iterator()`` and ``get_values_iterator()`` take ``stream=True`` to read
+the results through a server-side cursor, where the database backend has
+them, so that memory use stays flat however many rows there are. Rows are
+fetched ``chunk_size`` at a time; by default, that's as many as fit in about
+``meta.GET_ITERATOR_STREAM_BUFFER_SIZE`` bytes, judging by the field types.
+"""
+
+from django.core import meta
+
+class Reading(meta.Model):
+    sensor = meta.CharField(maxlength=20)
+    value = meta.IntegerField()
+
+    def __repr__(self):
+        return '%s: %s' % (self.sensor, self.value)
+
+class Note(meta.Model):
+    text = meta.TextField()
+
+API_TESTS = """
+>>> for i in range(25):
+...     r = readings.Reading(sensor='sensor%s' % (i % 3), value=i)
+...     r.save()
+
+>>> [r.value for r in readings.get_iterator(stream=True, chunk_size=4, order_by=['value'])] == range(25)
+True
+>>> [r.value for r in readings.get_iterator(chunk_size=7, sensor__exact='sensor1', order_by=['-value'])]
+[22, 19, 16, 13, 10, 7, 4, 1]
+>>> [v['value'] for v in readings.get_values_iterator(fields=['value'], stream=True, value__lt=3, order_by=['value'])]
+[0, 1, 2]
+>>> readings.get_list(stream=True, value__gte=24)
+[sensor0: 24]
+
+# Wider rows are fetched in smaller chunks.
+>>> from django.core import meta
+>>> narrow = meta._get_stream_chunk_size(readings.Reading._meta.fields)
+>>> wide = meta._get_stream_chunk_size(notes.Note._meta.fields)
+>>> narrow > wide >= 10
+True
+"""
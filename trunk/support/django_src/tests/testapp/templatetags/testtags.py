@@ -12,4 +12,9 @@ class EchoNode(template.Node):
 def do_echo(parser, token):
     return EchoNode(token.contents.split()[1:])
     
-template.register_tag("echo", do_echo)
\ No newline at end of file
+template.register_tag("echo", do_echo)
+
+def reverse_string(value, arg):
+    return value[::-1]
+
+template.register_filter("reverse_string", reverse_string, False)